@@ -0,0 +1,13 @@
+"""Benchmarks reproducibles del buscador sobre corpus FACTURACION sintéticos."""
+
+from .corpus_sintetico import consultas_sinteticas, generar_corpus
+from .search_benchmark import comparar_benchmarks, ejecutar_benchmark, escribir_benchmark, medir_corpus
+
+__all__ = [
+    "generar_corpus",
+    "consultas_sinteticas",
+    "medir_corpus",
+    "ejecutar_benchmark",
+    "comparar_benchmarks",
+    "escribir_benchmark",
+]
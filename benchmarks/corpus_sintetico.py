@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import hashlib
+import random
+import unicodedata
+
+PROVEEDORES = (
+    "ACME Medical",
+    "Betha Farma",
+    "Distribuidora Gamma",
+    "Laboratorios Delta",
+    "Omega Insumos",
+    "Sigma Quirúrgica",
+    "Kappa Diagnóstico",
+    "Lambda Servicios Integrales",
+    "Farmacéutica del Bajío",
+    "Grupo Médico Orión",
+    "Equipos Hospitalarios Vega",
+    "Oxígeno y Gases Altura",
+    "Limpieza Profesional Iris",
+    "Tecnología Biomédica Atlas",
+    "Suministros Clínicos Polar",
+    "Alimentos Nutricios Sol",
+)
+HOSPITALES = (
+    "Hospital Central",
+    "Hospital Norte",
+    "Hospital Sur",
+    "Clínica San José",
+    "Hospital General de Zona 1",
+    "Hospital Regional Oriente",
+    "Unidad Médica Familiar 12",
+    "Centro Oncológico Estatal",
+)
+MESES = (
+    "01-Enero",
+    "02-Febrero",
+    "03-Marzo",
+    "04-Abril",
+    "05-Mayo",
+    "06-Junio",
+    "07-Julio",
+    "08-Agosto",
+    "09-Septiembre",
+    "10-Octubre",
+    "11-Noviembre",
+    "12-Diciembre",
+)
+ANIOS = ("2023", "2024", "2025", "2026")
+CONCEPTOS = (
+    ("Suministro de medicamentos oncológicos", "caja"),
+    ("Material de curación y gasas estériles", "paquete"),
+    ("Renta de equipo de rayos X portátil", "servicio"),
+    ("Servicio de limpieza hospitalaria", "servicio"),
+    ("Mantenimiento preventivo de ventiladores", "servicio"),
+    ("Honorarios médicos por interconsulta", "servicio"),
+    ("Reactivos de laboratorio clínico", "kit"),
+    ("Oxígeno medicinal en cilindro", "cilindro"),
+    ("Soluciones intravenosas", "pieza"),
+    ("Jeringas y agujas desechables", "caja"),
+    ("Guantes de nitrilo talla mediana", "caja"),
+    ("Alimentación de pacientes hospitalizados", "ración"),
+    ("Recolección de residuos biológico infecciosos", "servicio"),
+    ("Arrendamiento de monitor de signos vitales", "servicio"),
+)
+# (tipo, etiqueta, extensión, carpeta, categoría, prefijo de serie)
+TIPOS = (
+    ("FACTURA", "factura", ".pdf", "PDF", "PDF", "A"),
+    ("FACTURA", "factura", ".xml", "XML", "XML", "A"),
+    ("NOTA DE CRÉDITO", "nota_credito", ".pdf", "PDF", "PDF", "NC"),
+    ("COMPLEMENTO DE PAGO", "complemento_pago", ".xml", "XML", "XML", "P"),
+    ("ORDEN DE COMPRA", "orden_compra", ".xlsx", "EXCEL", "Excel", "OC"),
+)
+PESOS_TIPOS = (50, 25, 8, 10, 7)
+FORMAS_PAGO = ("03 Transferencia electrónica", "99 Por definir", "02 Cheque nominativo", "04 Tarjeta de crédito")
+USOS_CFDI = ("G03 Gastos en general", "G01 Adquisición de mercancías", "S01 Sin efectos fiscales")
+
+
+def _slug(texto: str) -> str:
+    plano = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return "_".join(plano.lower().split())
+
+
+def _rfc(rng: random.Random, nombre: str) -> str:
+    iniciales = "".join(parte[0] for parte in _slug(nombre).split("_"))[:3].upper().ljust(3, "X")
+    return f"{iniciales}{rng.randint(80, 99):02d}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}{rng.choice('ABCDEFGH')}{rng.randint(1, 9)}{rng.choice('AB0123')}"
+
+
+def generar_corpus(n: int, semilla: int = 0) -> list[dict[str, object]]:
+    """Corpus sintético y determinista con la forma de ``dropbox_asignacion_app.json`` (carpeta FACTURACION).
+
+    Misma ``semilla`` y ``n`` producen exactamente los mismos registros; los proveedores siguen una
+    distribución sesgada (pocos proveedores concentran la mayoría de documentos), como en el corpus real.
+    """
+    rng = random.Random(semilla)
+    pesos_proveedor = [1.0 / (i + 1) for i in range(len(PROVEEDORES))]
+    rfcs = {proveedor: _rfc(rng, proveedor) for proveedor in PROVEEDORES}
+    registros: list[dict[str, object]] = []
+    for i in range(max(0, int(n))):
+        proveedor = rng.choices(PROVEEDORES, weights=pesos_proveedor)[0]
+        hospital = rng.choice(HOSPITALES)
+        mes = rng.choice(MESES)
+        anio = rng.choice(ANIOS)
+        tipo, etiqueta, extension, carpeta, categoria, serie = rng.choices(TIPOS, weights=PESOS_TIPOS)[0]
+        concepto, unidad = rng.choice(CONCEPTOS)
+        folio = f"{serie}{10000 + i}"
+        mes_num = mes[:2]
+        dia = rng.randint(1, 28)
+        fecha = f"{anio}-{mes_num}-{dia:02d}T{rng.randint(7, 19):02d}:{rng.randint(0, 59):02d}:00"
+        plantilla = rng.randrange(3)
+        if plantilla == 0:
+            nombre = f"{etiqueta}_{_slug(proveedor)}_{folio}_{mes_num}{anio}{extension}"
+        elif plantilla == 1:
+            nombre = f"{folio}-{_slug(proveedor).split('_')[0].upper()}-{_slug(hospital)}{extension}"
+        else:
+            nombre = f"{tipo.title().replace(' ', '')} {folio} {mes[3:]} {anio}{extension}"
+        cantidad = rng.randint(1, 400)
+        precio = round(rng.uniform(35.0, 18000.0), 2)
+        subtotal = round(cantidad * precio, 2)
+        iva = round(subtotal * 0.16, 2)
+        uuid = hashlib.md5(f"{semilla}-{i}".encode("utf-8")).hexdigest()
+        contenido = (
+            f"{tipo} {folio}\n"
+            f"Emisor: {proveedor} RFC {rfcs[proveedor]}\n"
+            f"Receptor: {hospital}\n"
+            f"Fecha de emisión: {fecha[:10]}\n"
+            f"Concepto: {concepto} ({cantidad} {unidad} a ${precio:,.2f})\n"
+            f"Subtotal: ${subtotal:,.2f} IVA 16%: ${iva:,.2f} Total: ${subtotal + iva:,.2f}\n"
+            f"Forma de pago: {rng.choice(FORMAS_PAGO)} Uso CFDI: {rng.choice(USOS_CFDI)}\n"
+            f"Folio fiscal: {uuid[:8]}-{uuid[8:12]}-{uuid[12:16]}-{uuid[16:20]}-{uuid[20:]}"
+        )
+        digest = hashlib.sha256(f"{i}:{nombre}".encode("utf-8")).hexdigest()
+        registros.append(
+            {
+                "nombre_archivo": nombre,
+                "ruta_completa": f"FACTURACION/{carpeta}/{proveedor}/{anio}/{nombre}",
+                "extension": extension,
+                "carpeta": carpeta,
+                "categoria": categoria,
+                "etiquetas": [etiqueta, mes[3:].lower(), _slug(proveedor).split("_")[0]],
+                "tamaño": rng.randint(18_000, 950_000),
+                "fecha_modificacion": fecha,
+                "sha256": digest,
+                "hash": digest,
+                "contenido_extraido": contenido,
+                "proveedor_virtual": proveedor,
+                "hospital_virtual": hospital,
+                "mes_virtual": mes,
+                "anio_virtual": anio,
+                "carpeta_virtual": f"{proveedor}/{anio}/{hospital}/{mes}",
+            }
+        )
+    return registros
+
+
+def consultas_sinteticas(corpus: list[dict[str, object]], n: int = 12, semilla: int = 0) -> list[str]:
+    """Consultas deterministas representativas: proveedor, folio exacto, concepto, hospital, mes y errores de tipeo."""
+    if not corpus:
+        return []
+    rng = random.Random(semilla + 1)
+    consultas: list[str] = []
+    while len(consultas) < n:
+        doc = corpus[rng.randrange(len(corpus))]
+        proveedor = _slug(str(doc["proveedor_virtual"])).split("_")[0]
+        tipo = len(consultas) % 6
+        if tipo == 0:
+            consulta = proveedor
+        elif tipo == 1:
+            consulta = str(doc["contenido_extraido"]).split("\n", 1)[0].split()[-1]
+        elif tipo == 2:
+            consulta = " ".join(rng.choice(CONCEPTOS)[0].lower().split()[:3])
+        elif tipo == 3:
+            consulta = f"factura {str(doc['hospital_virtual']).lower()}"
+        elif tipo == 4:
+            consulta = f"{proveedor} {str(doc['mes_virtual'])[3:].lower()} {doc['anio_virtual']}"
+        else:
+            # Error de tipeo: se omite una letra interior del proveedor para ejercitar fuzzy.
+            corte = max(1, len(proveedor) // 2)
+            consulta = f"facura {proveedor[:corte]}{proveedor[corte + 1:]}"
+        consultas.append(consulta)
+    return consultas
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import platform
+import sys
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+import sklearn
+
+from dropbox_integration.search_engine import FLEX_MODE, SEARCH_ENGINE_VERSION, STRICT_MODE, SearchEngine
+
+from .corpus_sintetico import consultas_sinteticas, generar_corpus
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_FORMAT_VERSION = 1
+TAMANOS_DEFECTO = (1_000, 10_000, 100_000)
+MODOS_BENCHMARK: dict[str, dict[str, object]] = {
+    "estricta": {"modo": STRICT_MODE, "usar_semantico": False},
+    "flexible": {"modo": FLEX_MODE, "usar_semantico": False},
+    "semantica": {"modo": FLEX_MODE, "usar_semantico": True},
+}
+FILTROS_BENCHMARK: dict[str, object] = {"tipo": "TODOS", "extension": "TODOS", "carpeta": "TODOS", "etiquetas": [], "fuzzy": True}
+UMBRAL_REGRESION_PCT = 10.0
+
+
+def _estadisticas(tiempos_ms: list[float]) -> dict[str, float]:
+    if not tiempos_ms:
+        return {"n": 0, "media_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    valores = np.asarray(tiempos_ms, dtype=np.float64)
+    return {
+        "n": int(valores.size),
+        "media_ms": round(float(valores.mean()), 4),
+        "p50_ms": round(float(np.percentile(valores, 50)), 4),
+        "p95_ms": round(float(np.percentile(valores, 95)), 4),
+        "p99_ms": round(float(np.percentile(valores, 99)), 4),
+        "max_ms": round(float(valores.max()), 4),
+    }
+
+
+def _rss_pico_mb() -> float | None:
+    """Pico de memoria residente del proceso (``None`` donde ``resource`` no existe, p. ej. Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KiB; macOS reporta bytes.
+    return round(pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024, 2)
+
+
+def _medir_consultas(engine: SearchEngine, consultas: list[str], repeticiones: int, usar_cache: bool = False, **parametros: object) -> list[list[float]]:
+    """Tiempos (ms) por pasada; la pasada 0 es la primera ejecución de cada consulta."""
+    pasadas: list[list[float]] = []
+    for _ in range(max(1, repeticiones)):
+        tiempos: list[float] = []
+        for query in consultas:
+            start = perf_counter()
+            engine.buscar_avanzado(query, filtros=dict(FILTROS_BENCHMARK), usar_cache=usar_cache, top_k=50, **parametros)
+            tiempos.append((perf_counter() - start) * 1000.0)
+        pasadas.append(tiempos)
+    return pasadas
+
+
+def medir_corpus(n: int, semilla: int = 0, repeticiones: int = 3, consultas: int = 12, medir_memoria: bool = False) -> dict[str, object]:
+    """Benchmark completo para un corpus sintético de ``n`` documentos.
+
+    Mide indexación, TF-IDF, latencia fría (primera ejecución de cada consulta) vs caliente por modo,
+    efecto del cache de resultados y memoria. Con ``medir_memoria`` la construcción corre bajo
+    ``tracemalloc`` para obtener el pico de asignaciones Python (sus tiempos incluyen ese overhead).
+    """
+    corpus = generar_corpus(n, semilla)
+    queries = consultas_sinteticas(corpus, consultas, semilla)
+    engine = SearchEngine(corpus, cache_size=max(256, len(queries) * 4))
+
+    if medir_memoria:
+        tracemalloc.start()
+    start = perf_counter()
+    engine.indexar_documentos()
+    indexacion_s = perf_counter() - start
+    start = perf_counter()
+    engine.construir_modelo_semantico()
+    tfidf_s = perf_counter() - start
+    start = perf_counter()
+    engine.preparar_lectura()
+    preparacion_s = perf_counter() - start
+    pico_tracemalloc = None
+    if medir_memoria:
+        pico_tracemalloc = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+        tracemalloc.stop()
+
+    modos: dict[str, dict[str, object]] = {}
+    for nombre, parametros in MODOS_BENCHMARK.items():
+        pasadas = _medir_consultas(engine, queries, repeticiones + 1, **parametros)
+        modos[nombre] = {
+            "frio": _estadisticas(pasadas[0]),
+            "caliente": _estadisticas([t for pasada in pasadas[1:] for t in pasada]),
+        }
+
+    # Cache: primera pasada llena el cache (misses), las siguientes lo reutilizan (hits).
+    antes = engine.get_cache_stats()
+    pasadas_cache = _medir_consultas(engine, queries, repeticiones + 1, usar_cache=True, **MODOS_BENCHMARK["flexible"])
+    despues = engine.get_cache_stats()
+    sin_cache = float(np.mean(pasadas_cache[0]))
+    con_cache = float(np.mean([t for pasada in pasadas_cache[1:] for t in pasada]))
+    memoria = engine.get_memory_footprint()
+    return {
+        "documentos": n,
+        "consultas": queries,
+        "indexacion": {
+            "segundos": round(indexacion_s, 4),
+            "documentos_por_segundo": round(n / indexacion_s, 2) if indexacion_s > 0 else 0.0,
+        },
+        "tfidf": {"segundos": round(tfidf_s, 4), "vocabulario": len(getattr(engine._tfidf, "vocabulary_", {}) or {})},
+        "preparacion_lectura": {"segundos": round(preparacion_s, 4)},
+        "modos": modos,
+        "cache": {
+            "miss": _estadisticas(pasadas_cache[0]),
+            "hit": _estadisticas([t for pasada in pasadas_cache[1:] for t in pasada]),
+            "aceleracion": round(sin_cache / con_cache, 2) if con_cache > 0 else 0.0,
+            "hits": int(despues["hits"]) - int(antes["hits"]),
+            "misses": int(despues["misses"]) - int(antes["misses"]),
+        },
+        "memoria": {
+            "indice_mb": round(int(memoria["total_bytes"]) / (1024 * 1024), 2),
+            "componentes_mb": {k: round(v / (1024 * 1024), 3) for k, v in dict(memoria["componentes"]).items()},
+            "tracemalloc_pico_mb": pico_tracemalloc,
+            "rss_pico_mb": _rss_pico_mb(),
+        },
+    }
+
+
+def ejecutar_benchmark(
+    tamanos: tuple[int, ...] = TAMANOS_DEFECTO,
+    semilla: int = 0,
+    repeticiones: int = 3,
+    consultas: int = 12,
+    medir_memoria: bool = False,
+) -> dict[str, object]:
+    """Ejecuta ``medir_corpus`` por tamaño (ascendente, así ``rss_pico_mb`` crece con el corpus) y arma el JSON versionado."""
+    resultados: dict[str, object] = {}
+    for n in sorted(set(int(t) for t in tamanos)):
+        logger.info("Benchmark de búsqueda: corpus sintético de %s documentos", n)
+        resultados[str(n)] = medir_corpus(n, semilla=semilla, repeticiones=repeticiones, consultas=consultas, medir_memoria=medir_memoria)
+    return {
+        "benchmark_version": BENCHMARK_FORMAT_VERSION,
+        "engine_version": SEARCH_ENGINE_VERSION,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "entorno": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "numpy": np.__version__,
+            "scikit_learn": sklearn.__version__,
+        },
+        "parametros": {"semilla": semilla, "repeticiones": repeticiones, "consultas": consultas, "medir_memoria": medir_memoria},
+        "corpus": resultados,
+    }
+
+
+def _hojas_numericas(valor: object, ruta: str = "") -> dict[str, float]:
+    if isinstance(valor, dict):
+        salida: dict[str, float] = {}
+        for clave, hijo in valor.items():
+            salida.update(_hojas_numericas(hijo, f"{ruta}.{clave}" if ruta else str(clave)))
+        return salida
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return {ruta: float(valor)}
+    return {}
+
+
+def comparar_benchmarks(base: dict[str, object], actual: dict[str, object], umbral_pct: float = UMBRAL_REGRESION_PCT) -> dict[str, object]:
+    """Diferencias de tiempos (``*_ms``/``segundos``) entre dos corridas; marca regresiones sobre ``umbral_pct``."""
+    if base.get("benchmark_version") != actual.get("benchmark_version"):
+        raise ValueError("No se pueden comparar benchmarks con distinta benchmark_version")
+    antes = _hojas_numericas(base.get("corpus", {}))
+    despues = _hojas_numericas(actual.get("corpus", {}))
+    cambios: dict[str, dict[str, float]] = {}
+    regresiones: list[str] = []
+    for ruta in sorted(antes.keys() & despues.keys()):
+        if not (ruta.endswith("_ms") or ruta.endswith("segundos")) or antes[ruta] <= 0:
+            continue
+        cambio = (despues[ruta] - antes[ruta]) / antes[ruta] * 100.0
+        cambios[ruta] = {"antes": antes[ruta], "despues": despues[ruta], "cambio_pct": round(cambio, 2)}
+        if cambio > umbral_pct:
+            regresiones.append(ruta)
+    return {"umbral_pct": umbral_pct, "cambios": cambios, "regresiones": regresiones}
+
+
+def escribir_benchmark(path: str | Path, payload: dict[str, object]) -> Path:
+    """Escribe el JSON con llaves ordenadas para que dos corridas se puedan comparar con ``diff``."""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        target.write_text(json.dumps(payload, ensure_ascii=False, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    except Exception as error:
+        logger.error("Error escribiendo benchmark en %s", target, exc_info=True)
+        raise RuntimeError(f"No se pudo escribir benchmark: {error}") from error
+    return target
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    root = Path(__file__).resolve().parents[1]
+    parser = argparse.ArgumentParser(description="Benchmark del buscador sobre un corpus FACTURACION sintético.")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=list(TAMANOS_DEFECTO), help="Tamaños de corpus a medir.")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla del generador de corpus y consultas.")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Pasadas calientes por modo.")
+    parser.add_argument("--consultas", type=int, default=12, help="Número de consultas sintéticas.")
+    parser.add_argument("--memoria", action="store_true", help="Mide el pico de asignaciones con tracemalloc (más lento).")
+    parser.add_argument("--salida", type=str, default=str(root / "docs" / "benchmarks" / "search_benchmark.json"), help="JSON de salida.")
+    parser.add_argument("--comparar", type=str, default=None, help="JSON de una corrida previa para reportar diferencias.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    # El log INFO por búsqueda del motor distorsiona las latencias medidas.
+    logging.getLogger("dropbox_integration").setLevel(logging.WARNING)
+    payload = ejecutar_benchmark(tuple(args.tamanos), semilla=args.semilla, repeticiones=args.repeticiones, consultas=args.consultas, medir_memoria=args.memoria)
+    salida = escribir_benchmark(args.salida, payload)
+    logger.info("Benchmark escrito en %s", salida)
+    if args.comparar:
+        base = json.loads(Path(args.comparar).read_text(encoding="utf-8"))
+        comparacion = comparar_benchmarks(base, payload)
+        print(json.dumps(comparacion, ensure_ascii=False, indent=2))
+        return 1 if comparacion["regresiones"] else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -12,6 +12,7 @@ from .tagging_engine import (
 from .metrics import bytes_humanos, calcular_metricas
 from .content_extractor import extraer_contenido_archivo
 from .search_engine import SearchEngine, construir_estadisticas_busqueda
+from .search_snapshot import IndiceCompartido, indice_compartido
 from .analytics_engine import analizar_archivo, analizar_documentos, construir_resumen_analitico
 from .folder_tree import construir_arbol_virtual, aplicar_filtros_virtuales, opciones_filtros_virtuales, breadcrumbs_virtuales
 from .report_generator import generar_paquete_reportes
@@ -31,6 +32,8 @@ __all__ = [
     "bytes_humanos",
     "extraer_contenido_archivo",
     "SearchEngine",
+    "IndiceCompartido",
+    "indice_compartido",
     "construir_estadisticas_busqueda",
     "analizar_archivo",
     "analizar_documentos",
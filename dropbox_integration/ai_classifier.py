@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import hashlib
+import logging
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 import re
@@ -11,6 +14,14 @@ except Exception:
 
 import numpy as np
 
+from .search_ann import ANN_NPROBE, IndiceIVF
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = 512
+EMBEDDING_DTYPE = np.float32
+EMBEDDINGS_SUFFIX = "_embeddings.npy"
+
 
 def _leer_texto_txt_md(path: Path) -> str:
     try:
@@ -98,64 +109,166 @@ def _tokenizar(texto: str) -> list[str]:
     return [t for t in re.split(r"\W+", texto.lower()) if t]
 
 
-def generar_embeddings(texto: str) -> np.ndarray:
-    """Genera embedding local de un texto usando hashing de tokens."""
-    dim = 512
-    vec = np.zeros(dim, dtype=float)
+@lru_cache(maxsize=65536)
+def _slot_token(tok: str, dim: int) -> int:
+    """Posición del token en el vector: blake2b es estable entre procesos (``hash()`` está salado)."""
+    digest = hashlib.blake2b(tok.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % dim
+
+
+def _vector_hashing(texto: str, dim: int) -> np.ndarray:
+    vec = np.zeros(dim, dtype=EMBEDDING_DTYPE)
     tokens = _tokenizar(texto)
     if not tokens:
         return vec
-    for tok in tokens:
-        vec[hash(tok) % dim] += 1.0
+    slots = np.fromiter((_slot_token(tok, dim) for tok in tokens), dtype=np.int64, count=len(tokens))
+    vec[:] = np.bincount(slots, minlength=dim)
     norm = float(np.linalg.norm(vec))
     if norm > 0:
-        vec = vec / norm
+        vec /= norm
     return vec
 
 
+def generar_embeddings(texto: str, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """Genera embedding local float32 de un texto usando hashing determinista de tokens."""
+    return _vector_hashing(texto, dim)
+
+
 def generar_embeddings_lote(textos: list[str]) -> dict[str, np.ndarray]:
     """Compatibilidad: genera embeddings por lote indexados por posición."""
-    return {str(i): generar_embeddings(texto) for i, texto in enumerate(textos)}
+    matriz = generar_matriz_embeddings(textos)
+    return {str(i): matriz[i] for i in range(matriz.shape[0])}
+
+
+def generar_matriz_embeddings(textos: list[str], dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """Matriz contigua ``len(textos) × dim`` en float32, una fila normalizada por texto."""
+    matriz = np.zeros((len(textos), dim), dtype=EMBEDDING_DTYPE)
+    for i, texto in enumerate(textos):
+        matriz[i] = _vector_hashing(texto, dim)
+    return matriz
+
+
+def texto_embedding(registro: dict[str, Any]) -> str:
+    """Texto de un registro del mapeo que alimenta su embedding."""
+    etiquetas = registro.get("etiquetas", [])
+    etiquetas_txt = " ".join(str(x) for x in etiquetas) if isinstance(etiquetas, list) else ""
+    contenido = registro.get("contenido_extraido") or registro.get("texto_extraido_preview") or ""
+    return f"{registro.get('nombre_archivo', '')} {etiquetas_txt} {registro.get('categoria', '')} {contenido}".strip()
+
+
+def ruta_embeddings(mapeo_json: Path) -> Path:
+    """``.npy`` de embeddings junto al JSON de mapeo (mismo orden de filas que sus registros)."""
+    return mapeo_json.with_name(f"{mapeo_json.stem}{EMBEDDINGS_SUFFIX}")
+
+
+def guardar_embeddings(matriz: np.ndarray, mapeo_json: Path) -> Path:
+    target = ruta_embeddings(mapeo_json)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        np.save(target, np.ascontiguousarray(matriz, dtype=EMBEDDING_DTYPE), allow_pickle=False)
+    except Exception as error:
+        logger.error("Error exportando embeddings a %s", target, exc_info=True)
+        raise RuntimeError(f"No se pudo exportar embeddings: {error}") from error
+    return target
+
+
+def cargar_embeddings(mapeo_json: Path, filas: int | None = None) -> np.ndarray | None:
+    """Abre la matriz de embeddings como memmap de sólo lectura; ``None`` si falta, es inválida o no tiene ``filas``."""
+    path = ruta_embeddings(mapeo_json)
+    if not path.exists():
+        return None
+    try:
+        matriz = np.load(path, mmap_mode="r", allow_pickle=False)
+    except Exception:
+        logger.warning("Embeddings ilegibles en %s", path, exc_info=True)
+        return None
+    if matriz.ndim != 2 or matriz.dtype != EMBEDDING_DTYPE or (filas is not None and matriz.shape[0] != filas):
+        return None
+    return matriz
+
+
+def cargar_o_generar_embeddings(registros: list[dict[str, Any]], mapeo_json: Path) -> np.ndarray:
+    """Reutiliza los embeddings persistidos del mapeo o los genera y guarda si faltan o no corresponden."""
+    matriz = cargar_embeddings(mapeo_json, filas=len(registros))
+    if matriz is not None:
+        return matriz
+    matriz = generar_matriz_embeddings([texto_embedding(r) for r in registros])
+    guardar_embeddings(matriz, mapeo_json)
+    return matriz
 
 
 def _embedding_query(query: str, dim: int) -> np.ndarray:
-    tokens = _tokenizar(query)
-    vec = np.zeros(dim, dtype=float)
-    if not tokens:
-        return vec
-    for tok in tokens:
-        slot = hash(tok) % dim
-        vec[slot] += 1.0
-    norm = float(np.linalg.norm(vec))
-    if norm > 0:
-        vec = vec / norm
-    return vec
+    return _vector_hashing(query, dim)
 
 
-def buscar_similares(query: str, documentos: list[dict[str, Any]], top_k: int = 20) -> list[dict[str, Any]]:
-    """Busca documentos similares por coseno contra embeddings disponibles."""
+def _dimension(item: dict[str, Any]) -> int:
+    for clave in ("embedding", "vector"):
+        vec = item.get(clave)
+        if isinstance(vec, np.ndarray) and vec.size:
+            return int(vec.size)
+    return EMBEDDING_DIM
+
+
+def _vector_documento(item: dict[str, Any], dim: int) -> np.ndarray | None:
+    for clave in ("embedding", "vector"):
+        vec = item.get(clave)
+        if isinstance(vec, np.ndarray) and vec.size == dim:
+            return vec
+    return None
+
+
+def buscar_similares(
+    query: str,
+    documentos: list[dict[str, Any]],
+    top_k: int = 20,
+    matriz: np.ndarray | None = None,
+    ann: IndiceIVF | None = None,
+    nprobe: int = ANN_NPROBE,
+) -> list[dict[str, Any]]:
+    """Busca documentos similares por coseno: un producto matriz-vector y top-k con ``argpartition``.
+
+    ``matriz`` (p. ej. la de ``cargar_embeddings``) alinea una fila por documento; sin ella se apilan
+    los vectores ``embedding``/``vector`` de cada documento. Con ``ann`` (``IndiceIVF.construir`` sobre
+    esa misma matriz) sólo se puntúan las filas de las ``nprobe`` listas más cercanas a la consulta.
+    """
     if not documentos:
         return []
 
-    primer_vector = documentos[0].get("embedding")
-    if not isinstance(primer_vector, np.ndarray) or primer_vector.size == 0:
-        primer_vector = documentos[0].get("vector")
-    if not isinstance(primer_vector, np.ndarray) or primer_vector.size == 0:
-        primer_vector = generar_embeddings(query)
+    filas = np.arange(len(documentos))
+    if matriz is None:
+        dim = _dimension(documentos[0])
+        vectores = [_vector_documento(item, dim) for item in documentos]
+        filas = np.array([i for i, vec in enumerate(vectores) if vec is not None], dtype=np.int64)
+        if not filas.size:
+            return []
+        matriz = np.stack([vectores[i] for i in filas.tolist()])
+    else:
+        matriz = matriz[: len(documentos)]
+        filas = filas[: matriz.shape[0]]
 
-    q_vec = _embedding_query(query, int(primer_vector.size)) if isinstance(primer_vector, np.ndarray) else generar_embeddings(query)
+    q_vec = _embedding_query(query, int(matriz.shape[1]))
     if float(np.linalg.norm(q_vec)) == 0.0:
         return []
 
+    if ann is not None:
+        candidatas = ann.candidatos(q_vec, nprobe)
+        candidatas = candidatas[candidatas < matriz.shape[0]]
+        matriz, filas = matriz[candidatas], filas[candidatas]
+    if not filas.size:
+        return []
+
+    scores = np.asarray(matriz @ q_vec.astype(matriz.dtype, copy=False), dtype=np.float64)
+    k = min(max(1, int(top_k)), scores.size)
+    idx = np.arange(scores.size)
+    if k < scores.size:
+        # Se incluyen todos los empates con el k-ésimo para conservar el orden estable por posición.
+        kth = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        idx = np.flatnonzero(scores >= kth)
+    idx = idx[np.lexsort((idx, -scores[idx]))][:k]
     resultados: list[dict[str, Any]] = []
-    for item in documentos:
-        vec = item.get("embedding")
-        if not isinstance(vec, np.ndarray) or vec.size != q_vec.size:
-            vec = item.get("vector")
-        if not isinstance(vec, np.ndarray) or vec.size != q_vec.size:
+    for i in idx.tolist():
+        if scores[i] <= 0:
             continue
-        score = float(np.dot(q_vec, vec))
-        if score > 0:
-            resultados.append({"id": item.get("id"), "doc": item.get("doc"), "score": score})
-
-    return sorted(resultados, key=lambda x: float(x.get("score", 0.0)), reverse=True)[: max(1, int(top_k))]
+        item = documentos[int(filas[i])]
+        resultados.append({"id": item.get("id"), "doc": item.get("doc"), "score": float(scores[i])})
+    return resultados
@@ -13,6 +13,7 @@ COMPONENTES_SCORE = [
     "score_tokens",
     "score_temporal",
     "score_estructural",
+    "score_bm25f",
     "score_boosting",
 ]
 
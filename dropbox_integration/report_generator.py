@@ -162,6 +162,7 @@ def generar_reporte_excel(
                     "score_tokens",
                     "score_temporal",
                     "score_estructural",
+                    "score_bm25f",
                     "score_boosting",
                     "score_final",
                     "relevancia",
@@ -286,6 +287,7 @@ def generar_paquete_reportes(
                     "score_tokens",
                     "score_temporal",
                     "score_estructural",
+                    "score_bm25f",
                     "score_boosting",
                     "score_final",
                 ]
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import logging
+import math
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+ANN_NPROBE = 8
+ANN_ITERACIONES = 8
+ANN_BLOQUE_FILAS = 8192
+ANN_FORMAT_VERSION = 1
+
+
+def _densa(matriz: Any) -> np.ndarray:
+    return np.asarray(matriz.toarray() if sparse.issparse(matriz) else matriz, dtype=np.float32)
+
+
+def _normalizar_filas(matriz: np.ndarray) -> np.ndarray:
+    normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+    return np.divide(matriz, normas, out=np.zeros_like(matriz), where=normas > 0)
+
+
+class IndiceIVF:
+    """Índice ANN tipo IVF: k-means esférico sobre vectores L2 y listas invertidas por centroide.
+
+    Una consulta visita sólo las ``nprobe`` listas de los centroides más similares y el llamador
+    calcula el coseno exacto sobre esos candidatos. ``nprobe`` es la perilla recall/latencia:
+    ``nprobe >= nlist`` equivale al escaneo exacto. Acepta matrices dispersas (TF-IDF) o densas
+    (embeddings float32).
+    """
+
+    def __init__(self, centroides: np.ndarray, asignacion: np.ndarray) -> None:
+        self.centroides = np.ascontiguousarray(centroides, dtype=np.float32)
+        self.asignacion = np.asarray(asignacion, dtype=np.int32)
+        self._reconstruir_listas()
+
+    def __len__(self) -> int:
+        return int(self.asignacion.size)
+
+    @property
+    def nlist(self) -> int:
+        return int(self.centroides.shape[0])
+
+    @property
+    def dimension(self) -> int:
+        return int(self.centroides.shape[1])
+
+    def _reconstruir_listas(self) -> None:
+        self._orden = np.argsort(self.asignacion, kind="stable").astype(np.int64)
+        conteos = np.bincount(self.asignacion, minlength=self.nlist)
+        self._inicio = np.concatenate([[0], np.cumsum(conteos)]).astype(np.int64)
+
+    def _asignar(self, vectores: Any) -> np.ndarray:
+        """Centroide más similar por fila, en bloques para acotar la matriz filas × nlist."""
+        filas = int(vectores.shape[0])
+        salida = np.zeros(filas, dtype=np.int32)
+        for desde in range(0, filas, ANN_BLOQUE_FILAS):
+            bloque = vectores[desde : desde + ANN_BLOQUE_FILAS]
+            sims = np.asarray(bloque @ self.centroides.T)
+            salida[desde : desde + ANN_BLOQUE_FILAS] = np.argmax(sims, axis=1)
+        return salida
+
+    @classmethod
+    def construir(
+        cls,
+        vectores: Any,
+        nlist: int | None = None,
+        iteraciones: int = ANN_ITERACIONES,
+        semilla: int = 0,
+    ) -> "IndiceIVF":
+        """Entrena los centroides (por defecto ``√n`` listas) con k-means esférico y asigna cada fila."""
+        filas = int(vectores.shape[0])
+        if filas == 0:
+            return cls(np.zeros((1, int(vectores.shape[1])), dtype=np.float32), np.zeros(0, dtype=np.int32))
+        nlist = max(1, min(filas, int(nlist or round(math.sqrt(filas)))))
+        rng = np.random.default_rng(semilla)
+        semillas = np.sort(rng.choice(filas, size=nlist, replace=False))
+        indice = cls(_normalizar_filas(_densa(vectores[semillas])), np.zeros(filas, dtype=np.int32))
+        uno = np.ones(filas, dtype=np.float32)
+        for _ in range(max(1, iteraciones)):
+            asignacion = indice._asignar(vectores)
+            pertenencia = sparse.csr_matrix((uno, (asignacion, np.arange(filas))), shape=(nlist, filas))
+            sumas = _densa(pertenencia @ vectores)
+            vacios = np.asarray(pertenencia.sum(axis=1)).ravel() == 0
+            # Un centroide sin miembros conserva su posición anterior.
+            sumas[vacios] = indice.centroides[vacios]
+            nuevos = _normalizar_filas(sumas)
+            estable = np.array_equal(asignacion, indice.asignacion)
+            indice.centroides = nuevos
+            indice.asignacion = asignacion
+            if estable:
+                break
+        indice.asignacion = indice._asignar(vectores)
+        indice._reconstruir_listas()
+        return indice
+
+    def candidatos(self, consulta: Any, nprobe: int = ANN_NPROBE) -> np.ndarray:
+        """Posiciones (ordenadas) de las listas de los ``nprobe`` centroides más similares a la consulta."""
+        if not len(self):
+            return np.zeros(0, dtype=np.int64)
+        nprobe = max(1, int(nprobe))
+        if nprobe >= self.nlist:
+            return np.arange(len(self), dtype=np.int64)
+        q = consulta.reshape(1, -1) if isinstance(consulta, np.ndarray) else consulta
+        sims = np.asarray(q @ self.centroides.T, dtype=np.float64).ravel()
+        elegidos = np.argpartition(-sims, nprobe - 1)[:nprobe]
+        partes = [self._orden[self._inicio[c] : self._inicio[c + 1]] for c in elegidos.tolist()]
+        return np.sort(np.concatenate(partes)) if partes else np.zeros(0, dtype=np.int64)
+
+    def agregar(self, vectores: Any) -> None:
+        """Asigna filas nuevas (al final) a sus centroides sin reentrenar."""
+        if int(vectores.shape[0]) == 0:
+            return
+        self.asignacion = np.concatenate([self.asignacion, self._asignar(vectores)])
+        self._reconstruir_listas()
+
+    def conservar(self, posiciones: list[int] | np.ndarray) -> None:
+        """Retiene sólo las filas indicadas (renumeradas en ese orden), p. ej. tras eliminar documentos."""
+        self.asignacion = self.asignacion[np.asarray(posiciones, dtype=np.int64)]
+        self._reconstruir_listas()
+
+    def estadisticas(self) -> dict[str, object]:
+        tamanos = np.diff(self._inicio)
+        return {
+            "documentos": len(self),
+            "nlist": self.nlist,
+            "lista_media": round(float(tamanos.mean()), 2) if tamanos.size else 0.0,
+            "lista_max": int(tamanos.max()) if tamanos.size else 0,
+        }
+
+    def guardar(self, path: str | Path) -> Path:
+        target = Path(path)
+        try:
+            with target.open("wb") as handler:
+                np.savez(
+                    handler,
+                    version=np.asarray([ANN_FORMAT_VERSION]),
+                    centroides=self.centroides,
+                    asignacion=self.asignacion,
+                )
+        except Exception as error:
+            logger.error("Error persistiendo índice ANN en %s", target, exc_info=True)
+            raise RuntimeError(f"No se pudo persistir índice ANN: {error}") from error
+        return target
+
+    @classmethod
+    def cargar(cls, path: str | Path) -> "IndiceIVF | None":
+        """Carga un índice persistido; ``None`` si falta o no es compatible."""
+        target = Path(path)
+        if not target.exists():
+            return None
+        try:
+            with np.load(target, allow_pickle=False) as datos:
+                if int(datos["version"][0]) != ANN_FORMAT_VERSION:
+                    return None
+                return cls(datos["centroides"], datos["asignacion"])
+        except Exception:
+            logger.warning("Índice ANN ilegible en %s", target, exc_info=True)
+            return None
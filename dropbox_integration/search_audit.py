@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import IO, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+AUDIT_LOG_MAX = 2000
+AUDIT_JSONL_MAX_BYTES = 16 * 1024 * 1024
+AUDIT_JSONL_RESPALDOS = 5
+EVENTO_BUSQUEDA = "busqueda_avanzada"
+
+
+class SumideroAuditoriaJSONL:
+    """Historial completo de eventos de auditoría en un JSONL de sólo anexado con rotación por tamaño.
+
+    Cada evento es una línea JSON. Al superar ``max_bytes`` el archivo vigente pasa a ``<ruta>.1``
+    (y ``.1`` a ``.2``, hasta ``respaldos``), así el disco queda acotado y la memoria del proceso no
+    crece con el historial. Un fallo de escritura se registra en el log y no interrumpe la búsqueda.
+    """
+
+    def __init__(self, path: str | Path, max_bytes: int = AUDIT_JSONL_MAX_BYTES, respaldos: int = AUDIT_JSONL_RESPALDOS) -> None:
+        self.path = Path(path)
+        self.max_bytes = max(1, int(max_bytes))
+        self.respaldos = max(0, int(respaldos))
+        self._lock = threading.Lock()
+        self._archivo: IO[str] | None = None
+        self._bytes = 0
+
+    def __getstate__(self) -> dict[str, object]:
+        estado = dict(self.__dict__)
+        estado.pop("_lock", None)
+        estado["_archivo"] = None
+        return estado
+
+    def __setstate__(self, estado: dict[str, object]) -> None:
+        self.__dict__.update(estado)
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo: dict[int, object]) -> "SumideroAuditoriaJSONL":
+        # Un solo archivo por proceso: las copias RCU del motor siguen anexando al mismo historial.
+        return self
+
+    def _abrir(self) -> IO[str]:
+        if self._archivo is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._archivo = self.path.open("a", encoding="utf-8")
+            self._bytes = self.path.stat().st_size
+        return self._archivo
+
+    def _rotar(self) -> None:
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+        if self.respaldos == 0:
+            self.path.unlink(missing_ok=True)
+            return
+        for i in range(self.respaldos - 1, 0, -1):
+            origen = self.path.with_name(f"{self.path.name}.{i}")
+            if origen.exists():
+                origen.replace(self.path.with_name(f"{self.path.name}.{i + 1}"))
+        self.path.replace(self.path.with_name(f"{self.path.name}.1"))
+
+    def escribir(self, evento: dict[str, object]) -> None:
+        linea = json.dumps(evento, ensure_ascii=False, default=str) + "\n"
+        tamano = len(linea.encode("utf-8"))
+        with self._lock:
+            try:
+                archivo = self._abrir()
+                if self._bytes and self._bytes + tamano > self.max_bytes:
+                    self._rotar()
+                    archivo = self._abrir()
+                archivo.write(linea)
+                archivo.flush()
+                self._bytes += tamano
+            except OSError:
+                logger.warning("No se pudo escribir evento de auditoría en %s", self.path, exc_info=True)
+
+    def cerrar(self) -> None:
+        with self._lock:
+            if self._archivo is not None:
+                self._archivo.close()
+                self._archivo = None
+
+    def archivos(self) -> list[Path]:
+        """Archivos del historial del más antiguo al más reciente."""
+        rotados = [self.path.with_name(f"{self.path.name}.{i}") for i in range(self.respaldos, 0, -1)]
+        return [p for p in [*rotados, self.path] if p.exists()]
+
+    def leer(self) -> Iterator[dict[str, object]]:
+        with self._lock:
+            if self._archivo is not None:
+                self._archivo.flush()
+            archivos = self.archivos()
+        for archivo in archivos:
+            yield from _leer_jsonl(archivo)
+
+
+def _leer_jsonl(path: Path) -> Iterator[dict[str, object]]:
+    try:
+        with path.open("r", encoding="utf-8") as fh:
+            for linea in fh:
+                linea = linea.strip()
+                if not linea:
+                    continue
+                try:
+                    evento = json.loads(linea)
+                except json.JSONDecodeError:
+                    # Línea truncada por un cierre abrupto: se omite sin descartar el resto del historial.
+                    continue
+                if isinstance(evento, dict):
+                    yield evento
+    except FileNotFoundError:
+        return
+
+
+def leer_eventos_auditoria(path: str | Path, respaldos: int = AUDIT_JSONL_RESPALDOS) -> Iterator[dict[str, object]]:
+    """Recorre en orden cronológico el historial JSONL (rotados incluidos) sin cargarlo entero en memoria."""
+    return SumideroAuditoriaJSONL(path, respaldos=respaldos).leer()
+
+
+def historial_busquedas(eventos: Iterable[dict[str, object]]) -> Iterator[dict[str, object]]:
+    """Filtra los eventos de búsqueda con la forma que espera ``construir_estadisticas_busqueda``."""
+    for evento in eventos:
+        if evento.get("evento") == EVENTO_BUSQUEDA and str(evento.get("query", "")).strip():
+            yield {
+                "query": evento.get("query", ""),
+                "tipo_top": evento.get("tipo_top", ""),
+                "carpeta_top": evento.get("carpeta_top", ""),
+            }
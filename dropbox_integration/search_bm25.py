@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import math
+import threading
+from collections import OrderedDict
+from typing import Iterable
+
+import numpy as np
+
+from .search_index import CAMPOS_INDICE, InvertedIndex
+
+BM25_K1 = 1.2
+# Peso de cada campo en la frecuencia combinada y normalización por largo (b) propia del campo.
+BM25F_PESOS_CAMPO: dict[str, float] = {"nombre": 3.0, "etiquetas": 2.0, "estructura": 1.5, "contenido": 1.0}
+BM25F_B_CAMPO: dict[str, float] = {"nombre": 0.5, "etiquetas": 0.3, "estructura": 0.3, "contenido": 0.75}
+BM25F_CACHE_TERMINOS = 4096
+# Postings de un término por campo como arreglos ``(campo, llaves, tf)`` y su frecuencia documental.
+_PostingsTermino = tuple[list[tuple[str, np.ndarray, np.ndarray]], int]
+
+
+class PuntuadorBM25F:
+    """BM25F sobre los postings de ``InvertedIndex``: sin modelo que ajustar ni matriz que reconstruir.
+
+    Para cada término se combinan las frecuencias por campo ponderadas y normalizadas por largo
+    (``tf_f / (1 - b_f + b_f · largo_f / largo_medio_f)``) y se satura con ``k1``; el score se divide
+    por la suma de IDF de la consulta para quedar en ``[0, 1)`` como los demás componentes.
+    Los postings de cada término y los largos por documento se convierten a arreglos una vez por
+    versión del índice invertido, así que agregar o eliminar documentos sólo invalida esas vistas.
+    ``sincronizar`` las reconstruye y debe llamarse con el índice quieto (el motor lo hace bajo su
+    lock de escritura); ``puntuar`` sólo lee la vista vigente y admite llamadas concurrentes.
+    """
+
+    def __init__(
+        self,
+        indice: InvertedIndex,
+        pesos: dict[str, float] | None = None,
+        b: dict[str, float] | None = None,
+        k1: float = BM25_K1,
+    ) -> None:
+        self.indice = indice
+        self.pesos = dict(BM25F_PESOS_CAMPO if pesos is None else pesos)
+        self.b = dict(BM25F_B_CAMPO if b is None else b)
+        self.k1 = float(k1)
+        self._lock = threading.Lock()
+        self._version = -1
+        # Vista (largos por campo, postings por término) de una versión del índice; se reemplaza entera.
+        self._vista: tuple[dict[str, np.ndarray], OrderedDict[str, _PostingsTermino]] = ({}, OrderedDict())
+
+    def __getstate__(self) -> dict[str, object]:
+        estado = dict(self.__dict__)
+        estado.pop("_lock", None)
+        # La vista la escriben los lectores en ``_termino``: la copia la reconstruye en ``sincronizar``.
+        estado["_vista"] = ({}, OrderedDict())
+        estado["_version"] = -1
+        return estado
+
+    def __setstate__(self, estado: dict[str, object]) -> None:
+        self.__dict__.update(estado)
+        self._lock = threading.Lock()
+
+    @property
+    def vigente(self) -> bool:
+        return self._version == self.indice.version
+
+    def sincronizar(self) -> None:
+        """Reconstruye los largos por campo si el índice cambió desde la última vista."""
+        if self.vigente:
+            return
+        largos: dict[str, np.ndarray] = {}
+        for campo in CAMPOS_INDICE:
+            por_doc = self.indice.doc_len[campo]
+            arreglo = np.zeros(max(por_doc, default=-1) + 1, dtype=np.float64)
+            if por_doc:
+                arreglo[np.fromiter(por_doc.keys(), dtype=np.int64, count=len(por_doc))] = np.fromiter(por_doc.values(), dtype=np.float64, count=len(por_doc))
+            largos[campo] = arreglo
+        self._vista = (largos, OrderedDict())
+        self._version = self.indice.version
+
+    def _termino(self, terminos: OrderedDict[str, _PostingsTermino], token: str) -> _PostingsTermino:
+        """Postings por campo como arreglos ``(campo, llaves, tf)`` y su frecuencia documental."""
+        memo = terminos.get(token)
+        if memo is not None:
+            return memo
+        por_campo: list[tuple[str, np.ndarray, np.ndarray]] = []
+        for campo in CAMPOS_INDICE:
+            if self.pesos.get(campo, 0.0) <= 0:
+                continue
+            docs = self.indice.frecuencias(token, campo)
+            if docs:
+                llaves = np.fromiter(docs.keys(), dtype=np.int64, count=len(docs))
+                tf = np.fromiter(docs.values(), dtype=np.float64, count=len(docs))
+                por_campo.append((campo, llaves, tf))
+        df = int(np.unique(np.concatenate([llaves for _, llaves, _ in por_campo])).size) if por_campo else 0
+        with self._lock:
+            terminos[token] = (por_campo, df)
+            while len(terminos) > BM25F_CACHE_TERMINOS:
+                terminos.popitem(last=False)
+        return por_campo, df
+
+    def idf(self, df: int) -> float:
+        total = len(self.indice)
+        return math.log(1.0 + (total - df + 0.5) / (df + 0.5))
+
+    def puntuar(self, tokens: Iterable[str], doc_keys: np.ndarray) -> np.ndarray:
+        """Score BM25F normalizado de cada llave de ``doc_keys`` para los términos de la consulta."""
+        doc_keys = np.asarray(doc_keys, dtype=np.int64)
+        salida = np.zeros(doc_keys.size, dtype=np.float64)
+        if doc_keys.size == 0:
+            return salida
+        self.sincronizar()
+        largos, terminos = self._vista
+        fila = np.full(int(doc_keys.max()) + 1, -1, dtype=np.int64)
+        fila[doc_keys] = np.arange(doc_keys.size)
+        suma_idf = 0.0
+        for token in dict.fromkeys(tokens):
+            por_campo, df = self._termino(terminos, token)
+            if df == 0:
+                continue
+            idf = self.idf(df)
+            suma_idf += idf
+            tf_combinada = np.zeros(doc_keys.size, dtype=np.float64)
+            for campo, llaves, tf in por_campo:
+                dentro = llaves < fila.size
+                llaves, tf = llaves[dentro], tf[dentro]
+                filas = fila[llaves]
+                presentes = filas >= 0
+                if not presentes.any():
+                    continue
+                llaves, tf, filas = llaves[presentes], tf[presentes], filas[presentes]
+                medio = self.indice.longitud_media(campo) or 1.0
+                b = self.b.get(campo, 0.75)
+                norma = 1.0 - b + b * largos[campo][llaves] / medio
+                np.add.at(tf_combinada, filas, self.pesos[campo] * tf / norma)
+            salida += idf * tf_combinada / (self.k1 + tf_combinada)
+        if suma_idf <= 0:
+            return salida
+        return salida / suma_idf
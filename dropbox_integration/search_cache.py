@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Callable, Hashable
+
+
+def canonicalizar(valor: object) -> str:
+    """Serializa filtros/pesos de forma estable para usarlos como parte de una llave de cache."""
+    return json.dumps(valor, sort_keys=True, ensure_ascii=False, default=str)
+
+
+class ResultCache:
+    """Cache LRU con expiración por TTL para resultados de búsqueda (seguro entre hilos)."""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 300.0, reloj: Callable[[], float] = monotonic) -> None:
+        self.max_entries = max(0, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self._reloj = reloj
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getstate__(self) -> dict[str, object]:
+        estado = dict(self.__dict__)
+        estado.pop("_lock", None)
+        return estado
+
+    def __setstate__(self, estado: dict[str, object]) -> None:
+        self.__dict__.update(estado)
+        self._lock = threading.Lock()
+
+    @property
+    def habilitado(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: Hashable) -> Any | None:
+        """Retorna el valor vigente y lo marca como usado recientemente; ``None`` si no existe o expiró."""
+        with self._lock:
+            entrada = self._entries.get(key)
+            if entrada is None:
+                self.misses += 1
+                return None
+            creado, valor = entrada
+            if self.ttl_seconds > 0 and self._reloj() - creado > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return valor
+
+    def put(self, key: Hashable, valor: Any) -> None:
+        if not self.habilitado:
+            return
+        with self._lock:
+            self._entries[key] = (self._reloj(), valor)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, object]:
+        consultas = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / consultas, 4) if consultas else 0.0,
+            "entradas": len(self._entries),
+            "max_entradas": self.max_entries,
+            "ttl_segundos": self.ttl_seconds,
+            "evictions": self.evictions,
+            "expiraciones": self.expirations,
+        }
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+from collections import deque
+from itertools import islice
+from pathlib import Path
+from typing import Iterator
+from urllib.error import URLError
+from urllib.request import Request, urlopen
+
+from .search_audit import AUDIT_LOG_MAX
+from .search_engine import PAGE_SIZE, escribir_auditoria_csv, escribir_auditoria_json, escribir_performance_csv, escribir_performance_json
+from .search_index import SUGERENCIAS_LIMITE
+from .search_metrics import escribir_latencias_json, escribir_latencias_prometheus
+from .search_server import SERVER_HOST, SERVER_PORT
+
+logger = logging.getLogger(__name__)
+
+SEARCH_SERVER_ENV = "DROPBOX_SEARCH_SERVER"
+CLIENT_TIMEOUT_SECONDS = 30.0
+HEALTH_TIMEOUT_SECONDS = 0.5
+
+
+class SearchClient:
+    """Cliente delgado de ``search_server`` con la misma interfaz de búsqueda/exportación que ``SearchEngine``.
+
+    El contexto de la última búsqueda (resultados auditados, métricas y eventos) llega en la misma
+    respuesta y se guarda en el cliente, así que cada sesión exporta su propia auditoría.
+    """
+
+    def __init__(self, url: str | None = None, timeout: float = CLIENT_TIMEOUT_SECONDS) -> None:
+        self.url = (url or os.environ.get(SEARCH_SERVER_ENV) or f"http://{SERVER_HOST}:{SERVER_PORT}").rstrip("/")
+        self.timeout = timeout
+        self._last_audited_results: list[dict[str, object]] = []
+        self._last_performance_metrics: dict[str, object] = {}
+        self._last_auditoria: dict[str, object] = {}
+        self._audit_sesion: deque[dict[str, object]] = deque(maxlen=AUDIT_LOG_MAX)
+
+    def _peticion(self, ruta: str, datos: dict[str, object] | None = None, timeout: float | None = None) -> dict[str, object]:
+        cuerpo = None if datos is None else json.dumps(datos, ensure_ascii=False, default=str).encode("utf-8")
+        request = Request(f"{self.url}{ruta}", data=cuerpo, headers={"Content-Type": "application/json"}, method="GET" if cuerpo is None else "POST")
+        try:
+            with urlopen(request, timeout=timeout or self.timeout) as respuesta:
+                return json.loads(respuesta.read().decode("utf-8"))
+        except (URLError, OSError, ValueError) as error:
+            raise RuntimeError(f"No se pudo consultar el servidor de búsqueda {self.url}{ruta}: {error}") from error
+
+    def disponible(self) -> bool:
+        """``True`` si el servidor responde al chequeo de salud."""
+        try:
+            return bool(self._peticion("/salud", timeout=HEALTH_TIMEOUT_SECONDS).get("ok"))
+        except RuntimeError:
+            return False
+
+    def buscar_avanzado(self, query: str, filtros: dict[str, object], **parametros: object) -> list[dict[str, object]]:
+        respuesta = self._peticion("/buscar_avanzado", {"query": query, "filtros": filtros or {}, **parametros})
+        resultados = list(respuesta.get("resultados", []))
+        self._last_audited_results = resultados
+        self._last_performance_metrics = dict(respuesta.get("performance_metrics", {}))
+        self._last_auditoria = dict(respuesta.get("auditoria", {}))
+        self._audit_sesion.extend(respuesta.get("audit_log", []))
+        return resultados
+
+    def buscar_pagina(self, query: str, filtros: dict[str, object], page_size: int = PAGE_SIZE, cursor: str | None = None, **parametros: object) -> dict[str, object]:
+        """Página de resultados del servidor; las siguientes se sirven del ranking cacheado allá."""
+        pagina = self._peticion("/buscar_pagina", {"query": query, "filtros": filtros or {}, "page_size": page_size, "cursor": cursor, **parametros})
+        self._last_audited_results = list(pagina.get("resultados", []))
+        return pagina
+
+    def iter_buscar(self, query: str, filtros: dict[str, object], page_size: int = PAGE_SIZE, **parametros: object) -> Iterator[dict[str, object]]:
+        cursor: str | None = None
+        while True:
+            pagina = self.buscar_pagina(query, filtros, page_size=page_size, cursor=cursor, **parametros)
+            yield from pagina.get("resultados", [])
+            cursor = pagina.get("cursor")
+            if not cursor:
+                return
+
+    def buscar_lote(self, queries: list[str], filtros: dict[str, object], **parametros: object) -> list[dict[str, object]]:
+        return list(self._peticion("/buscar_lote", {"queries": list(queries), "filtros": filtros or {}, **parametros}).get("lote", []))
+
+    def buscar_semantico(self, query: str, top_k: int = 20, nprobe: int | None = None) -> list[dict[str, object]]:
+        datos: dict[str, object] = {"query": query, "top_k": top_k}
+        if nprobe is not None:
+            datos["nprobe"] = nprobe
+        return list(self._peticion("/buscar_semantico", datos).get("resultados", []))
+
+    def contar_facetas(self, filtros: dict[str, object] | None = None, campos: list[str] | None = None) -> dict[str, dict[str, int]]:
+        return dict(self._peticion("/contar_facetas", {"filtros": filtros or {}, "campos": campos}).get("facetas", {}))
+
+    def sugerir(self, prefijo: str, limit: int = SUGERENCIAS_LIMITE) -> list[dict[str, object]]:
+        return list(self._peticion("/sugerir", {"prefijo": prefijo, "limit": limit}).get("sugerencias", []))
+
+    def recargar(self) -> dict[str, object]:
+        """Pide al servidor releer la asignación y publicar un snapshot nuevo si el corpus cambió."""
+        return self._peticion("/recargar", {})
+
+    def get_last_performance_metrics(self) -> dict[str, object]:
+        return dict(self._last_performance_metrics)
+
+    def get_latency_histograms(self) -> dict[str, object]:
+        """Histogramas agregados del servidor (todas las sesiones que comparten el índice)."""
+        return self._peticion("/metricas")
+
+    def get_audit_log(self, limit: int = 200, sesion: bool = False) -> list[dict[str, object]]:
+        if limit <= 0:
+            return []
+        if sesion:
+            return list(islice(reversed(self._audit_sesion), limit))[::-1]
+        return list(self._peticion(f"/auditoria?limit={int(limit)}").get("audit_log", []))
+
+    def estadisticas_busqueda(self) -> dict[str, dict[str, int]]:
+        """Estadísticas de búsqueda sobre el historial de auditoría del servidor."""
+        return dict(self._peticion("/estadisticas"))
+
+    def auditoria_sesion(self) -> dict[str, object]:
+        return self._last_auditoria or {"resultados_scores": list(self._last_audited_results), "audit_log": list(self._audit_sesion)}
+
+    def export_auditoria_json(self, path: str) -> Path:
+        return escribir_auditoria_json(path, self.auditoria_sesion())
+
+    def export_auditoria_csv(self, path: str) -> Path:
+        return escribir_auditoria_csv(path, self._last_audited_results)
+
+    def export_performance_json(self, path: str) -> Path:
+        return escribir_performance_json(path, self._last_performance_metrics)
+
+    def export_performance_csv(self, path: str) -> Path:
+        return escribir_performance_csv(path, self._last_performance_metrics)
+
+    def export_latencias_json(self, path: str) -> Path:
+        return escribir_latencias_json(path, self.get_latency_histograms())
+
+    def export_latencias_prometheus(self, path: str) -> Path:
+        return escribir_latencias_prometheus(path, self.get_latency_histograms())
@@ -1,23 +1,40 @@
 from __future__ import annotations
 
+import copy
 import csv
+import functools
+import hashlib
+import heapq
 import json
 import logging
 import math
 import re
-from collections import Counter
-from dataclasses import asdict, dataclass, field
+import sys
+import threading
+from bisect import bisect_right
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import asdict, dataclass, field, fields
 from datetime import datetime, timezone
+from itertools import islice
 from pathlib import Path
 from time import perf_counter
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator
 
 import numpy as np
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 
-from .ai_classifier import buscar_similares
 from .content_extractor import extraer_texto_archivo
+from .search_ann import ANN_NPROBE, IndiceIVF
+from .search_bm25 import PuntuadorBM25F
+from .search_audit import AUDIT_LOG_MAX, SumideroAuditoriaJSONL, historial_busquedas
+from .search_cache import ResultCache, canonicalizar
+from .search_features import CAMPOS_BOOST, CAMPOS_FACETA, ColumnarFeatures, FacetIndex
+from .search_index import SUGERENCIAS_LIMITE, IndiceAutocompletado, InvertedIndex, NameIndex, tokenizar_terminos
+from .search_metrics import MetricasBusqueda, escribir_latencias_json, escribir_latencias_prometheus
+from .search_store import ConsultaContenido, DocumentStore
 
 try:
     from .tagging_engine import asignar_etiquetas_automaticas
@@ -25,16 +42,64 @@ except Exception:
     asignar_etiquetas_automaticas = None
 
 try:
-    from rapidfuzz import fuzz  # type: ignore
+    from rapidfuzz import fuzz, process  # type: ignore
 except Exception:
     fuzz = None
+    process = None
 
 logger = logging.getLogger(__name__)
 
 TOKEN_REGEX = re.compile(r"\w+", re.UNICODE)
 STRICT_MODE = "estricta"
 FLEX_MODE = "flexible"
-SEARCH_ENGINE_VERSION = "2.2.0"
+MOTOR_HIBRIDO = "hibrido"
+MOTOR_BM25F = "bm25f"
+SEARCH_ENGINE_VERSION = "2.3.0"
+FUZZY_CANDIDATE_LIMIT = 200
+FUZZY_CANDIDATE_CUTOFF = 60.0
+FUZZY_WORKERS = -1
+TFIDF_REFIT_RATIO = 0.25
+INDEX_FORMAT_VERSION = 1
+INDEX_MANIFEST_FILE = "search_index.json"
+INDEX_TFIDF_FILE = "search_index_tfidf.npz"
+INDEX_ANN_FILE = "search_index_ann.npz"
+INDEX_CHUNK_FACTOR = 4
+INDEX_FILE_TIMEOUT_SECONDS = 30.0
+# Campos crudos que ``_build_document`` usa además de hash, ruta, etiquetas y contenido.
+CAMPOS_HUELLA = (
+    "nombre_archivo",
+    "extension",
+    "carpeta",
+    "categoria",
+    "tamaño",
+    "fecha_modificacion",
+    "proveedor_virtual",
+    "hospital_virtual",
+    "mes_virtual",
+    "anio_virtual",
+    "carpeta_virtual",
+)
+FILTRO_FACETA = {
+    "tipo": "tipo",
+    "extension": "extension",
+    "carpeta": "carpeta",
+    "proveedor": "proveedor",
+    "proveedor_virtual": "proveedor",
+    "hospital": "hospital",
+    "hospital_virtual": "hospital",
+    "mes": "mes",
+    "mes_virtual": "mes",
+    "anio": "anio",
+    "año": "anio",
+    "anio_virtual": "anio",
+    "carpeta_virtual": "carpeta_virtual",
+}
+BOOST_MIN = 0.8
+BOOST_MAX = 1.65
+_SIN_TIEMPOS: dict[str, float] = {}
+RESULT_CACHE_SIZE = 256
+RESULT_CACHE_TTL_SECONDS = 300.0
+PAGE_SIZE = 50
 
 
 @dataclass(frozen=True)
@@ -48,9 +113,10 @@ class SearchWeights:
     tokens: float = 0.10
     temporal: float = 0.06
     estructural: float = 0.05
+    bm25f: float = 0.0
 
 
-@dataclass
+@dataclass(slots=True)
 class DocumentoIndexado:
     """Representación indexada de un documento con metadatos de búsqueda."""
 
@@ -62,7 +128,6 @@ class DocumentoIndexado:
     etiquetas: list[str]
     tamano: int
     fecha_modificacion: str
-    contenido: str
     hash: str
     proveedor_virtual: str = "SIN_PROVEEDOR"
     hospital_virtual: str = "SIN_HOSPITAL"
@@ -72,6 +137,14 @@ class DocumentoIndexado:
     score: float = 0.0
 
 
+# ``contenido`` no vive en ``DocumentoIndexado``: se proyecta desde el buffer de ``DocumentStore``.
+CAMPOS_RESULTADO = (*(f.name for f in fields(DocumentoIndexado)), "contenido")
+# ``contenido`` puede pesar decenas de KB por documento: sólo se incluye si se pide explícitamente.
+CAMPOS_RESULTADO_DEFECTO = tuple(campo for campo in CAMPOS_RESULTADO if campo != "contenido")
+SNIPPET_MAX_CHARS = 400
+CAMPOS_CATEGORICOS = ("extension", "carpeta", "tipo", "proveedor_virtual", "hospital_virtual", "mes_virtual", "anio_virtual", "carpeta_virtual")
+
+
 @dataclass
 class QueryContext:
     """Contexto preprocesado de una consulta para ranking y auditoría."""
@@ -92,22 +165,193 @@ class QueryContext:
     idf_query_factor: float = 1.0
     audit_id: str = ""
     started_at: float = field(default_factory=perf_counter)
+    semantica_lote: tuple[np.ndarray, np.ndarray] | None = None
+    plan: PlanScoring | None = None
+    motor: str = MOTOR_HIBRIDO
+
+
+@dataclass(frozen=True, slots=True)
+class PlanScoring:
+    """Componentes que pueden afectar el score de una consulta; se arma una vez por ``QueryContext``.
+
+    En modo estricto sólo participan exacto y tokens. En flexible se omiten los componentes
+    desactivados o con peso 0 (su valor auditado queda en 0), salvo el temporal: con ``temporal_boost``
+    el boosting lo necesita aunque su peso sea 0, así que se calcula y ``score_temporal`` reporta ese
+    valor (no suma al score crudo, sólo al boost). ``bm25f`` sólo aplica con el motor BM25F.
+    """
+
+    flexible: bool
+    exacto: bool
+    tokens: bool
+    fuzzy: bool = False
+    semantico: bool = False
+    contenido: bool = False
+    temporal: bool = False
+    estructural: bool = False
+    temporal_boost: bool = False
+    bm25f: bool = False
+
+    @classmethod
+    def desde_contexto(cls, ctx: QueryContext) -> PlanScoring:
+        tokens = bool(ctx.query_tokens)
+        if ctx.modo == STRICT_MODE:
+            return cls(flexible=False, exacto=ctx.usar_nombre, tokens=tokens)
+        w = ctx.weights
+        return cls(
+            flexible=True,
+            exacto=ctx.usar_nombre and w.exacto > 0,
+            tokens=tokens and w.tokens > 0,
+            fuzzy=ctx.usar_fuzzy and ctx.usar_nombre and w.fuzzy > 0,
+            semantico=ctx.usar_semantico and w.tfidf > 0,
+            contenido=ctx.usar_contenido and w.contenido > 0,
+            temporal=w.temporal > 0,
+            estructural=w.estructural > 0,
+            temporal_boost=float(ctx.boost_weights.get("temporal", 1.0)) > 0,
+            bm25f=ctx.motor == MOTOR_BM25F and bool(ctx.query_tokens) and w.bm25f > 0,
+        )
 
 
-class SearchEngine:
-    """Motor de búsqueda documental híbrido y extensible para Dropbox IA."""
+@dataclass(frozen=True, slots=True)
+class RankingPaginado:
+    """Ranking completo de una consulta en orden estable (score desc, id, ruta) del que se sirven páginas.
+
+    El cursor es la llave ``[score, id, ruta]`` (JSON) de la última fila entregada. Si esa fila sigue
+    en el ranking la página siguiente empieza justo después, aunque los scores se hayan recalculado
+    (la recencia depende del reloj); si ya no está, empieza en la primera llave mayor.
+    """
+
+    docs: list[DocumentoIndexado]
+    llaves: list[tuple[float, str, str]]
+    componentes: list[dict[str, float]]
+    filas: dict[tuple[str, str], int]
+
+    @classmethod
+    def desde_ranked(cls, ranked: list[tuple[DocumentoIndexado, float, dict[str, float]]], componentes: bool) -> RankingPaginado:
+        ordenado = sorted(ranked, key=lambda x: (-x[1], x[0].hash or x[0].ruta, x[0].ruta))
+        llaves = [(float(score), doc.hash or doc.ruta, doc.ruta) for doc, score, _ in ordenado]
+        return cls(
+            docs=[doc for doc, _, _ in ordenado],
+            llaves=llaves,
+            componentes=[components for _, _, components in ordenado] if componentes else [],
+            filas={(doc_id, ruta): fila for fila, (_, doc_id, ruta) in enumerate(llaves)},
+        )
+
+    def __len__(self) -> int:
+        return len(self.llaves)
+
+    def score(self, fila: int) -> float:
+        return self.llaves[fila][0]
+
+    def cursor(self, fila: int) -> str:
+        return json.dumps(list(self.llaves[fila]), ensure_ascii=False)
+
+    def posicion(self, cursor: str | None) -> int:
+        """Fila donde empieza la página que sigue a ``cursor`` (0 sin cursor)."""
+        if not cursor:
+            return 0
+        try:
+            score, doc_id, ruta = json.loads(cursor)
+            score = float(score)
+        except (TypeError, ValueError) as error:
+            raise ValueError(f"cursor de paginación inválido: {cursor!r}") from error
+        fila = self.filas.get((str(doc_id), str(ruta)))
+        if fila is not None:
+            return fila + 1
+        objetivo = (-score, str(doc_id), str(ruta))
+        return bisect_right(range(len(self.llaves)), objetivo, key=lambda i: (-self.llaves[i][0], self.llaves[i][1], self.llaves[i][2]))
+
+
+def _sincronizado(metodo: Callable[..., Any]) -> Callable[..., Any]:
+    """Serializa el método con el lock del motor (mutaciones y construcciones perezosas)."""
+
+    @functools.wraps(metodo)
+    def envoltura(self: "SearchEngine", *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            return metodo(self, *args, **kwargs)
 
-    def __init__(self, documentos: list[dict[str, object]]) -> None:
+    return envoltura
+
+
+class _EstadoPorHilo:
+    """Atributo cuyo valor es propio de cada hilo: cada sesión ve su última búsqueda, no la de otra."""
+
+    def __init__(self, fabrica: Callable[[], Any]) -> None:
+        self._fabrica = fabrica
+        self._nombre = ""
+
+    def __set_name__(self, owner: type, nombre: str) -> None:
+        self._nombre = nombre
+
+    def __get__(self, obj: Any, owner: type | None = None) -> Any:
+        if obj is None:
+            return self
+        sesion = obj._sesion
+        try:
+            return getattr(sesion, self._nombre)
+        except AttributeError:
+            valor = self._fabrica()
+            setattr(sesion, self._nombre, valor)
+            return valor
+
+    def __set__(self, obj: Any, valor: Any) -> None:
+        setattr(obj._sesion, self._nombre, valor)
+
+
+class SearchEngine:
+    """Motor de búsqueda documental híbrido y extensible para Dropbox IA.
+
+    Las consultas son seguras entre hilos sobre un índice ya construido: el estado de la última
+    búsqueda (contexto, resultados auditados y métricas) es por hilo y las estructuras perezosas
+    (TF-IDF, columnas, facetas) se construyen bajo un lock. Las mutaciones del índice no deben
+    correr en paralelo con consultas; para compartir un índice entre sesiones se publica un snapshot
+    nuevo con ``IndiceCompartido`` (read-copy-update).
+    """
+
+    _last_query_context = _EstadoPorHilo(dict)
+    _last_audited_results = _EstadoPorHilo(list)
+    _last_performance_metrics = _EstadoPorHilo(dict)
+    _content_query = _EstadoPorHilo(lambda: None)
+    _audit_sesion = _EstadoPorHilo(lambda: deque(maxlen=AUDIT_LOG_MAX))
+
+    def __init__(
+        self,
+        documentos: list[dict[str, object]],
+        usar_indice_invertido: bool = True,
+        cache_size: int = RESULT_CACHE_SIZE,
+        cache_ttl: float = RESULT_CACHE_TTL_SECONDS,
+        usar_ann: bool = False,
+        metricas: bool = True,
+        auditoria_jsonl: str | Path | SumideroAuditoriaJSONL | None = None,
+    ) -> None:
         self.documentos = documentos or []
+        self.usar_indice_invertido = usar_indice_invertido
+        self.usar_ann = usar_ann
+        self._metricas = MetricasBusqueda() if metricas else None
+        if auditoria_jsonl is not None and not isinstance(auditoria_jsonl, SumideroAuditoriaJSONL):
+            auditoria_jsonl = SumideroAuditoriaJSONL(auditoria_jsonl)
+        self._auditoria_jsonl: SumideroAuditoriaJSONL | None = auditoria_jsonl
+        self._lock = threading.RLock()
+        self._audit_lock = threading.Lock()
+        self._sesion = threading.local()
+        self._generation = 0
+        self._result_cache = ResultCache(max_entries=cache_size, ttl_seconds=cache_ttl)
         self.index: list[DocumentoIndexado] = []
+        self._doc_keys: list[int] = []
+        self._key_pos: dict[int, int] = {}
+        self._next_key = 0
+        self._inverted = InvertedIndex()
+        self._bm25f = PuntuadorBM25F(self._inverted)
+        self._names = NameIndex()
+        self._columnar: ColumnarFeatures | None = None
+        self._facets: FacetIndex | None = None
+        self._autocompletado: IndiceAutocompletado | None = None
         self._tfidf: TfidfVectorizer | None = None
+        self._tfidf_config: dict[str, object] = {}
+        self._tfidf_drift = 0
         self._matriz_tfidf: Any = None
+        self._ann: IndiceIVF | None = None
         self._idf_map: dict[str, float] = {}
-        self._doc_tokens: dict[str, set[str]] = {}
-        self._doc_name_norm: dict[str, str] = {}
-        self._doc_content_norm: dict[str, str] = {}
-        self._doc_struct_tokens: dict[str, set[str]] = {}
-        self._doc_date: dict[str, datetime] = {}
+        self._store = DocumentStore()
         self._field_freq: dict[str, Counter[str]] = {
             "proveedor": Counter(),
             "hospital": Counter(),
@@ -115,10 +359,52 @@ class SearchEngine:
             "anio": Counter(),
             "tipo": Counter(),
         }
-        self.audit_log: list[dict[str, object]] = []
-        self._last_query_context: dict[str, object] = {}
-        self._last_audited_results: list[dict[str, object]] = []
-        self._last_performance_metrics: dict[str, object] = {}
+        self.audit_log: deque[dict[str, object]] = deque(maxlen=AUDIT_LOG_MAX)
+
+    def __getstate__(self) -> dict[str, object]:
+        """Estado copiable (``copy.deepcopy``/pickle) sin locks, sesiones por hilo ni cache de resultados."""
+        estado = dict(self.__dict__)
+        for clave in ("_lock", "_audit_lock", "_sesion"):
+            estado.pop(clave, None)
+        estado["_result_cache"] = ResultCache(self._result_cache.max_entries, self._result_cache.ttl_seconds)
+        # Los lectores agregan eventos al deque mientras se copia: se toma una foto bajo su lock.
+        with self._audit_lock:
+            estado["audit_log"] = list(self.audit_log)
+        return estado
+
+    def __setstate__(self, estado: dict[str, object]) -> None:
+        estado["audit_log"] = deque(estado.get("audit_log", ()), maxlen=AUDIT_LOG_MAX)
+        self.__dict__.update(estado)
+        self._lock = threading.RLock()
+        self._audit_lock = threading.Lock()
+        self._sesion = threading.local()
+
+    def _asegurar_indice(self) -> None:
+        if self.index:
+            return
+        with self._lock:
+            if not self.index:
+                self.indexar_documentos()
+
+    def preparar_lectura(self, semantico: bool = True) -> None:
+        """Materializa todas las estructuras perezosas para que las consultas concurrentes sólo lean."""
+        with self._lock:
+            self._asegurar_indice()
+            if semantico and self._tfidf is None:
+                self.construir_modelo_semantico()
+            self._ensure_columnar()
+            self._ensure_facets()
+            self._ensure_autocompletado()
+            self._store.materializar()
+
+    def contexto_sesion(self) -> dict[str, object]:
+        """Contexto, resultados auditados y métricas de la última búsqueda hecha desde el hilo actual."""
+        return {
+            "query_context": dict(self._last_query_context),
+            "resultados": list(self._last_audited_results),
+            "performance_metrics": dict(self._last_performance_metrics),
+            "audit_log": list(self._audit_sesion),
+        }
 
     @staticmethod
     def _normalizar_texto(valor: Any) -> str:
@@ -166,6 +452,13 @@ class SearchEngine:
             return STRICT_MODE
         return FLEX_MODE
 
+    @staticmethod
+    def _normalize_motor(valor: Any) -> str:
+        raw = str(valor or "").strip().lower()
+        if raw in {"bm25", "bm25f", MOTOR_BM25F}:
+            return MOTOR_BM25F
+        return MOTOR_HIBRIDO
+
     @staticmethod
     def _safe_ratio(a: str, b: str) -> float:
         if not a or not b:
@@ -177,20 +470,77 @@ class SearchEngine:
         except Exception:
             return 0.0
 
-    @staticmethod
-    def _semantic_vector(doc: DocumentoIndexado) -> str:
-        return f"{doc.nombre} {' '.join(doc.etiquetas)} {doc.tipo} {doc.proveedor_virtual} {doc.hospital_virtual} {doc.mes_virtual} {doc.anio_virtual} {doc.contenido}".strip()
+    def _contenido(self, doc: DocumentoIndexado) -> str:
+        """Contenido extraído del documento con sus mayúsculas, reconstruido desde el store."""
+        return self._store.original(doc.hash or doc.ruta)
+
+    def _semantic_vector(self, doc: DocumentoIndexado) -> str:
+        # TF-IDF pasa el texto a minúsculas: basta el buffer normalizado, sin reconstruir mayúsculas.
+        contenido = self._store.contenido(doc.hash or doc.ruta)
+        return f"{doc.nombre} {' '.join(doc.etiquetas)} {doc.tipo} {doc.proveedor_virtual} {doc.hospital_virtual} {doc.mes_virtual} {doc.anio_virtual} {contenido}".strip()
 
-    def _resultado(self, doc: DocumentoIndexado, score: float) -> dict[str, object]:
-        out = asdict(doc)
+    def _resultado(
+        self,
+        doc: DocumentoIndexado,
+        score: float,
+        campos: tuple[str, ...] = CAMPOS_RESULTADO_DEFECTO,
+        snippet: int = 0,
+        query_norm: str = "",
+        query_tokens: list[str] | None = None,
+    ) -> dict[str, object]:
+        """Proyección del documento a un dict de resultado sin copiar campos no solicitados."""
+        out: dict[str, object] = {campo: self._contenido(doc) if campo == "contenido" else getattr(doc, campo) for campo in campos}
+        if "etiquetas" in out:
+            out["etiquetas"] = list(doc.etiquetas)
         out["fecha"] = doc.fecha_modificacion
         out["relevancia"] = round(float(max(0.0, score)), 4)
         out["id"] = doc.hash or doc.ruta
+        if snippet > 0:
+            out["snippet"] = self._snippet(doc, query_norm, query_tokens or [], snippet)
         return out
 
+    @staticmethod
+    def _campos_resultado(campos: list[str] | tuple[str, ...] | None) -> tuple[str, ...]:
+        if campos is None:
+            return CAMPOS_RESULTADO_DEFECTO
+        return tuple(campo for campo in campos if campo in CAMPOS_RESULTADO)
+
+    def _snippet(self, doc: DocumentoIndexado, query_norm: str, query_tokens: list[str], largo: int) -> str:
+        """Fragmento acotado del contenido alrededor de la primera coincidencia de la consulta."""
+        largo = min(int(largo), SNIPPET_MAX_CHARS)
+        doc_id = doc.hash or doc.ruta
+        total = self._store.largo_contenido(doc_id)
+        if largo <= 0 or not total:
+            return ""
+        inicio = -1
+        for termino in [query_norm, *query_tokens]:
+            if termino:
+                inicio = self._store.encontrar(doc_id, termino)
+                if inicio >= 0:
+                    break
+        desde = max(0, inicio - largo // 3) if inicio >= 0 else 0
+        fragmento = self._store.original(doc_id, desde, desde + largo).strip()
+        prefijo = "…" if desde > 0 else ""
+        sufijo = "…" if desde + largo < total else ""
+        return f"{prefijo}{fragmento}{sufijo}"
+
+    def _invalidate_columnar_cache(self) -> None:
+        self._columnar = None
+        self._facets = None
+        self._autocompletado = None
+
+    def _bump_generation(self) -> None:
+        """Marca un cambio de índice o modelo: los resultados cacheados de generaciones previas dejan de usarse."""
+        self._generation += 1
+        self._result_cache.clear()
+
     def _invalidate_semantic_cache(self) -> None:
+        self._bump_generation()
         self._tfidf = None
+        self._tfidf_config = {}
+        self._tfidf_drift = 0
         self._matriz_tfidf = None
+        self._ann = None
         self._idf_map = {}
 
     def _compute_dynamic_tfidf_config(self) -> dict[str, object]:
@@ -223,41 +573,170 @@ class SearchEngine:
         for counter in self._field_freq.values():
             counter.clear()
         for doc in self.index:
-            self._field_freq["proveedor"][self._normalizar_texto(doc.proveedor_virtual)] += 1
-            self._field_freq["hospital"][self._normalizar_texto(doc.hospital_virtual)] += 1
-            self._field_freq["mes"][self._normalizar_texto(doc.mes_virtual)] += 1
-            self._field_freq["anio"][self._normalizar_texto(doc.anio_virtual)] += 1
-            self._field_freq["tipo"][self._normalizar_texto(doc.tipo)] += 1
+            self._count_field_frequencies(doc, 1)
+
+    def _count_field_frequencies(self, doc: DocumentoIndexado, delta: int) -> None:
+        for key, value in self._boost_field_values(doc).items():
+            counter = self._field_freq[key]
+            counter[value] += delta
+            if counter[value] <= 0:
+                del counter[value]
+
+    @staticmethod
+    def _struct_text(doc: DocumentoIndexado) -> str:
+        return " ".join(
+            [
+                doc.carpeta,
+                doc.carpeta_virtual,
+                doc.proveedor_virtual,
+                doc.hospital_virtual,
+                doc.mes_virtual,
+                doc.anio_virtual,
+                doc.ruta,
+            ]
+        )
+
+    def _postings_fields(self, doc: DocumentoIndexado, contenido: str) -> dict[str, list[str]]:
+        return {
+            "nombre": tokenizar_terminos(doc.nombre),
+            "etiquetas": tokenizar_terminos(" ".join(doc.etiquetas)),
+            "contenido": tokenizar_terminos(contenido),
+            "estructura": tokenizar_terminos(f"{self._struct_text(doc)} {doc.tipo}"),
+        }
 
-    def _build_document_cache(self, doc: DocumentoIndexado) -> None:
+    def _build_document_cache(
+        self,
+        doc: DocumentoIndexado,
+        contenido: str,
+        compartido: bool = False,
+        tokens: set[str] | None = None,
+        struct_tokens: set[str] | None = None,
+    ) -> None:
+        """Registra ``doc`` en store, postings y llaves; ``contenido`` sólo se conserva en el store.
+
+        ``compartido`` indica que ``contenido`` es el mismo objeto que retiene ``self.documentos``.
+        """
         doc_id = doc.hash or doc.ruta
+        # Valores categóricos internados: miles de documentos comparten el mismo objeto str.
+        for campo in CAMPOS_CATEGORICOS:
+            setattr(doc, campo, sys.intern(getattr(doc, campo)))
+        doc.etiquetas = [sys.intern(tag) for tag in doc.etiquetas]
         name_norm = self._normalizar_texto(doc.nombre)
-        content_norm = self._normalizar_texto(doc.contenido)
-        tokens = set(self._tokenizar(f"{doc.nombre} {' '.join(doc.etiquetas)} {doc.contenido}"))
-        struct_tokens = set(
-            self._tokenizar(
-                " ".join(
-                    [
-                        doc.carpeta,
-                        doc.carpeta_virtual,
-                        doc.proveedor_virtual,
-                        doc.hospital_virtual,
-                        doc.mes_virtual,
-                        doc.anio_virtual,
-                        doc.ruta,
-                    ]
-                )
-            )
-        )
-        self._doc_name_norm[doc_id] = name_norm
-        self._doc_content_norm[doc_id] = content_norm
-        self._doc_tokens[doc_id] = tokens
-        self._doc_struct_tokens[doc_id] = struct_tokens
+        limpio = str(contenido or "").strip()
+        compartido, contenido = compartido and limpio is contenido, limpio
+        if tokens is None:
+            tokens = set(self._tokenizar(f"{doc.nombre} {' '.join(doc.etiquetas)} {contenido}"))
+        if struct_tokens is None:
+            struct_tokens = set(self._tokenizar(self._struct_text(doc)))
         fecha_dt = self._parse_fecha(doc.fecha_modificacion)
-        if fecha_dt is not None:
-            self._doc_date[doc_id] = fecha_dt
+        doc_key = self._next_key
+        self._next_key += 1
+        self._store.asignar(
+            doc_id,
+            nombre=name_norm,
+            contenido=contenido,
+            tokens=tokens,
+            estructura=struct_tokens,
+            fecha_ts=fecha_dt.timestamp() if fecha_dt is not None else None,
+            clave=doc_key,
+            compartido=compartido,
+        )
+        self._inverted.agregar(doc_key, self._postings_fields(doc, contenido))
+        self._key_pos[doc_key] = len(self._doc_keys)
+        self._doc_keys.append(doc_key)
+
+    def _rebuild_name_index(self) -> None:
+        self._names.reconstruir(self._doc_keys, [self._normalizar_texto(doc.nombre) for doc in self.index])
+
+    def _boost_field_values(self, doc: DocumentoIndexado) -> dict[str, str]:
+        return {
+            "proveedor": self._normalizar_texto(doc.proveedor_virtual),
+            "hospital": self._normalizar_texto(doc.hospital_virtual),
+            "mes": self._normalizar_texto(doc.mes_virtual),
+            "anio": self._normalizar_texto(doc.anio_virtual),
+            "tipo": self._normalizar_texto(doc.tipo),
+        }
+
+    @_sincronizado
+    def _ensure_columnar(self) -> ColumnarFeatures:
+        """Construye (una vez por indexación) las columnas NumPy usadas por el ranking vectorizado."""
+        if self._columnar is not None and len(self._columnar) == len(self.index):
+            return self._columnar
+        ids = [doc.hash or doc.ruta for doc in self.index]
+        self._columnar = ColumnarFeatures.construir(
+            valores_campos=[self._boost_field_values(doc) for doc in self.index],
+            tokens=[self._store.tokens(doc_id) for doc_id in ids],
+            estructura=[self._store.estructura(doc_id) for doc_id in ids],
+            fechas=[self._store.fecha_ts(doc_id) for doc_id in ids],
+            frecuencias=self._field_freq,
+            tokenizar=self._tokenizar,
+        )
+        return self._columnar
+
+    def _facet_rows(self, docs: list[DocumentoIndexado]) -> tuple[list[dict[str, str]], list[set[str]]]:
+        valores = [{campo: self._normalizar_texto(self._doc_field(doc, campo)) for campo in CAMPOS_FACETA} for doc in docs]
+        etiquetas = [{tag for tag in (self._normalizar_texto(x) for x in doc.etiquetas) if tag} for doc in docs]
+        return valores, etiquetas
+
+    def _filas_autocompletado(self) -> list[tuple[str, str, str, int]]:
+        textos: dict[tuple[str, str], str] = {}
+        conteos: Counter[tuple[str, str]] = Counter()
+        for doc in self.index:
+            valores = [("nombre", doc.nombre), *(("etiqueta", tag) for tag in set(doc.etiquetas))]
+            for campo, valor in valores:
+                clave = self._normalizar_texto(valor)
+                if clave:
+                    conteos[(campo, clave)] += 1
+                    textos.setdefault((campo, clave), str(valor).strip())
+            for campo, valor in (("proveedor", doc.proveedor_virtual), ("hospital", doc.hospital_virtual)):
+                textos.setdefault((campo, self._normalizar_texto(valor)), str(valor).strip())
+        # Proveedores y hospitales pesan por su frecuencia en el corpus (la misma que usa el boosting).
+        for campo, sin_valor in (("proveedor", "sin_proveedor"), ("hospital", "sin_hospital")):
+            for clave, frecuencia in self._field_freq[campo].items():
+                if clave and clave != sin_valor:
+                    conteos[(campo, clave)] = frecuencia
+        return [(clave, textos.get((campo, clave), clave), campo, frecuencia) for (campo, clave), frecuencia in conteos.items()]
+
+    @_sincronizado
+    def _ensure_autocompletado(self) -> IndiceAutocompletado:
+        """Construye (una vez por indexación) el índice de prefijos usado por ``sugerir``."""
+        if self._autocompletado is None:
+            self._autocompletado = IndiceAutocompletado.construir(self._filas_autocompletado(), palabras=("proveedor", "hospital", "etiqueta"))
+        return self._autocompletado
+
+    @_sincronizado
+    def _ensure_facets(self) -> FacetIndex:
+        """Construye (una vez por indexación) los bitmaps de facetas usados por los filtros."""
+        if self._facets is not None and len(self._facets) == len(self.index):
+            return self._facets
+        self._facets = FacetIndex.construir(*self._facet_rows(self.index))
+        return self._facets
 
-    def _extraer_etiquetas(self, raw: dict[str, object]) -> list[str]:
+    @staticmethod
+    def _extraer_contenido(raw: dict[str, object]) -> str:
+        ruta = str(raw.get("ruta_completa", "")).strip()
+        path = Path(ruta) if ruta else None
+        contenido = str(raw.get("contenido_extraido", "") or "").strip()
+        if not contenido and path and path.exists():
+            try:
+                contenido = extraer_texto_archivo(path)
+            except Exception:
+                logger.warning("Extracción fallida para %s", ruta, exc_info=True)
+        return contenido
+
+    @staticmethod
+    def _requiere_preparacion(raw: dict[str, object]) -> bool:
+        """True si el documento necesita extracción de texto o etiquetas automáticas (trabajo paralelizable)."""
+        etiquetas = raw.get("etiquetas", [])
+        if not (isinstance(etiquetas, list) and etiquetas):
+            return True
+        if str(raw.get("contenido_extraido", "") or "").strip():
+            return False
+        ruta = str(raw.get("ruta_completa", "")).strip()
+        return bool(ruta) and Path(ruta).exists()
+
+    @staticmethod
+    def _extraer_etiquetas(raw: dict[str, object]) -> list[str]:
         etiquetas_raw = raw.get("etiquetas", [])
         etiquetas = [str(x).lower() for x in etiquetas_raw] if isinstance(etiquetas_raw, list) else []
         if etiquetas:
@@ -272,28 +751,25 @@ class SearchEngine:
             logger.debug("No se pudieron asignar etiquetas automáticas para %s", raw.get("ruta_completa", ""), exc_info=True)
         return []
 
-    def _build_document(self, raw: dict[str, object], i: int) -> DocumentoIndexado:
+    def _build_document(self, raw: dict[str, object], i: int, preparado: tuple[str, list[str]] | None = None) -> tuple[DocumentoIndexado, str, bool]:
+        """Documento indexado, su contenido extraído y si ese texto es el mismo objeto de ``raw``.
+
+        ``_build_document_cache`` guarda el contenido en el store: sin copia si viene de ``raw``.
+        """
         ruta = str(raw.get("ruta_completa", "")).strip()
-        path = Path(ruta) if ruta else None
-        contenido = str(raw.get("contenido_extraido", "") or "").strip()
-        if not contenido and path and path.exists():
-            try:
-                contenido = extraer_texto_archivo(path)
-            except Exception:
-                logger.warning("Extracción fallida para %s", ruta, exc_info=True)
+        contenido, etiquetas = preparado if preparado is not None else (self._extraer_contenido(raw), self._extraer_etiquetas(raw))
         extension = self._normalizar_texto(raw.get("extension", ""))
         if extension and not extension.startswith("."):
             extension = f".{extension}"
-        return DocumentoIndexado(
+        doc = DocumentoIndexado(
             nombre=str(raw.get("nombre_archivo", "")),
             ruta=ruta,
             extension=extension,
             carpeta=str(raw.get("carpeta", "")),
             tipo=self._norm_or_default(raw.get("categoria", "Sin clasificar"), "Sin clasificar"),
-            etiquetas=self._extraer_etiquetas(raw),
+            etiquetas=etiquetas,
             tamano=self._to_int(raw.get("tamaño", 0) or 0),
             fecha_modificacion=str(raw.get("fecha_modificacion", "")),
-            contenido=contenido,
             hash=str(raw.get("hash") or raw.get("sha256") or ruta or i),
             proveedor_virtual=self._norm_or_default(raw.get("proveedor_virtual", "SIN_PROVEEDOR"), "SIN_PROVEEDOR"),
             hospital_virtual=self._norm_or_default(raw.get("hospital_virtual", "SIN_HOSPITAL"), "SIN_HOSPITAL"),
@@ -302,11 +778,14 @@ class SearchEngine:
             carpeta_virtual=self._norm_or_default(raw.get("carpeta_virtual", ""), ""),
             score=0.0,
         )
+        return doc, contenido, contenido is raw.get("contenido_extraido")
 
     def _log_audit(self, evento: dict[str, object]) -> None:
-        self.audit_log.append(evento)
-        if len(self.audit_log) > 2000:
-            self.audit_log = self.audit_log[-2000:]
+        with self._audit_lock:
+            self.audit_log.append(evento)
+        self._audit_sesion.append(evento)
+        if self._auditoria_jsonl is not None:
+            self._auditoria_jsonl.escribir(evento)
 
     def _ctx_to_dict(self, ctx: QueryContext) -> dict[str, object]:
         return {
@@ -315,6 +794,7 @@ class SearchEngine:
             "query_tokens": list(ctx.query_tokens),
             "filtros": dict(ctx.filtros),
             "modo": ctx.modo,
+            "motor": ctx.motor,
             "usar_fuzzy": ctx.usar_fuzzy,
             "usar_nombre": ctx.usar_nombre,
             "usar_contenido": ctx.usar_contenido,
@@ -344,20 +824,21 @@ class SearchEngine:
             "score_boosting_avg": round(float(np.mean(boosts)), 6),
         }
 
-    def _build_auditoria_payload(self) -> dict[str, object]:
-        """Construye payload completo de auditoría para exportación offline."""
+    def auditoria_sesion(self) -> dict[str, object]:
+        """Payload completo de auditoría de la última búsqueda del hilo actual (el que exporta ``export_auditoria_json``)."""
         generated_at = datetime.now(timezone.utc).isoformat()
         resultados = list(self._last_audited_results)
+        audit_log = list(self._audit_sesion)
         payload: dict[str, object] = {
             "metadata": {
                 "engine_version": SEARCH_ENGINE_VERSION,
                 "generated_at": generated_at,
                 "indexed_documents": len(self.index),
-                "audit_events": len(self.audit_log),
+                "audit_events": len(audit_log),
                 "result_rows": len(resultados),
             },
             "query_context": dict(self._last_query_context),
-            "audit_log": list(self.audit_log),
+            "audit_log": audit_log,
             "resultados_scores": resultados,
             "resumen_scores": self._score_summary(resultados),
         }
@@ -367,82 +848,33 @@ class SearchEngine:
 
     def export_auditoria_json(self, path: str) -> Path:
         """Exporta auditoría avanzada del buscador en formato JSON."""
-        target = Path(path)
-        target.parent.mkdir(parents=True, exist_ok=True)
-        payload = self._build_auditoria_payload()
-        try:
-            target.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-        except Exception as error:
-            logger.error("Error exportando auditoría JSON a %s", target, exc_info=True)
-            raise RuntimeError(f"No se pudo exportar auditoría JSON: {error}") from error
-        return target
+        return escribir_auditoria_json(path, self.auditoria_sesion())
 
     def export_auditoria_csv(self, path: str) -> Path:
         """Exporta auditoría avanzada del buscador en formato CSV."""
-        target = Path(path)
-        target.parent.mkdir(parents=True, exist_ok=True)
-        columnas = [
-            "ruta",
-            "score_exacto",
-            "score_fuzzy",
-            "score_semantico",
-            "score_tokens",
-            "score_temporal",
-            "score_estructural",
-            "score_boosting",
-            "score_final",
-        ]
-        try:
-            with target.open("w", newline="", encoding="utf-8") as handler:
-                writer = csv.DictWriter(handler, fieldnames=columnas)
-                writer.writeheader()
-                for row in self._last_audited_results:
-                    writer.writerow(
-                        {
-                            "ruta": str(row.get("ruta", "")),
-                            "score_exacto": self._to_float(row.get("score_exacto", 0.0)),
-                            "score_fuzzy": self._to_float(row.get("score_fuzzy", 0.0)),
-                            "score_semantico": self._to_float(row.get("score_semantico", 0.0)),
-                            "score_tokens": self._to_float(row.get("score_tokens", 0.0)),
-                            "score_temporal": self._to_float(row.get("score_temporal", 0.0)),
-                            "score_estructural": self._to_float(row.get("score_estructural", 0.0)),
-                            "score_boosting": self._to_float(row.get("score_boosting", 0.0)),
-                            "score_final": self._to_float(row.get("score_final", row.get("relevancia", 0.0))),
-                        }
-                    )
-        except Exception as error:
-            logger.error("Error exportando auditoría CSV a %s", target, exc_info=True)
-            raise RuntimeError(f"No se pudo exportar auditoría CSV: {error}") from error
-        return target
+        return escribir_auditoria_csv(path, self._last_audited_results)
 
     def export_performance_json(self, path: str) -> Path:
         """Exporta métricas de performance de la última búsqueda perfilada."""
-        target = Path(path)
-        target.parent.mkdir(parents=True, exist_ok=True)
-        payload = dict(self._last_performance_metrics)
-        try:
-            target.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-        except Exception as error:
-            logger.error("Error exportando performance JSON a %s", target, exc_info=True)
-            raise RuntimeError(f"No se pudo exportar performance JSON: {error}") from error
-        return target
+        return escribir_performance_json(path, self._last_performance_metrics)
 
     def export_performance_csv(self, path: str) -> Path:
         """Exporta métricas de performance de la última búsqueda perfilada en formato tabular."""
-        target = Path(path)
-        target.parent.mkdir(parents=True, exist_ok=True)
-        perf = dict(self._last_performance_metrics)
-        components = perf.get("components", {}) if isinstance(perf.get("components", {}), dict) else {}
-        try:
-            with target.open("w", newline="", encoding="utf-8") as handler:
-                writer = csv.DictWriter(handler, fieldnames=["component", "time_ms"])
-                writer.writeheader()
-                for key, value in components.items():
-                    writer.writerow({"component": key, "time_ms": self._to_float(value)})
-        except Exception as error:
-            logger.error("Error exportando performance CSV a %s", target, exc_info=True)
-            raise RuntimeError(f"No se pudo exportar performance CSV: {error}") from error
-        return target
+        return escribir_performance_csv(path, self._last_performance_metrics)
+
+    def get_latency_histograms(self) -> dict[str, object]:
+        """p50/p95/p99 por etapa y clase de consulta sobre todas las búsquedas de las ventanas vigentes."""
+        if self._metricas is None:
+            return {}
+        return self._metricas.payload(SEARCH_ENGINE_VERSION)
+
+    def export_latencias_json(self, path: str) -> Path:
+        """Exporta los histogramas agregados de latencia por etapa en JSON."""
+        return escribir_latencias_json(path, self.get_latency_histograms())
+
+    def export_latencias_prometheus(self, path: str) -> Path:
+        """Exporta los histogramas agregados de latencia en formato de texto Prometheus."""
+        return escribir_latencias_prometheus(path, self.get_latency_histograms())
 
     def _idf_factor_query(self, query_tokens: list[str]) -> float:
         if not query_tokens or not self._idf_map:
@@ -477,11 +909,12 @@ class SearchEngine:
         tokens = self._weight_value(values, "score_tokens", base.tokens)
         temporal = self._weight_value(values, "score_temporal", base.temporal)
         estructural = self._weight_value(values, "score_estructural", base.estructural)
+        bm25f = self._weight_value(values, "score_bm25f", base.bm25f)
 
-        if all(v == 0 for v in [exacto, fuzzy, tfidf, contenido, tokens, temporal, estructural]):
+        if all(v == 0 for v in [exacto, fuzzy, tfidf, contenido, tokens, temporal, estructural, bm25f]):
             return base
 
-        total = exacto + fuzzy + tfidf + contenido + tokens + temporal + estructural
+        total = exacto + fuzzy + tfidf + contenido + tokens + temporal + estructural + bm25f
         if total <= 0:
             return base
         return SearchWeights(
@@ -492,6 +925,7 @@ class SearchEngine:
             tokens=tokens / total,
             temporal=temporal / total,
             estructural=estructural / total,
+            bm25f=bm25f / total,
         )
 
     def _build_query_context(
@@ -505,17 +939,25 @@ class SearchEngine:
         weights: dict[str, object] | None = None,
         auditoria: bool = False,
         profiling: bool = False,
+        motor: str | None = None,
     ) -> QueryContext:
         mode = self._normalize_mode(modo or filtros.get("modo", FLEX_MODE))
+        motor = self._normalize_motor(motor or filtros.get("motor", MOTOR_HIBRIDO))
         query_norm = self._normalizar_texto(query)
         query_tokens = self._tokenizar(query_norm)
         base_weights = SearchWeights()
-        if len(self.index) <= 60:
+        if motor == MOTOR_BM25F:
+            # BM25F reemplaza a TF-IDF, tokens y contenido: todos leen los mismos términos por campo.
+            base_weights = SearchWeights(exacto=0.25, fuzzy=0.15, tfidf=0.0, contenido=0.0, tokens=0.0, temporal=0.05, estructural=0.05, bm25f=0.50)
+        elif len(self.index) <= 60:
             base_weights = SearchWeights(exacto=0.24, fuzzy=0.16, tfidf=0.30, contenido=0.12, tokens=0.10, temporal=0.05, estructural=0.03)
         elif len(self.index) > 3000:
             base_weights = SearchWeights(exacto=0.27, fuzzy=0.14, tfidf=0.23, contenido=0.12, tokens=0.12, temporal=0.07, estructural=0.05)
 
         custom_values = weights or {}
+        # Cada motor ignora los pesos de componentes que no calcula.
+        excluidos = {"score_semantico", "score_tokens", "score_contenido"} if motor == MOTOR_BM25F else {"score_bm25f"}
+        custom_values = {k: v for k, v in custom_values.items() if k not in excluidos}
         custom_weights = self._build_custom_weights(custom_values, base_weights)
         boost_weights = {
             "proveedor": self._weight_value(custom_values, "boost_proveedor", 1.0),
@@ -541,6 +983,7 @@ class SearchEngine:
             include_debug=auditoria,
             profiling=profiling,
             audit_id=f"search-{datetime.now(timezone.utc).isoformat()}",
+            motor=motor,
         )
         ctx.idf_query_factor = self._idf_factor_query(ctx.query_tokens)
         return ctx
@@ -568,6 +1011,7 @@ class SearchEngine:
         return str(mapping.get(key, ""))
 
     def _matches_filters(self, doc: DocumentoIndexado, filtros: dict[str, object]) -> bool:
+        """Evaluación por documento; referencia de los bitmaps de ``_filter_positions``."""
         simple_filters = [
             "tipo",
             "extension",
@@ -600,16 +1044,67 @@ class SearchEngine:
                     return False
         return True
 
-    def _filter_candidates(self, filtros: dict[str, object]) -> list[DocumentoIndexado]:
+    def _facet_conditions(self, filtros: dict[str, object]) -> tuple[dict[str, str], list[str]] | None:
+        """Traduce filtros a condiciones de faceta; ``None`` si dos alias exigen valores distintos."""
+        condiciones: dict[str, str] = {}
+        for key, campo in FILTRO_FACETA.items():
+            if key not in filtros or not self._filtro_activo(filtros.get(key)):
+                continue
+            valor = self._normalizar_texto(filtros.get(key))
+            if condiciones.setdefault(campo, valor) != valor:
+                return None
+        etiquetas_filtro = filtros.get("etiquetas", [])
+        etiquetas: list[str] = []
+        if isinstance(etiquetas_filtro, list):
+            etiquetas = [tag for tag in (self._normalizar_texto(x) for x in etiquetas_filtro) if tag]
+        return condiciones, etiquetas
+
+    def _filter_positions(self, filtros: dict[str, object]) -> list[int]:
         if not filtros:
-            return list(self.index)
-        return [doc for doc in self.index if self._matches_filters(doc, filtros)]
+            return list(range(len(self.index)))
+        condiciones = self._facet_conditions(filtros)
+        if condiciones is None:
+            return []
+        campos, etiquetas = condiciones
+        if not campos and not etiquetas:
+            return list(range(len(self.index)))
+        return np.flatnonzero(self._ensure_facets().filtrar(campos, etiquetas)).tolist()
+
+    def _filter_candidates(self, filtros: dict[str, object]) -> list[DocumentoIndexado]:
+        return [self.index[pos] for pos in self._filter_positions(filtros)]
+
+    def _fuzzy_name_candidates(self, query_norm: str, limit: int = FUZZY_CANDIDATE_LIMIT) -> set[int]:
+        """Candidatos difusos: prefiltro por trigramas y un solo ``cdist`` sobre los sobrevivientes."""
+        if process is None or fuzz is None or not query_norm or not len(self._names):
+            return set()
+        sobrevivientes = self._names.prefiltrar(query_norm)
+        if not sobrevivientes:
+            return set()
+        scores = self._fuzzy_batch(query_norm, [self._names.nombres[pos] for pos in sobrevivientes], score_cutoff=FUZZY_CANDIDATE_CUTOFF)
+        mejores = np.flatnonzero(scores > 0)
+        mejores = mejores[np.argsort(-scores[mejores], kind="stable")][:limit]
+        return {self._names.keys[sobrevivientes[i]] for i in mejores.tolist()}
+
+    def _postings_candidates(self, ctx: QueryContext, positions: list[int]) -> list[int]:
+        """Restringe candidatos a documentos que comparten términos con la consulta o coinciden por nombre."""
+        if not self.usar_indice_invertido or len(self._doc_keys) != len(self.index):
+            return positions
+        keys = self._inverted.documentos_con(ctx.query_tokens)
+        if ctx.usar_nombre:
+            keys.update(self._names.buscar_subcadena(ctx.query_norm))
+            if ctx.usar_fuzzy and ctx.modo != STRICT_MODE:
+                keys.update(self._fuzzy_name_candidates(ctx.query_norm))
+        matched = sorted(self._key_pos[key] for key in keys if key in self._key_pos)
+        if len(positions) == len(self.index):
+            return matched
+        allowed = set(positions)
+        return [pos for pos in matched if pos in allowed]
 
     def _score_exact(self, doc: DocumentoIndexado, query_norm: str) -> float:
         if not query_norm:
             return 0.0
         doc_id = doc.hash or doc.ruta
-        nombre = self._doc_name_norm.get(doc_id, self._normalizar_texto(doc.nombre))
+        nombre = self._store.nombre(doc_id, self._normalizar_texto(doc.nombre))
         if nombre == query_norm:
             return 1.0
         if query_norm in nombre:
@@ -619,31 +1114,36 @@ class SearchEngine:
     def _score_tokens(self, doc: DocumentoIndexado, query_tokens: list[str]) -> float:
         if not query_tokens:
             return 0.0
-        doc_id = doc.hash or doc.ruta
-        tokens = self._doc_tokens.get(doc_id, set())
-        if not tokens:
+        tokens = self._store.token_ids(doc.hash or doc.ruta)
+        if not tokens.size:
             return 0.0
-        shared = sum(1 for token in query_tokens if token in tokens)
+        shared = self._store.coincidencias(tokens, [self._store.vocab.get(token, -1) for token in query_tokens])
         return shared / max(1, len(set(query_tokens)))
 
     def _score_content(self, doc: DocumentoIndexado, query_norm: str, query_tokens: list[str]) -> float:
         if not query_norm:
             return 0.0
         doc_id = doc.hash or doc.ruta
-        contenido = self._doc_content_norm.get(doc_id, self._normalizar_texto(doc.contenido))
-        if not contenido:
+        if not self._store.largo_contenido(doc_id):
             return 0.0
-        ocurrencias = sum(contenido.count(token) for token in query_tokens) if query_tokens else 0
-        base = 0.35 if query_norm in contenido else 0.0
+        ocurrencias, frase = self._store.coincidencias_contenido(doc_id, self._consulta_contenido(query_norm, query_tokens))
+        base = 0.35 if frase else 0.0
         return min(1.0, base + min(0.65, ocurrencias * 0.06))
 
+    def _consulta_contenido(self, query_norm: str, query_tokens: list[str]) -> ConsultaContenido:
+        """Compila (una vez por consulta y versión del índice) los conteos de contenido desde postings."""
+        llave = (query_norm, tuple(query_tokens), self._store.version, self._inverted.version)
+        memo = self._content_query
+        if memo is None or memo[0] != llave:
+            memo = (llave, self._store.compilar_contenido(query_norm, query_tokens, self._inverted))
+            self._content_query = memo
+        return memo[1]
+
     def _score_temporal(self, doc: DocumentoIndexado, query_tokens: list[str]) -> float:
-        doc_id = doc.hash or doc.ruta
-        fecha = self._doc_date.get(doc_id)
-        if fecha is None:
+        fecha_ts = self._store.fecha_ts(doc.hash or doc.ruta)
+        if fecha_ts is None:
             return 0.0
-        now = datetime.now(timezone.utc)
-        days = max(0.0, (now - fecha).total_seconds() / 86400.0)
+        days = max(0.0, (datetime.now(timezone.utc).timestamp() - fecha_ts) / 86400.0)
         recency = math.exp(-days / 180.0)
 
         match_temporal = 0.0
@@ -660,17 +1160,16 @@ class SearchEngine:
     def _score_structural(self, doc: DocumentoIndexado, query_tokens: list[str], filtros: dict[str, object]) -> float:
         if not query_tokens and not filtros:
             return 0.0
-        doc_id = doc.hash or doc.ruta
-        doc_struct = self._doc_struct_tokens.get(doc_id, set())
+        doc_struct = self._store.estructura_ids(doc.hash or doc.ruta)
         query_struct_tokens = set(query_tokens)
         for key in ("proveedor", "hospital", "mes", "anio", "año", "carpeta_virtual", "carpeta", "tipo"):
             value = filtros.get(key)
             if self._filtro_activo(value):
                 query_struct_tokens.update(self._tokenizar(str(value)))
-        if not doc_struct or not query_struct_tokens:
+        if not doc_struct.size or not query_struct_tokens:
             return 0.0
-        inter = len(doc_struct.intersection(query_struct_tokens))
-        union = len(doc_struct.union(query_struct_tokens))
+        inter = self._store.coincidencias(doc_struct, self._store.ids_consulta(query_struct_tokens).tolist())
+        union = int(doc_struct.size) + len(query_struct_tokens) - inter
         if union == 0:
             return 0.0
         return inter / union
@@ -718,65 +1217,204 @@ class SearchEngine:
         if temporal_multiplier > 0:
             score += min(0.12 * temporal_multiplier, temporal_score * 0.10 * temporal_multiplier)
 
-        return max(0.8, min(1.65, score))
+        return max(BOOST_MIN, min(BOOST_MAX, score))
+
+    def _modelo_semantico(self) -> tuple[TfidfVectorizer | None, Any]:
+        """Vectorizador y matriz TF-IDF leídos juntos bajo el lock; se construyen si aún no existen."""
+        with self._lock:
+            if self._tfidf is None or self._matriz_tfidf is None:
+                self.construir_modelo_semantico()
+            return self._tfidf, self._matriz_tfidf
+
+    def _semantic_scores(self, query: str, positions: np.ndarray | None = None) -> np.ndarray:
+        """Similitud TF-IDF alineada con ``positions`` (todo el índice si es None).
+
+        Las filas de la matriz y el vector de consulta ya están normalizados en L2, así que el coseno es
+        un solo producto disperso sobre las filas candidatas.
+        """
+        total = len(self.index) if positions is None else int(positions.size)
+        if not query.strip() or not self.index or total == 0:
+            return np.zeros(total, dtype=np.float64)
+        tfidf, matriz = self._modelo_semantico()
+        if tfidf is None or matriz is None:
+            return np.zeros(total, dtype=np.float64)
+
+        qv = tfidf.transform([query])
+        filas = matriz if positions is None else matriz[positions]
+        sims = np.asarray((filas @ qv.T).toarray(), dtype=np.float64).ravel()
+        return np.maximum(0.0, sims)
+
+    def _semantic_scores_ctx(self, ctx: QueryContext, positions: np.ndarray) -> np.ndarray:
+        """Similitud de la consulta para ``positions``; reutiliza la columna precalculada por ``buscar_lote``."""
+        if ctx.semantica_lote is None:
+            return self._semantic_scores(ctx.query_raw, positions)
+        filas, columna = ctx.semantica_lote
+        return columna[np.searchsorted(filas, positions)]
+
+    def _bm25f_scores(self, ctx: QueryContext, positions: np.ndarray) -> np.ndarray:
+        """BM25F de la consulta para ``positions`` leyendo los postings por campo; no requiere ajuste.
+
+        Sólo la reconstrucción de la vista tras un cambio del índice toma el lock del motor; el
+        scoring corre sin él, en paralelo con otras consultas.
+        """
+        if not self._bm25f.vigente:
+            with self._lock:
+                self._bm25f.sincronizar()
+        keys = np.fromiter((self._doc_keys[pos] for pos in positions.tolist()), dtype=np.int64, count=int(positions.size))
+        return self._bm25f.puntuar(ctx.query_tokens, keys)
+
+    def _semantic_lote(self, queries: list[str], positions: np.ndarray) -> np.ndarray:
+        """Matriz densa ``len(positions) × len(queries)`` de similitudes con un solo ``transform`` y producto disperso."""
+        if not queries or positions.size == 0:
+            return np.zeros((int(positions.size), len(queries)), dtype=np.float64)
+        tfidf, matriz = self._modelo_semantico()
+        if tfidf is None or matriz is None:
+            return np.zeros((int(positions.size), len(queries)), dtype=np.float64)
+        qm = tfidf.transform(queries)
+        sims = np.asarray((matriz[positions] @ qm.T).toarray(), dtype=np.float64)
+        return np.maximum(0.0, sims)
 
-    def _semantic_scores(self, query: str) -> dict[str, float]:
-        if not query.strip() or not self.index:
-            return {}
-        if self._tfidf is None or self._matriz_tfidf is None:
-            self.construir_modelo_semantico()
-        if self._tfidf is None or self._matriz_tfidf is None:
-            return {}
+    @staticmethod
+    def _top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+        """Índices de los ``top_k`` mayores scores vía ``argpartition``; empates por índice ascendente."""
+        if top_k <= 0 or scores.size == 0:
+            return np.zeros(0, dtype=np.int64)
+        if top_k < scores.size:
+            idx = np.argpartition(-scores, top_k - 1)[:top_k]
+            kth = scores[idx].min()
+            idx = np.flatnonzero(scores >= kth)
+        else:
+            idx = np.arange(scores.size)
+        orden = idx[np.argsort(-scores[idx], kind="stable")]
+        return orden[:top_k]
 
-        qv = self._tfidf.transform([query])
-        sims = cosine_similarity(qv, self._matriz_tfidf).flatten()
-        score_map: dict[str, float] = {}
-        for i, score in enumerate(sims.tolist()):
-            if i < len(self.index):
-                score_map[self.index[i].hash] = max(0.0, float(score))
-        return score_map
+    def _cota_superior(self, ctx: QueryContext, parcial: float, pendientes: float) -> float:
+        """Cota superior del score final (recortado a 1.0) dado el aporte ya calculado y el máximo pendiente."""
+        return min(1.0, (parcial + pendientes) * BOOST_MAX * ctx.idf_query_factor)
 
-    def _rank_document(self, doc: DocumentoIndexado, ctx: QueryContext, semantic_scores: dict[str, float]) -> tuple[float, dict[str, float], dict[str, float]]:
-        doc_id = doc.hash or doc.ruta
-        component_ms = {
-            "fuzzy_ms": 0.0,
-            "semantic_ms": 0.0,
-            "tokens_ms": 0.0,
-            "temporal_ms": 0.0,
-            "structural_ms": 0.0,
-            "boosting_ms": 0.0,
-        }
+    def _plan_scoring(self, ctx: QueryContext) -> PlanScoring:
+        if ctx.plan is None:
+            ctx.plan = PlanScoring.desde_contexto(ctx)
+        return ctx.plan
 
-        exact_score = self._score_exact(doc, ctx.query_norm) if ctx.usar_nombre else 0.0
+    def _rank_document(
+        self,
+        doc: DocumentoIndexado,
+        ctx: QueryContext,
+        semantic_score: float = 0.0,
+        umbral: float | None = None,
+        fuzzy_score: float | None = None,
+        bm25f_score: float = 0.0,
+    ) -> tuple[float, dict[str, float], dict[str, float]] | None:
+        """Puntúa un documento con los componentes del ``PlanScoring`` y el boosting contextual.
+
+        ``semantic_score``, ``fuzzy_score`` y ``bm25f_score`` llegan calculados en lote; sin
+        ``fuzzy_score`` se compara el nombre del documento directamente.
+
+        Los componentes se calculan de menor a mayor costo y el documento se descarta (retorna ``None``)
+        en cuanto su cota superior no puede superar ``umbral`` (score mínimo del top-k actual) o, sin
+        umbral, no puede ser positiva: un score 0 nunca entra al ranking.
+        """
+        doc_id = doc.hash or doc.ruta
+        # Sin profiling nadie lee los tiempos: se evita armar un dict por documento.
+        component_ms = (
+            {
+                "fuzzy_ms": 0.0,
+                "semantic_ms": 0.0,
+                "tokens_ms": 0.0,
+                "temporal_ms": 0.0,
+                "structural_ms": 0.0,
+                "boosting_ms": 0.0,
+            }
+            if ctx.profiling
+            else _SIN_TIEMPOS
+        )
+        plan = self._plan_scoring(ctx)
+        piso = 0.0 if umbral is None else umbral
 
-        t = perf_counter()
-        fuzzy_score = self._safe_ratio(ctx.query_norm, self._doc_name_norm.get(doc_id, "")) if (ctx.usar_fuzzy and ctx.usar_nombre) else 0.0
-        if ctx.profiling:
-            component_ms["fuzzy_ms"] += (perf_counter() - t) * 1000.0
+        exact_score = self._score_exact(doc, ctx.query_norm) if plan.exacto else 0.0
 
         t = perf_counter()
-        token_score = self._score_tokens(doc, ctx.query_tokens)
+        token_score = self._score_tokens(doc, ctx.query_tokens) if plan.tokens else 0.0
         if ctx.profiling:
             component_ms["tokens_ms"] += (perf_counter() - t) * 1000.0
 
-        content_score = self._score_content(doc, ctx.query_norm, ctx.query_tokens) if ctx.usar_contenido else 0.0
+        if not plan.flexible:
+            # Estricta: exactitud + tokens; fuzzy, semántica, contenido y boosting no participan.
+            strict_raw = (exact_score * 0.70) + (token_score * 0.30)
+            if min(1.0, strict_raw) <= piso:
+                return None
+            return strict_raw, {
+                "exact": exact_score,
+                "tokens": token_score,
+                "fuzzy": 0.0,
+                "semantic": 0.0,
+                "content": 0.0,
+                "temporal": 0.0,
+                "structural": 0.0,
+                "bm25f": 0.0,
+                "boost": 1.0,
+                "final": strict_raw,
+            }, component_ms
+
+        w = ctx.weights
+        semantic_score = semantic_score if plan.semantico else 0.0
+        bm25f_score = bm25f_score if plan.bm25f else 0.0
+        fuzzy_pendiente = plan.fuzzy and fuzzy_score is None
+        fuzzy_score = float(fuzzy_score) if plan.fuzzy and fuzzy_score is not None else 0.0
+
+        parcial = exact_score * w.exacto + token_score * w.tokens + semantic_score * w.tfidf + fuzzy_score * w.fuzzy + bm25f_score * w.bm25f
+        pendientes = (
+            (w.fuzzy if fuzzy_pendiente else 0.0)
+            + (w.contenido if plan.contenido else 0.0)
+            + (w.temporal if plan.temporal else 0.0)
+            + (w.estructural if plan.estructural else 0.0)
+        )
+        if self._cota_superior(ctx, parcial, pendientes) <= piso:
+            return None
 
         t = perf_counter()
-        temporal_score = self._score_temporal(doc, ctx.query_tokens)
+        temporal_score = self._score_temporal(doc, ctx.query_tokens) if plan.temporal else 0.0
         if ctx.profiling:
             component_ms["temporal_ms"] += (perf_counter() - t) * 1000.0
 
         t = perf_counter()
-        structural_score = self._score_structural(doc, ctx.query_tokens, ctx.filtros)
+        structural_score = self._score_structural(doc, ctx.query_tokens, ctx.filtros) if plan.estructural else 0.0
         if ctx.profiling:
             component_ms["structural_ms"] += (perf_counter() - t) * 1000.0
 
-        t = perf_counter()
-        semantic_score = semantic_scores.get(doc.hash, 0.0) if ctx.usar_semantico else 0.0
-        if ctx.profiling:
-            component_ms["semantic_ms"] += (perf_counter() - t) * 1000.0
+        parcial += temporal_score * w.temporal + structural_score * w.estructural
+        pendientes = (w.fuzzy if fuzzy_pendiente else 0.0) + (w.contenido if plan.contenido else 0.0)
+        if self._cota_superior(ctx, parcial, pendientes) <= piso:
+            return None
+
+        if fuzzy_pendiente:
+            t = perf_counter()
+            fuzzy_score = self._safe_ratio(ctx.query_norm, self._store.nombre(doc_id))
+            if ctx.profiling:
+                component_ms["fuzzy_ms"] += (perf_counter() - t) * 1000.0
+            parcial += fuzzy_score * w.fuzzy
+            pendientes = w.contenido if plan.contenido else 0.0
+            if self._cota_superior(ctx, parcial, pendientes) <= piso:
+                return None
+
+        content_score = self._score_content(doc, ctx.query_norm, ctx.query_tokens) if plan.contenido else 0.0
+        raw = (
+            exact_score * w.exacto
+            + fuzzy_score * w.fuzzy
+            + semantic_score * w.tfidf
+            + content_score * w.contenido
+            + token_score * w.tokens
+            + temporal_score * w.temporal
+            + structural_score * w.estructural
+            + bm25f_score * w.bm25f
+        )
+        if self._cota_superior(ctx, raw, 0.0) <= piso:
+            return None
 
         t = perf_counter()
+        if plan.temporal_boost and not plan.temporal:
+            temporal_score = self._score_temporal(doc, ctx.query_tokens)
         boost_value = self._boost_contextual(
             doc,
             ctx.query_tokens,
@@ -787,30 +1425,6 @@ class SearchEngine:
         if ctx.profiling:
             component_ms["boosting_ms"] += (perf_counter() - t) * 1000.0
 
-        if ctx.modo == STRICT_MODE:
-            # Estricta: exactitud + filtros; sin fuzzy ni semántica.
-            strict_raw = (exact_score * 0.70) + (token_score * 0.30)
-            return strict_raw, {
-                "exact": exact_score,
-                "tokens": token_score,
-                "fuzzy": 0.0,
-                "semantic": 0.0,
-                "content": 0.0,
-                "temporal": 0.0,
-                "structural": 0.0,
-                "boost": 1.0,
-                "final": strict_raw,
-            }, component_ms
-
-        raw = (
-            exact_score * ctx.weights.exacto
-            + fuzzy_score * ctx.weights.fuzzy
-            + semantic_score * ctx.weights.tfidf
-            + content_score * ctx.weights.contenido
-            + token_score * ctx.weights.tokens
-            + temporal_score * ctx.weights.temporal
-            + structural_score * ctx.weights.estructural
-        )
         boosted = raw * boost_value * ctx.idf_query_factor
         return boosted, {
             "exact": exact_score,
@@ -820,32 +1434,332 @@ class SearchEngine:
             "content": content_score,
             "temporal": temporal_score,
             "structural": structural_score,
+            "bm25f": bm25f_score,
             "boost": boost_value,
             "final": boosted,
         }, component_ms
 
-    def indexar_documentos(self) -> None:
-        """Indexa documentos con cache interno para búsquedas de alto volumen."""
+    def _rank_top_k(
+        self,
+        candidates: list[DocumentoIndexado],
+        ctx: QueryContext,
+        semantic_scores: np.ndarray,
+        fuzzy_scores: np.ndarray,
+        perf_components: dict[str, float],
+        top_k: int,
+        bm25f_scores: np.ndarray | None = None,
+    ) -> tuple[list[tuple[DocumentoIndexado, float, dict[str, float]]], int]:
+        """Selecciona el top-k con un heap acotado y poda estilo MaxScore.
+
+        El heap guarda ``(score, -orden)`` para que, a igual score, gane el documento que
+        aparece antes, igual que el ordenamiento estable del recorrido completo.
+        Retorna el ranking ordenado y la cantidad de documentos podados.
+        """
+        heap: list[tuple[float, int, DocumentoIndexado, dict[str, float]]] = []
+        podados = 0
+        for orden, doc in enumerate(candidates):
+            umbral = heap[0][0] if len(heap) >= top_k else None
+            resultado = self._rank_document(
+                doc,
+                ctx,
+                float(semantic_scores[orden]),
+                umbral=umbral,
+                fuzzy_score=float(fuzzy_scores[orden]),
+                bm25f_score=0.0 if bm25f_scores is None else float(bm25f_scores[orden]),
+            )
+            if resultado is None:
+                podados += 1
+                continue
+            score_raw, components, comp_ms = resultado
+            if ctx.profiling:
+                for key in ("fuzzy_ms", "semantic_ms", "tokens_ms", "temporal_ms", "structural_ms", "boosting_ms"):
+                    perf_components[key] += float(comp_ms.get(key, 0.0))
+            if score_raw <= 0:
+                continue
+            entrada = (min(1.0, score_raw), -orden, doc, components)
+            if len(heap) < top_k:
+                heapq.heappush(heap, entrada)
+            elif entrada[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entrada)
+        ordenados = sorted(heap, key=lambda x: (x[0], x[1]), reverse=True)
+        return [(doc, score, components) for score, _, doc, components in ordenados], podados
+
+    def _exact_array(self, positions: np.ndarray, query_norm: str) -> np.ndarray:
+        salida = np.zeros(positions.size, dtype=np.float64)
+        if not query_norm:
+            return salida
+        hits = {self._key_pos[key] for key in self._names.buscar_subcadena(query_norm) if key in self._key_pos}
+        if not hits:
+            return salida
+        for i, pos in enumerate(positions.tolist()):
+            if pos in hits:
+                salida[i] = 1.0 if self._names.nombres[pos] == query_norm else 0.85
+        return salida
+
+    def _fuzzy_batch(self, query_norm: str, nombres: list[str], score_cutoff: float = 0.0) -> np.ndarray:
+        """``fuzz.ratio`` / 100 de la consulta contra todos los nombres en un solo ``cdist`` multihilo.
+
+        Los scores por debajo de ``score_cutoff`` (escala 0-100) quedan en 0.
+        """
+        if not query_norm or not nombres:
+            return np.zeros(len(nombres), dtype=np.float64)
+        if process is None:
+            salida = np.array([self._safe_ratio(query_norm, nombre) for nombre in nombres], dtype=np.float64)
+            return np.where(salida * 100.0 >= score_cutoff, salida, 0.0)
+        try:
+            matriz = process.cdist([query_norm], nombres, scorer=fuzz.ratio, dtype=np.float64, score_cutoff=score_cutoff, workers=FUZZY_WORKERS)
+        except Exception:
+            logger.debug("Fallo en fuzzy por lote; se usa comparación por documento", exc_info=True)
+            salida = np.array([self._safe_ratio(query_norm, nombre) for nombre in nombres], dtype=np.float64)
+            return np.where(salida * 100.0 >= score_cutoff, salida, 0.0)
+        salida = np.asarray(matriz[0], dtype=np.float64) / 100.0
+        vacios = np.array([not nombre for nombre in nombres], dtype=bool)
+        salida[vacios] = 0.0
+        return salida
+
+    def _fuzzy_array(self, positions: np.ndarray, query_norm: str) -> np.ndarray:
+        return self._fuzzy_batch(query_norm, [self._names.nombres[pos] for pos in positions.tolist()])
+
+    def _temporal_array(self, feats: ColumnarFeatures, positions: np.ndarray, query_tokens: list[str], now_ts: float) -> np.ndarray:
+        recency = feats.recencia(positions, now_ts)
+        anio_match = feats.valores_en("anio", query_tokens)[feats.codigos["anio"][positions]]
+        mes_match = feats.coincide_valor_tokens("mes", query_tokens)[feats.codigos["mes"][positions]]
+        match_temporal = np.where(anio_match, 0.25, 0.0) + np.where(mes_match, 0.15, 0.0)
+        con_fecha = ~np.isnan(feats.fecha_ts[positions])
+        return np.where(con_fecha, np.minimum(1.0, recency + match_temporal), 0.0)
+
+    def _structural_array(self, feats: ColumnarFeatures, positions: np.ndarray, query_tokens: list[str], filtros: dict[str, object]) -> np.ndarray:
+        if not query_tokens and not filtros:
+            return np.zeros(positions.size, dtype=np.float64)
+        query_struct_tokens = set(query_tokens)
+        for key in ("proveedor", "hospital", "mes", "anio", "año", "carpeta_virtual", "carpeta", "tipo"):
+            value = filtros.get(key)
+            if self._filtro_activo(value):
+                query_struct_tokens.update(self._tokenizar(str(value)))
+        return feats.jaccard_estructural(positions, query_struct_tokens)
+
+    def _boost_array(
+        self,
+        feats: ColumnarFeatures,
+        positions: np.ndarray,
+        query_tokens: list[str],
+        filtros: dict[str, object],
+        boost_weights: dict[str, float],
+        temporal_scores: np.ndarray,
+    ) -> np.ndarray:
+        """Equivalente vectorizado de ``_boost_contextual`` para todo el conjunto candidato."""
+        score = np.ones(positions.size, dtype=np.float64)
+        for key in CAMPOS_BOOST:
+            multiplier = self._clamp(boost_weights.get(key, 1.0), 0.0, 3.0)
+            if multiplier == 0:
+                continue
+            codes = feats.codigos[key][positions]
+            filtro_val = filtros.get(key, filtros.get(f"{key}_virtual", ""))
+            if self._filtro_activo(filtro_val):
+                filtro_code = feats.codigo(key, self._normalizar_texto(filtro_val))
+                if filtro_code >= 0:
+                    score += np.where(codes == filtro_code, 0.14 * multiplier, 0.0)
+            token_match = feats.coincide_valor_tokens(key, query_tokens)[codes]
+            score += np.where(token_match, 0.08 * multiplier, 0.0)
+            freq = np.append(feats.frecuencias[key], 0.0)[codes]
+            with np.errstate(divide="ignore"):
+                freq_boost = np.minimum(0.06 * multiplier, 1.0 / np.sqrt(freq + 1.0) * 0.08 * multiplier)
+            score += np.where(freq > 0, freq_boost, 0.0)
+
+        temporal_multiplier = self._clamp(boost_weights.get("temporal", 1.0), 0.0, 3.0)
+        if temporal_multiplier > 0:
+            score += np.minimum(0.12 * temporal_multiplier, temporal_scores * 0.10 * temporal_multiplier)
+        return np.clip(score, BOOST_MIN, BOOST_MAX)
+
+    def _rank_vectorizado(
+        self,
+        positions: np.ndarray,
+        ctx: QueryContext,
+        perf_components: dict[str, float],
+        top_k: int | None = None,
+    ) -> list[tuple[DocumentoIndexado, float, dict[str, float]]]:
+        """Calcula los siete componentes y el boosting en bloque y retorna el ranking ordenado."""
+        if positions.size == 0:
+            return []
+        feats = self._ensure_columnar()
+        zeros = np.zeros(positions.size, dtype=np.float64)
+
+        def _medir(key: str, start: float) -> None:
+            if ctx.profiling:
+                perf_components[key] += (perf_counter() - start) * 1000.0
+
+        plan = self._plan_scoring(ctx)
+        exact = self._exact_array(positions, ctx.query_norm) if plan.exacto else zeros
+
+        t = perf_counter()
+        tokens = zeros
+        if plan.tokens:
+            tokens = feats.coincidencias_tokens(positions, ctx.query_tokens) / max(1, len(set(ctx.query_tokens)))
+        _medir("tokens_ms", t)
+
+        componentes: dict[str, np.ndarray]
+        if ctx.modo == STRICT_MODE:
+            final = (exact * 0.70) + (tokens * 0.30)
+            componentes = {
+                "exact": exact,
+                "tokens": tokens,
+                "fuzzy": zeros,
+                "semantic": zeros,
+                "content": zeros,
+                "temporal": zeros,
+                "structural": zeros,
+                "bm25f": zeros,
+                "boost": np.ones(positions.size, dtype=np.float64),
+            }
+        else:
+            t = perf_counter()
+            fuzzy_scores = self._fuzzy_array(positions, ctx.query_norm) if plan.fuzzy else zeros
+            _medir("fuzzy_ms", t)
+
+            content = zeros
+            if plan.contenido:
+                content = np.array([self._score_content(self.index[pos], ctx.query_norm, ctx.query_tokens) for pos in positions.tolist()], dtype=np.float64)
+
+            t = perf_counter()
+            temporal = zeros
+            if plan.temporal or plan.temporal_boost:
+                temporal = self._temporal_array(feats, positions, ctx.query_tokens, datetime.now(timezone.utc).timestamp())
+            _medir("temporal_ms", t)
+
+            t = perf_counter()
+            structural = self._structural_array(feats, positions, ctx.query_tokens, ctx.filtros) if plan.estructural else zeros
+            _medir("structural_ms", t)
+
+            semantic = zeros
+            if plan.semantico:
+                t = perf_counter()
+                semantic = self._semantic_scores_ctx(ctx, positions)
+                _medir("tfidf_ms", t)
+
+            bm25f = self._bm25f_scores(ctx, positions) if plan.bm25f else zeros
+
+            t = perf_counter()
+            boost = self._boost_array(feats, positions, ctx.query_tokens, ctx.filtros, ctx.boost_weights, temporal)
+            _medir("boosting_ms", t)
+
+            raw = (
+                exact * ctx.weights.exacto
+                + fuzzy_scores * ctx.weights.fuzzy
+                + semantic * ctx.weights.tfidf
+                + content * ctx.weights.contenido
+                + tokens * ctx.weights.tokens
+                + temporal * ctx.weights.temporal
+                + structural * ctx.weights.estructural
+                + bm25f * ctx.weights.bm25f
+            )
+            final = raw * boost * ctx.idf_query_factor
+            componentes = {
+                "exact": exact,
+                "tokens": tokens,
+                "fuzzy": fuzzy_scores,
+                "semantic": semantic,
+                "content": content,
+                "temporal": temporal,
+                "structural": structural,
+                "bm25f": bm25f,
+                "boost": boost,
+            }
+
+        keep = np.flatnonzero(final > 0)
+        clipped = np.minimum(1.0, final[keep])
+        if top_k and 0 < top_k < keep.size:
+            # Selección parcial: umbral del k-ésimo mayor y orden estable sólo sobre los que lo alcanzan.
+            kth = np.partition(clipped, keep.size - top_k)[keep.size - top_k]
+            sel = np.flatnonzero(clipped >= kth)
+            keep, clipped = keep[sel], clipped[sel]
+        order = keep[np.argsort(-clipped, kind="stable")]
+        if top_k and top_k > 0:
+            order = order[:top_k]
+        ranked: list[tuple[DocumentoIndexado, float, dict[str, float]]] = []
+        for i in order.tolist():
+            fila = {key: float(values[i]) for key, values in componentes.items()}
+            fila["final"] = float(final[i])
+            ranked.append((self.index[int(positions[i])], min(1.0, float(final[i])), fila))
+        return ranked
+
+    def _reset_index_state(self) -> None:
         self.index = []
-        self._doc_tokens.clear()
-        self._doc_name_norm.clear()
-        self._doc_content_norm.clear()
-        self._doc_struct_tokens.clear()
-        self._doc_date.clear()
+        self._store.clear()
+        self._doc_keys = []
+        self._key_pos = {}
+        self._inverted.clear()
+        self._invalidate_columnar_cache()
         self._invalidate_semantic_cache()
 
+    def _preparar_en_paralelo(
+        self,
+        documentos: list[dict[str, object]],
+        workers: int,
+        timeout_archivo: float,
+    ) -> tuple[list[tuple[str, list[str]] | None], int]:
+        """Extrae texto y etiquetas en un pool de procesos, en bloques de ``workers × INDEX_CHUNK_FACTOR``.
+
+        Retorna una entrada por documento en el orden original (``None`` = preparar en el proceso
+        principal) y la cantidad de archivos que superaron ``timeout_archivo``; esos se indexan sin
+        contenido extraído.
+        """
+        preparados: list[tuple[str, list[str]] | None] = [None] * len(documentos)
+        pendientes = [i for i, raw in enumerate(documentos) if self._requiere_preparacion(raw)]
+        if not pendientes:
+            return preparados, 0
+        expirados = 0
+        bloque = max(1, workers * INDEX_CHUNK_FACTOR)
+        try:
+            executor = ProcessPoolExecutor(max_workers=workers)
+        except (OSError, ValueError, NotImplementedError):
+            logger.warning("No se pudo iniciar el pool de procesos; se indexa en serie", exc_info=True)
+            return preparados, 0
+        try:
+            for inicio in range(0, len(pendientes), bloque):
+                lote = pendientes[inicio : inicio + bloque]
+                futuros = [(i, executor.submit(_preparar_documento, documentos[i])) for i in lote]
+                for i, futuro in futuros:
+                    try:
+                        preparados[i] = futuro.result(timeout=timeout_archivo)
+                    except FutureTimeoutError:
+                        futuro.cancel()
+                        expirados += 1
+                        raw = documentos[i]
+                        logger.warning("Extracción excedió %.1fs para %s; se indexa sin contenido", timeout_archivo, raw.get("ruta_completa", ""))
+                        preparados[i] = (str(raw.get("contenido_extraido", "") or "").strip(), self._extraer_etiquetas(raw))
+                    except Exception:
+                        logger.warning("Fallo en preparación paralela del documento #%s; se reintenta en serie", i, exc_info=True)
+        finally:
+            executor.shutdown(wait=expirados == 0, cancel_futures=True)
+        return preparados, expirados
+
+    @_sincronizado
+    def indexar_documentos(self, workers: int | None = None, timeout_archivo: float = INDEX_FILE_TIMEOUT_SECONDS) -> None:
+        """Indexa documentos con cache interno para búsquedas de alto volumen.
+
+        Con ``workers`` > 1 la extracción de texto y el etiquetado automático se reparten en un pool
+        de procesos; el índice resultante conserva el orden de ``self.documentos``.
+        """
+        self._reset_index_state()
+
         start = perf_counter()
         logger.info("Iniciando indexación documental...")
         fallidos = 0
+        expirados = 0
+        preparados: list[tuple[str, list[str]] | None] = [None] * len(self.documentos)
+        if workers and workers > 1 and len(self.documentos) > 1:
+            preparados, expirados = self._preparar_en_paralelo(self.documentos, workers, timeout_archivo)
         for i, raw in enumerate(self.documentos):
             try:
-                doc = self._build_document(raw, i)
+                doc, contenido, compartido = self._build_document(raw, i, preparados[i])
                 self.index.append(doc)
-                self._build_document_cache(doc)
+                self._build_document_cache(doc, contenido, compartido)
             except Exception:
                 fallidos += 1
                 logger.warning("Error indexando documento #%s", i, exc_info=True)
         self._refresh_field_frequencies()
+        self._rebuild_name_index()
+        self._ensure_autocompletado()
         elapsed = perf_counter() - start
         logger.info("Indexación completada: %s documentos (%s fallidos) en %.3fs", len(self.index), fallidos, elapsed)
         self._log_audit(
@@ -853,22 +1767,289 @@ class SearchEngine:
                 "evento": "indexacion",
                 "documentos": len(self.index),
                 "fallidos": fallidos,
+                "workers": int(workers or 1),
+                "timeouts": expirados,
+                "duracion_ms": round(elapsed * 1000, 2),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            }
+        )
+
+    @_sincronizado
+    def save_index(self, path: str | Path) -> Path:
+        """Persiste índice, caches de tokens, frecuencias y TF-IDF ajustado en un directorio."""
+        target = Path(path)
+        target.mkdir(parents=True, exist_ok=True)
+        tfidf_payload: dict[str, object] | None = None
+        if self._tfidf is not None and self._matriz_tfidf is not None:
+            tfidf_payload = {
+                "config": dict(self._tfidf_config),
+                "vocabulary": {term: int(idx) for term, idx in self._tfidf.vocabulary_.items()},
+                "idf": [float(x) for x in self._tfidf.idf_],
+            }
+        payload: dict[str, object] = {
+            "format_version": INDEX_FORMAT_VERSION,
+            "engine_version": SEARCH_ENGINE_VERSION,
+            "fingerprint": fingerprint_corpus(self.documentos),
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "documentos": [{**asdict(doc), "contenido": self._contenido(doc)} for doc in self.index],
+            "doc_tokens": [sorted(self._store.tokens(doc.hash or doc.ruta)) for doc in self.index],
+            "doc_struct_tokens": [sorted(self._store.estructura(doc.hash or doc.ruta)) for doc in self.index],
+            "field_freq": {key: dict(counter) for key, counter in self._field_freq.items()},
+            "tfidf": tfidf_payload,
+        }
+        manifest = target / INDEX_MANIFEST_FILE
+        matrix_path = target / INDEX_TFIDF_FILE
+        try:
+            manifest.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+            if tfidf_payload is not None:
+                sparse.save_npz(matrix_path, sparse.csr_matrix(self._matriz_tfidf))
+            elif matrix_path.exists():
+                matrix_path.unlink()
+            ann_path = target / INDEX_ANN_FILE
+            if tfidf_payload is not None and self._ann is not None:
+                self._ann.guardar(ann_path)
+            elif ann_path.exists():
+                ann_path.unlink()
+        except Exception as error:
+            logger.error("Error persistiendo índice de búsqueda en %s", target, exc_info=True)
+            raise RuntimeError(f"No se pudo persistir índice de búsqueda: {error}") from error
+        return target
+
+    @_sincronizado
+    def load_index(self, path: str | Path) -> bool:
+        """Carga un índice persistido si su huella coincide con el corpus actual; False si requiere reindexar."""
+        target = Path(path)
+        manifest = target / INDEX_MANIFEST_FILE
+        if not manifest.exists():
+            return False
+        start = perf_counter()
+        try:
+            payload = json.loads(manifest.read_text(encoding="utf-8"))
+        except Exception:
+            logger.warning("Índice persistido ilegible en %s", manifest, exc_info=True)
+            return False
+        if not isinstance(payload, dict) or payload.get("format_version") != INDEX_FORMAT_VERSION:
+            return False
+        if payload.get("fingerprint") != fingerprint_corpus(self.documentos):
+            logger.info("Huella de corpus distinta en %s; se requiere reindexar", target)
+            return False
+
+        try:
+            items = [dict(item) for item in payload.get("documentos", [])]
+            contenidos = [str(item.pop("contenido", "") or "") for item in items]
+            documentos = [DocumentoIndexado(**item) for item in items]
+            doc_tokens = payload.get("doc_tokens", [])
+            doc_struct_tokens = payload.get("doc_struct_tokens", [])
+            self._reset_index_state()
+            for i, doc in enumerate(documentos):
+                self.index.append(doc)
+                self._build_document_cache(doc, contenidos[i], tokens=set(doc_tokens[i]), struct_tokens=set(doc_struct_tokens[i]))
+            for key, counter in self._field_freq.items():
+                counter.clear()
+                counter.update({str(k): int(v) for k, v in dict(payload.get("field_freq", {}).get(key, {})).items()})
+            self._rebuild_name_index()
+            tfidf_payload = payload.get("tfidf")
+            matrix_path = target / INDEX_TFIDF_FILE
+            if isinstance(tfidf_payload, dict) and matrix_path.exists():
+                cfg = dict(tfidf_payload.get("config", {}))
+                cfg["ngram_range"] = tuple(cfg.get("ngram_range", (1, 2)))
+                vectorizer = TfidfVectorizer(**cfg, vocabulary=dict(tfidf_payload.get("vocabulary", {})))
+                vectorizer.idf_ = np.asarray(tfidf_payload.get("idf", []), dtype=np.float64)
+                self._tfidf = vectorizer
+                self._tfidf_config = cfg
+                self._matriz_tfidf = sparse.load_npz(matrix_path).tocsr()
+                self._idf_map = {term: float(vectorizer.idf_[idx]) for term, idx in vectorizer.vocabulary.items() if idx < len(vectorizer.idf_)}
+                if self.usar_ann:
+                    self._ann = IndiceIVF.cargar(target / INDEX_ANN_FILE)
+                    if self._ann is None or len(self._ann) != self._matriz_tfidf.shape[0] or self._ann.dimension != self._matriz_tfidf.shape[1]:
+                        self._construir_ann()
+        except Exception:
+            logger.warning("No se pudo restaurar índice persistido desde %s", target, exc_info=True)
+            self._reset_index_state()
+            return False
+
+        self._bump_generation()
+        elapsed = perf_counter() - start
+        logger.info("Índice cargado desde %s: %s documentos en %.3fs", target, len(self.index), elapsed)
+        self._log_audit(
+            {
+                "evento": "carga_indice",
+                "documentos": len(self.index),
+                "ruta": str(target),
                 "duracion_ms": round(elapsed * 1000, 2),
                 "timestamp": datetime.now(timezone.utc).isoformat(),
             }
         )
+        return True
+
+    @_sincronizado
+    def cargar_o_indexar(self, path: str | Path, semantico: bool = True, workers: int | None = None) -> bool:
+        """Carga el índice persistido o reindexa y lo persiste si la huella no coincide.
+
+        Retorna True si se reutilizó el índice en disco.
+        """
+        if self.load_index(path):
+            return True
+        self.indexar_documentos(workers=workers)
+        if semantico:
+            self.construir_modelo_semantico()
+        try:
+            self.save_index(path)
+        except RuntimeError:
+            logger.warning("Se continúa sin índice persistido en %s", path)
+        return False
+
+    def _columnar_rows(self, docs: list[DocumentoIndexado]) -> dict[str, object]:
+        ids = [doc.hash or doc.ruta for doc in docs]
+        return {
+            "valores_campos": [self._boost_field_values(doc) for doc in docs],
+            "tokens": [self._store.tokens(doc_id) for doc_id in ids],
+            "estructura": [self._store.estructura(doc_id) for doc_id in ids],
+            "fechas": [self._store.fecha_ts(doc_id) for doc_id in ids],
+            "frecuencias": self._field_freq,
+            "tokenizar": self._tokenizar,
+        }
+
+    def _append_documents(self, construidos: list[tuple[DocumentoIndexado, str, bool]]) -> None:
+        """Agrega documentos de ``_build_document`` a caches, postings, columnas y matriz TF-IDF."""
+        if not construidos:
+            return
+        start_pos = len(self.index)
+        docs = [doc for doc, _, _ in construidos]
+        for doc, contenido, compartido in construidos:
+            self.index.append(doc)
+            self._build_document_cache(doc, contenido, compartido)
+            self._count_field_frequencies(doc, 1)
+        self._bump_generation()
+        self._names.agregar(self._doc_keys[start_pos:], [self._normalizar_texto(doc.nombre) for doc in docs])
+        self._autocompletado = None
+        if self._columnar is not None:
+            self._columnar.agregar(**self._columnar_rows(docs))
+        if self._facets is not None:
+            self._facets.agregar(*self._facet_rows(docs))
+        if self._tfidf is not None and self._matriz_tfidf is not None:
+            # Vocabulario estable: las filas nuevas se proyectan sin reajustar el modelo.
+            nuevas = self._tfidf.transform([self._semantic_vector(doc) for doc in docs])
+            self._matriz_tfidf = sparse.vstack([self._matriz_tfidf, nuevas], format="csr")
+            if self._ann is not None:
+                self._ann.agregar(nuevas)
+            self._register_tfidf_drift(len(docs))
+
+    def _remove_positions(self, positions: list[int]) -> None:
+        """Retira documentos por posición manteniendo consistentes todas las estructuras derivadas."""
+        if not positions:
+            return
+        self._bump_generation()
+        removed = set(positions)
+        removed_ids: set[str] = set()
+        for pos in positions:
+            doc = self.index[pos]
+            removed_ids.add(doc.hash or doc.ruta)
+            self._inverted.eliminar(self._doc_keys[pos], self._postings_fields(doc, self._contenido(doc)))
+            self._count_field_frequencies(doc, -1)
+        keep = [pos for pos in range(len(self.index)) if pos not in removed]
+        self.index = [self.index[pos] for pos in keep]
+        self._doc_keys = [self._doc_keys[pos] for pos in keep]
+        self._key_pos = {key: pos for pos, key in enumerate(self._doc_keys)}
+        # Los caches se comparten entre duplicados con el mismo hash: solo se liberan si no queda ninguno.
+        remaining_ids = {doc.hash or doc.ruta for doc in self.index}
+        for doc_id in removed_ids - remaining_ids:
+            self._store.eliminar(doc_id)
+        self._rebuild_name_index()
+        self._autocompletado = None
+        if self._columnar is not None:
+            self._columnar.eliminar(positions)
+            self._columnar.actualizar_frecuencias(self._field_freq)
+        if self._facets is not None:
+            self._facets.eliminar(positions)
+        if self._tfidf is not None and self._matriz_tfidf is not None:
+            self._matriz_tfidf = self._matriz_tfidf[keep]
+            if self._ann is not None:
+                self._ann.conservar(keep)
+            self._register_tfidf_drift(len(positions))
+
+    def _register_tfidf_drift(self, cambios: int) -> None:
+        self._tfidf_drift += cambios
+        if self._tfidf_drift > TFIDF_REFIT_RATIO * max(1, len(self.index)):
+            logger.info("Cambios acumulados superan %.0f%% del corpus; TF-IDF se reajustará en la próxima consulta", TFIDF_REFIT_RATIO * 100)
+            self._invalidate_semantic_cache()
+
+    def _positions_by_hash(self, doc_hash: str) -> list[int]:
+        target = str(doc_hash)
+        return [pos for pos, doc in enumerate(self.index) if doc.hash == target]
+
+    def _log_incremental(self, operacion: str, documentos: int, start: float) -> None:
+        self._log_audit(
+            {
+                "evento": "indexacion_incremental",
+                "operacion": operacion,
+                "documentos": documentos,
+                "total_documentos": len(self.index),
+                "duracion_ms": round((perf_counter() - start) * 1000, 2),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            }
+        )
+
+    @_sincronizado
+    def agregar_documentos(self, documentos: list[dict[str, object]]) -> int:
+        """Agrega documentos al índice existente sin reindexar el corpus completo."""
+        start = perf_counter()
+        base = len(self.documentos)
+        nuevos: list[tuple[DocumentoIndexado, str, bool]] = []
+        for i, raw in enumerate(documentos or []):
+            try:
+                nuevos.append(self._build_document(raw, base + i))
+            except Exception:
+                logger.warning("Error indexando documento incremental #%s", base + i, exc_info=True)
+        self.documentos = [*self.documentos, *(documentos or [])]
+        self._append_documents(nuevos)
+        self._log_incremental("agregar", len(nuevos), start)
+        return len(nuevos)
+
+    @_sincronizado
+    def eliminar_documento(self, doc_hash: str) -> int:
+        """Elimina del índice todos los documentos con el hash indicado."""
+        start = perf_counter()
+        positions = self._positions_by_hash(doc_hash)
+        self._remove_positions(positions)
+        target = str(doc_hash)
+        self.documentos = [raw for raw in self.documentos if str(raw.get("hash") or raw.get("sha256") or "") != target]
+        self._log_incremental("eliminar", len(positions), start)
+        return len(positions)
+
+    @_sincronizado
+    def actualizar_documento(self, doc_hash: str, documento: dict[str, object] | None = None) -> int:
+        """Reconstruye un documento (con nuevos metadatos si se proporcionan) sin reindexar el corpus."""
+        start = perf_counter()
+        target = str(doc_hash)
+        raws = [raw for raw in self.documentos if str(raw.get("hash") or raw.get("sha256") or "") == target]
+        if documento is not None:
+            raws = [documento]
+        if not raws:
+            return 0
+        restantes = [raw for raw in self.documentos if str(raw.get("hash") or raw.get("sha256") or "") != target]
+        # Se construye antes de retirar: si falla la extracción, el documento anterior sigue indexado.
+        try:
+            nuevos = [self._build_document(raw, len(restantes) + i) for i, raw in enumerate(raws)]
+        except Exception:
+            logger.warning("Error reconstruyendo documento %s; se conserva la versión indexada", target, exc_info=True)
+            return 0
+        self._remove_positions(self._positions_by_hash(target))
+        self.documentos = [*restantes, *raws]
+        self._append_documents(nuevos)
+        self._log_incremental("actualizar", len(nuevos), start)
+        return len(nuevos)
 
     def buscar_por_nombre(self, query: str, usar_fuzzy: bool = True) -> list[dict[str, object]]:
         """Busca por nombre con coincidencia exacta, parcial y difusa."""
         q = self._normalizar_texto(query)
         if not q:
             return []
-        if not self.index:
-            self.indexar_documentos()
+        self._asegurar_indice()
         salida: list[dict[str, object]] = []
-        for doc in self.index:
+        fuzzy_scores = self._fuzzy_batch(q, [self._store.nombre(doc.hash) for doc in self.index]) if usar_fuzzy else np.zeros(len(self.index))
+        for doc, fuzzy_score in zip(self.index, fuzzy_scores.tolist()):
             exact = self._score_exact(doc, q)
-            fuzzy_score = self._safe_ratio(q, self._doc_name_norm.get(doc.hash, "")) if usar_fuzzy else 0.0
             score = max(exact, fuzzy_score)
             if score > 0:
                 salida.append(self._resultado(doc, score * 100.0))
@@ -909,8 +2090,7 @@ class SearchEngine:
         q = self._normalizar_texto(query)
         if not q:
             return []
-        if not self.index:
-            self.indexar_documentos()
+        self._asegurar_indice()
         tokens = self._tokenizar(q)
         salida: list[dict[str, object]] = []
         for doc in self.index:
@@ -919,6 +2099,7 @@ class SearchEngine:
                 salida.append(self._resultado(doc, score * 100.0))
         return sorted(salida, key=lambda x: self._to_float(x.get("relevancia", 0.0)), reverse=True)
 
+    @_sincronizado
     def construir_modelo_semantico(self) -> None:
         """Construye TF-IDF con configuración dinámica por tamaño del corpus."""
         textos = [self._semantic_vector(doc) for doc in self.index]
@@ -926,6 +2107,7 @@ class SearchEngine:
             self._invalidate_semantic_cache()
             return
         cfg = self._compute_dynamic_tfidf_config()
+        self._tfidf_config = dict(cfg)
         self._tfidf = TfidfVectorizer(**cfg)
         self._matriz_tfidf = self._tfidf.fit_transform(textos)
         self._idf_map = {
@@ -933,40 +2115,43 @@ class SearchEngine:
             for term, idx in getattr(self._tfidf, "vocabulary_", {}).items()
             if idx < len(self._tfidf.idf_)
         }
+        self._ann = None
+        if self.usar_ann:
+            self._construir_ann()
+        self._bump_generation()
         logger.info("Modelo semántico TF-IDF construido: %s documentos", len(textos))
 
-    def buscar_semantico(self, query: str, top_k: int = 20) -> list[dict[str, object]]:
-        """Busca por similitud semántica, con fallback robusto y orden estable."""
+    def _construir_ann(self) -> None:
+        """Entrena el índice IVF sobre la matriz TF-IDF vigente (filas alineadas con ``self.index``)."""
+        start = perf_counter()
+        self._ann = IndiceIVF.construir(self._matriz_tfidf)
+        logger.info("Índice ANN construido: %s listas en %.3fs", self._ann.nlist, perf_counter() - start)
+
+    def buscar_semantico(self, query: str, top_k: int = 20, nprobe: int | None = None) -> list[dict[str, object]]:
+        """Busca por similitud semántica, con fallback robusto y orden estable.
+
+        Con el índice ANN activo (``usar_ann``) sólo se puntúan los documentos de las ``nprobe``
+        listas más cercanas a la consulta; ``nprobe`` mayor sube el recall a costa de latencia.
+        """
         if not self.index:
             return []
-        if self._tfidf is None or self._matriz_tfidf is None:
-            self.construir_modelo_semantico()
-        if self._tfidf is None or self._matriz_tfidf is None:
+        if self._modelo_semantico()[0] is None:
             return []
-
-        qv = self._tfidf.transform([query])
-        sims = cosine_similarity(qv, self._matriz_tfidf).flatten()
-
-        docs_sem = []
-        for i, score in enumerate(sims.tolist()):
-            if i < len(self.index):
-                docs_sem.append({"id": self.index[i].hash, "doc": self.index[i], "vector": np.array([score]), "score": score})
-
-        salida: list[dict[str, object]] = []
-        try:
-            similares = buscar_similares(query, docs_sem, top_k=top_k)
-            for item in similares:
-                doc = item.get("doc")
-                if isinstance(doc, DocumentoIndexado):
-                    salida.append(self._resultado(doc, float(item.get("score", 0.0)) * 100.0))
-        except Exception:
-            logger.debug("Fallback a ranking semántico local", exc_info=True)
-
-        if salida:
-            return salida
-
-        idx_sorted = np.argsort(sims)[::-1][: max(1, min(top_k, len(self.index)))]
-        return [self._resultado(self.index[i], float(sims[i]) * 100.0) for i in idx_sorted if float(sims[i]) > 0]
+        ann = self._ann
+        if ann is None or not query.strip():
+            sims = self._semantic_scores(query)
+            return [self._resultado(self.index[i], float(sims[i]) * 100.0) for i in self._top_k_indices(sims, max(1, top_k)).tolist() if sims[i] > 0]
+        return [self._resultado(self.index[pos], score * 100.0) for pos, score in self._top_k_ann(ann, query, top_k, nprobe)]
+
+    def _top_k_ann(self, ann: IndiceIVF, query: str, top_k: int, nprobe: int | None = None) -> list[tuple[int, float]]:
+        """(posición, coseno) del top-k exacto restringido a los candidatos del índice ANN."""
+        tfidf, matriz = self._modelo_semantico()
+        if tfidf is None or matriz is None:
+            return []
+        qv = tfidf.transform([query])
+        positions = ann.candidatos(qv, ANN_NPROBE if nprobe is None else nprobe)
+        sims = np.maximum(0.0, np.asarray((matriz[positions] @ qv.T).toarray(), dtype=np.float64).ravel())
+        return [(int(positions[i]), float(sims[i])) for i in self._top_k_indices(sims, max(1, top_k)).tolist() if sims[i] > 0]
 
     def combinar_resultados(self, *listas: list[dict[str, object]]) -> list[dict[str, object]]:
         """Combina listas de resultados manteniendo un score agregado por documento."""
@@ -993,14 +2178,31 @@ class SearchEngine:
         usar_contenido: bool = True,
         usar_semantico: bool = False,
         modo: str | None = None,
+        motor: str | None = None,
         top_k: int | None = None,
         weights: dict[str, object] | None = None,
         auditoria: bool = False,
         profiling: bool = False,
+        vectorizado: bool = False,
+        usar_cache: bool = True,
+        campos: list[str] | None = None,
+        snippet: int = 0,
     ) -> list[dict[str, object]]:
-        """Búsqueda avanzada con ranking híbrido, boosting y modo estricto/flexible."""
-        if not self.index:
-            self.indexar_documentos()
+        """Búsqueda avanzada con ranking híbrido, boosting y modo estricto/flexible.
+
+        Con ``vectorizado=True`` los siete componentes y el boosting se calculan en bloque
+        sobre arreglos NumPy por documento, con el mismo desglose ``score_*`` de auditoría.
+        Con ``top_k`` sólo se conserva un heap acotado y se omiten los componentes caros de
+        documentos cuya cota superior (pesos × boost máximo) no alcanza el top-k actual.
+        Los resultados se cachean (LRU + TTL) por consulta, filtros, pesos y generación del índice;
+        ``usar_cache=False`` fuerza el ranking completo.
+        Cada resultado proyecta ``campos`` del documento (por defecto todos salvo ``contenido``);
+        ``snippet`` > 0 agrega un fragmento de hasta ese largo alrededor de la coincidencia.
+        ``motor="bm25f"`` (o ``filtros["motor"]``) sustituye TF-IDF, tokens y contenido por un score
+        BM25F ponderado por campo calculado sobre los postings, sin ajustar ningún modelo; su
+        componente se audita como ``score_bm25f`` y se pondera con ``weights["score_bm25f"]``.
+        """
+        self._asegurar_indice()
 
         ctx = self._build_query_context(
             query=query,
@@ -1010,60 +2212,238 @@ class SearchEngine:
             usar_semantico=usar_semantico,
             modo=modo,
             weights=weights,
+            motor=motor,
             auditoria=auditoria,
             profiling=profiling,
         )
-        perf_components: dict[str, float] = {
-            "prepare_corpus_ms": 0.0,
-            "fuzzy_ms": 0.0,
-            "tfidf_ms": 0.0,
-            "semantic_ms": 0.0,
-            "tokens_ms": 0.0,
-            "temporal_ms": 0.0,
-            "structural_ms": 0.0,
-            "boosting_ms": 0.0,
-            "ranking_ms": 0.0,
-            "audit_ms": 0.0,
-        }
+        return self._buscar_contexto(ctx, top_k, auditoria, vectorizado, usar_cache, campos, snippet)
+
+    def buscar_pagina(
+        self,
+        query: str,
+        filtros: dict[str, object],
+        page_size: int = PAGE_SIZE,
+        cursor: str | None = None,
+        usar_nombre: bool = True,
+        usar_contenido: bool = True,
+        usar_semantico: bool = False,
+        modo: str | None = None,
+        motor: str | None = None,
+        weights: dict[str, object] | None = None,
+        auditoria: bool = False,
+        vectorizado: bool = False,
+        usar_cache: bool = True,
+        campos: list[str] | None = None,
+        snippet: int = 0,
+    ) -> dict[str, object]:
+        """Una página de resultados con cursor estable: ``{"resultados", "cursor", "total"}``.
+
+        La primera llamada rankea la consulta completa pero sólo materializa ``page_size`` filas; el
+        ranking (llaves ordenadas por score desc e id) queda en el cache de resultados y las páginas
+        siguientes (``cursor`` de la respuesta anterior) se sirven de él sin re-rankear. ``cursor`` es
+        ``None`` en la última página. Con ``usar_cache=False`` cada página re-rankea, pero el cursor
+        sigue siendo válido: la página empieza después de la última fila entregada.
+        """
+        self._asegurar_indice()
+        ctx = self._build_query_context(
+            query=query,
+            filtros=filtros or {},
+            usar_nombre=usar_nombre,
+            usar_contenido=usar_contenido,
+            usar_semantico=usar_semantico,
+            modo=modo,
+            weights=weights,
+            motor=motor,
+            auditoria=auditoria,
+            profiling=False,
+        )
+        ranking = self._ranking_paginado(ctx, vectorizado, auditoria, usar_cache)
+        return self._pagina(ctx, ranking, ranking.posicion(cursor), page_size, auditoria, campos, snippet)
+
+    def iter_buscar(
+        self,
+        query: str,
+        filtros: dict[str, object],
+        page_size: int = PAGE_SIZE,
+        usar_nombre: bool = True,
+        usar_contenido: bool = True,
+        usar_semantico: bool = False,
+        modo: str | None = None,
+        motor: str | None = None,
+        weights: dict[str, object] | None = None,
+        auditoria: bool = False,
+        vectorizado: bool = False,
+        usar_cache: bool = True,
+        campos: list[str] | None = None,
+        snippet: int = 0,
+    ) -> Iterator[dict[str, object]]:
+        """Recorre los resultados en el orden de ``buscar_pagina`` materializando de a ``page_size``.
+
+        El ranking se calcula una vez al pedir el primer resultado; cortar la iteración temprano
+        evita construir los resultados restantes.
+        """
+        self._asegurar_indice()
+        ctx = self._build_query_context(
+            query=query,
+            filtros=filtros or {},
+            usar_nombre=usar_nombre,
+            usar_contenido=usar_contenido,
+            usar_semantico=usar_semantico,
+            modo=modo,
+            weights=weights,
+            motor=motor,
+            auditoria=auditoria,
+            profiling=False,
+        )
+        ranking = self._ranking_paginado(ctx, vectorizado, auditoria, usar_cache)
+        page_size = max(1, int(page_size))
+        for inicio in range(0, len(ranking), page_size):
+            yield from self._pagina(ctx, ranking, inicio, page_size, auditoria, campos, snippet)["resultados"]
+
+    def _ranking_paginado(self, ctx: QueryContext, vectorizado: bool, auditoria: bool, usar_cache: bool) -> RankingPaginado:
+        """Ranking completo sin materializar resultados, cacheado junto a los resultados de ``buscar_avanzado``."""
+        usar_cache = usar_cache and self._result_cache.habilitado
+        llave = ("ranking", *self._cache_key(ctx, None, vectorizado, auditoria, ((), 0)))
+        if usar_cache:
+            cached = self._result_cache.get(llave)
+            if cached is not None:
+                elapsed_ms = (perf_counter() - ctx.started_at) * 1000.0
+                self._registrar_latencias(ctx, {"cache": elapsed_ms, "total": elapsed_ms})
+                return cached
+
+        perf_components = self._componentes_perf()
+        etapas: dict[str, float] = {}
+        prepare_start = perf_counter()
+        positions = self._filter_positions(ctx.filtros)
+        etapas["filtrado"] = (perf_counter() - prepare_start) * 1000.0
+        filtrados = len(positions)
+        n_candidatos = podados = 0
+        ranked: list[tuple[DocumentoIndexado, float, dict[str, float]]] = []
+        if positions and not ctx.query_norm:
+            ranked = [(self.index[pos], 1.0, {}) for pos in positions]
+        elif positions:
+            ranked, n_candidatos, podados = self._rankear_candidatos(ctx, positions, None, vectorizado, perf_components, etapas)
+        orden_start = perf_counter()
+        ranking = RankingPaginado.desde_ranked(ranked, componentes=auditoria)
+        etapas["orden"] = etapas.get("orden", 0.0) + (perf_counter() - orden_start) * 1000.0
+
+        elapsed_ms = round((perf_counter() - ctx.started_at) * 1000, 2)
+        self._log_audit(
+            {
+                "evento": "busqueda_avanzada",
+                "audit_id": ctx.audit_id,
+                "query": ctx.query_raw,
+                "modo": ctx.modo,
+                "motor": ctx.motor,
+                "filtros": dict(ctx.filtros),
+                "usar_semantico": ctx.usar_semantico,
+                "candidatos": filtrados,
+                "candidatos_postings": n_candidatos,
+                "podados": podados,
+                "cache_hit": False,
+                "paginado": True,
+                "resultados": len(ranking),
+                "tipo_top": ranking.docs[0].tipo if ranking.docs else "",
+                "carpeta_top": ranking.docs[0].carpeta if ranking.docs else "",
+                "duracion_ms": elapsed_ms,
+                "idf_factor": round(ctx.idf_query_factor, 4),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            }
+        )
+        etapas["total"] = (perf_counter() - ctx.started_at) * 1000.0
+        self._registrar_latencias(ctx, etapas)
+        if usar_cache:
+            self._result_cache.put(llave, ranking)
+        return ranking
+
+    def _pagina(
+        self,
+        ctx: QueryContext,
+        ranking: RankingPaginado,
+        inicio: int,
+        page_size: int,
+        auditoria: bool,
+        campos: list[str] | None,
+        snippet: int,
+    ) -> dict[str, object]:
+        campos_resultado = self._campos_resultado(campos)
+        snippet = max(0, min(int(snippet or 0), SNIPPET_MAX_CHARS))
+        fin = min(len(ranking), inicio + max(1, int(page_size)))
+        resultados = [
+            self._item_resultado(ctx, ranking.docs[fila], ranking.score(fila), ranking.componentes[fila] if auditoria else {}, auditoria, campos_resultado, snippet)
+            for fila in range(inicio, fin)
+        ]
+        self._last_audited_results = list(resultados)
+        return {"resultados": resultados, "cursor": ranking.cursor(fin - 1) if fin < len(ranking) else None, "total": len(ranking)}
+
+    def _buscar_contexto(
+        self,
+        ctx: QueryContext,
+        top_k: int | None,
+        auditoria: bool,
+        vectorizado: bool,
+        usar_cache: bool,
+        campos: list[str] | None,
+        snippet: int,
+        filtradas: list[int] | None = None,
+        candidatas: list[int] | None = None,
+    ) -> list[dict[str, object]]:
+        """Ranking de una consulta ya preprocesada.
+
+        ``filtradas``/``candidatas`` permiten a ``buscar_lote`` reutilizar el filtrado y los postings
+        calculados una sola vez para todo el lote.
+        """
+        perf_components = self._componentes_perf()
+        etapas: dict[str, float] = {}
+        campos_resultado = self._campos_resultado(campos)
+        snippet = max(0, min(int(snippet or 0), SNIPPET_MAX_CHARS))
+        usar_cache = usar_cache and self._result_cache.habilitado
+        if usar_cache:
+            cached = self._result_cache.get(self._cache_key(ctx, top_k, vectorizado, auditoria, (campos_resultado, snippet)))
+            if cached is not None:
+                salida_cache = copy.deepcopy(cached)
+                elapsed_ms = round((perf_counter() - ctx.started_at) * 1000, 2)
+                self._log_audit(
+                    {
+                        "evento": "busqueda_avanzada",
+                        "audit_id": ctx.audit_id,
+                        "query": ctx.query_raw,
+                        "modo": ctx.modo,
+                        "motor": ctx.motor,
+                        "filtros": dict(ctx.filtros),
+                        "usar_semantico": ctx.usar_semantico,
+                        "cache_hit": True,
+                        "resultados": len(salida_cache),
+                        "tipo_top": str(salida_cache[0].get("tipo", "")) if salida_cache else "",
+                        "carpeta_top": str(salida_cache[0].get("carpeta", "")) if salida_cache else "",
+                        "duracion_ms": elapsed_ms,
+                        "idf_factor": round(ctx.idf_query_factor, 4),
+                        "timestamp": datetime.now(timezone.utc).isoformat(),
+                    }
+                )
+                if auditoria:
+                    self._log_busqueda_auditoria(ctx, len(salida_cache), cache_hit=True)
+                self._registrar_metricas(ctx, perf_components, elapsed_ms, cache_hit=True)
+                self._registrar_latencias(ctx, {"cache": elapsed_ms, "total": elapsed_ms})
+                self._last_audited_results = list(salida_cache)
+                return salida_cache
 
         prepare_start = perf_counter()
-        candidates = self._filter_candidates(ctx.filtros)
+        positions = self._filter_positions(ctx.filtros) if filtradas is None else filtradas
+        etapas["filtrado"] = (perf_counter() - prepare_start) * 1000.0
         if ctx.profiling:
-            perf_components["prepare_corpus_ms"] += (perf_counter() - prepare_start) * 1000.0
-        if not candidates:
+            perf_components["prepare_corpus_ms"] += etapas["filtrado"]
+        if not positions:
             self._last_performance_metrics = {}
             return []
 
         if not ctx.query_norm:
-            salida = [self._resultado(doc, 100.0) for doc in candidates]
+            salida = [self._resultado(self.index[pos], 100.0, campos_resultado) for pos in positions]
             self._last_performance_metrics = {}
             return sorted(salida, key=lambda x: self._to_float(x.get("relevancia", 0.0)), reverse=True)
 
-        if ctx.usar_semantico and ctx.modo != STRICT_MODE:
-            tfidf_start = perf_counter()
-            semantic_scores = self._semantic_scores(ctx.query_raw)
-            if ctx.profiling:
-                perf_components["tfidf_ms"] += (perf_counter() - tfidf_start) * 1000.0
-        else:
-            semantic_scores = {}
-
-        ranked: list[tuple[DocumentoIndexado, float, dict[str, float]]] = []
-        for doc in candidates:
-            score_raw, components, comp_ms = self._rank_document(doc, ctx, semantic_scores)
-            if ctx.profiling:
-                for key in ("fuzzy_ms", "semantic_ms", "tokens_ms", "temporal_ms", "structural_ms", "boosting_ms"):
-                    perf_components[key] += float(comp_ms.get(key, 0.0))
-            if ctx.modo == STRICT_MODE and score_raw <= 0:
-                continue
-            if score_raw > 0:
-                ranked.append((doc, min(1.0, score_raw), components))
-
-        rank_start = perf_counter()
-        ranked.sort(key=lambda x: x[1], reverse=True)
-        if top_k and top_k > 0:
-            ranked = ranked[:top_k]
-        if ctx.profiling:
-            perf_components["ranking_ms"] += (perf_counter() - rank_start) * 1000.0
+        filtrados = len(positions)
+        ranked, n_candidatos, podados = self._rankear_candidatos(ctx, positions, top_k, vectorizado, perf_components, etapas, candidatas)
 
         elapsed_ms = round((perf_counter() - ctx.started_at) * 1000, 2)
         self._log_audit(
@@ -1072,10 +2452,16 @@ class SearchEngine:
                 "audit_id": ctx.audit_id,
                 "query": ctx.query_raw,
                 "modo": ctx.modo,
+                "motor": ctx.motor,
                 "filtros": dict(ctx.filtros),
                 "usar_semantico": ctx.usar_semantico,
-                "candidatos": len(candidates),
+                "candidatos": filtrados,
+                "candidatos_postings": n_candidatos,
+                "podados": podados,
+                "cache_hit": False,
                 "resultados": len(ranked),
+                "tipo_top": ranked[0][0].tipo if ranked else "",
+                "carpeta_top": ranked[0][0].carpeta if ranked else "",
                 "duracion_ms": elapsed_ms,
                 "idf_factor": round(ctx.idf_query_factor, 4),
                 "timestamp": datetime.now(timezone.utc).isoformat(),
@@ -1085,48 +2471,295 @@ class SearchEngine:
             "Búsqueda '%s' modo=%s candidatos=%s resultados=%s tiempo=%.2fms",
             ctx.query_raw,
             ctx.modo,
-            len(candidates),
+            n_candidatos,
             len(ranked),
             elapsed_ms,
         )
 
-        salida_final: list[dict[str, object]] = []
         audit_start = perf_counter()
-        for doc, score, components in ranked:
-            item = self._resultado(doc, score * 100.0)
-            if auditoria:
-                item["score_exacto"] = round(float(components.get("exact", 0.0)) * 100.0, 4)
-                item["score_fuzzy"] = round(float(components.get("fuzzy", 0.0)) * 100.0, 4)
-                item["score_semantico"] = round(float(components.get("semantic", 0.0)) * 100.0, 4)
-                item["score_tokens"] = round(float(components.get("tokens", 0.0)) * 100.0, 4)
-                item["score_temporal"] = round(float(components.get("temporal", 0.0)) * 100.0, 4)
-                item["score_estructural"] = round(float(components.get("structural", 0.0)) * 100.0, 4)
-                item["score_boosting"] = round(float(components.get("boost", 0.0)), 4)
-                item["score_final"] = round(float(components.get("final", score)) * 100.0, 4)
-            salida_final.append(item)
+        salida_final = [self._item_resultado(ctx, doc, score, components, auditoria, campos_resultado, snippet) for doc, score, components in ranked]
 
         if auditoria:
-            self._log_audit(
-                {
-                    "evento": "busqueda_auditoria",
-                    "audit_id": ctx.audit_id,
-                    "query": ctx.query_raw,
-                    "modo": ctx.modo,
-                    "weights": asdict(ctx.weights),
-                    "boost_weights": dict(ctx.boost_weights),
-                    "resultados": len(salida_final),
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
-                }
-            )
+            self._log_busqueda_auditoria(ctx, len(salida_final), cache_hit=False)
+        etapas["salida"] = (perf_counter() - audit_start) * 1000.0
+        if ctx.profiling:
+            perf_components["audit_ms"] += etapas["salida"]
+
+        self._registrar_metricas(ctx, perf_components, elapsed_ms, cache_hit=False)
+        etapas["total"] = (perf_counter() - ctx.started_at) * 1000.0
+        self._registrar_latencias(ctx, etapas)
+        if usar_cache:
+            self._result_cache.put(self._cache_key(ctx, top_k, vectorizado, auditoria, (campos_resultado, snippet)), copy.deepcopy(salida_final))
+        self._last_audited_results = list(salida_final)
+
+        return salida_final
+
+    def _log_busqueda_auditoria(self, ctx: QueryContext, resultados: int, cache_hit: bool) -> None:
+        """Evento con los pesos aplicados; también se emite en aciertos de cache para el panel de auditoría."""
+        self._log_audit(
+            {
+                "evento": "busqueda_auditoria",
+                "audit_id": ctx.audit_id,
+                "query": ctx.query_raw,
+                "modo": ctx.modo,
+                "motor": ctx.motor,
+                "weights": asdict(ctx.weights),
+                "boost_weights": dict(ctx.boost_weights),
+                "cache_hit": cache_hit,
+                "resultados": resultados,
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            }
+        )
+
+    @staticmethod
+    def _componentes_perf() -> dict[str, float]:
+        return {
+            "prepare_corpus_ms": 0.0,
+            "fuzzy_ms": 0.0,
+            "tfidf_ms": 0.0,
+            "semantic_ms": 0.0,
+            "tokens_ms": 0.0,
+            "temporal_ms": 0.0,
+            "structural_ms": 0.0,
+            "boosting_ms": 0.0,
+            "ranking_ms": 0.0,
+            "audit_ms": 0.0,
+        }
+
+    def _item_resultado(
+        self,
+        ctx: QueryContext,
+        doc: DocumentoIndexado,
+        score: float,
+        components: dict[str, float],
+        auditoria: bool,
+        campos_resultado: tuple[str, ...],
+        snippet: int,
+    ) -> dict[str, object]:
+        item = self._resultado(doc, score * 100.0, campos_resultado, snippet, ctx.query_norm, ctx.query_tokens)
+        if auditoria:
+            item["score_exacto"] = round(float(components.get("exact", 0.0)) * 100.0, 4)
+            item["score_fuzzy"] = round(float(components.get("fuzzy", 0.0)) * 100.0, 4)
+            item["score_semantico"] = round(float(components.get("semantic", 0.0)) * 100.0, 4)
+            item["score_tokens"] = round(float(components.get("tokens", 0.0)) * 100.0, 4)
+            item["score_temporal"] = round(float(components.get("temporal", 0.0)) * 100.0, 4)
+            item["score_estructural"] = round(float(components.get("structural", 0.0)) * 100.0, 4)
+            item["score_bm25f"] = round(float(components.get("bm25f", 0.0)) * 100.0, 4)
+            item["score_boosting"] = round(float(components.get("boost", 0.0)), 4)
+            item["score_final"] = round(float(components.get("final", score)) * 100.0, 4)
+        return item
+
+    def _rankear_candidatos(
+        self,
+        ctx: QueryContext,
+        positions: list[int],
+        top_k: int | None,
+        vectorizado: bool,
+        perf_components: dict[str, float],
+        etapas: dict[str, float],
+        candidatas: list[int] | None = None,
+    ) -> tuple[list[tuple[DocumentoIndexado, float, dict[str, float]]], int, int]:
+        """Postings, scoring y orden por score de posiciones ya filtradas, sin materializar resultados.
+
+        Retorna ``(ranked, candidatos tras postings, podados por cota)``.
+        """
+        podados = 0
+        postings_start = perf_counter()
+        positions = self._postings_candidates(ctx, positions) if candidatas is None else candidatas
+        candidates = [self.index[pos] for pos in positions]
+        etapas["postings"] = (perf_counter() - postings_start) * 1000.0
+        if ctx.profiling:
+            perf_components["prepare_corpus_ms"] += etapas["postings"]
+
+        ranking_start = perf_counter()
+        if vectorizado:
+            ranked = self._rank_vectorizado(np.asarray(positions, dtype=np.int64), ctx, perf_components, top_k=top_k)
+        else:
+            plan = self._plan_scoring(ctx)
+            semantic_scores = np.zeros(len(candidates), dtype=np.float64)
+            if plan.semantico:
+                tfidf_start = perf_counter()
+                semantic_scores = self._semantic_scores_ctx(ctx, np.asarray(positions, dtype=np.int64))
+                etapas["semantico"] = (perf_counter() - tfidf_start) * 1000.0
+                if ctx.profiling:
+                    perf_components["tfidf_ms"] += etapas["semantico"]
+
+            bm25f_scores = None
+            if plan.bm25f:
+                bm25f_start = perf_counter()
+                bm25f_scores = self._bm25f_scores(ctx, np.asarray(positions, dtype=np.int64))
+                etapas["bm25f"] = (perf_counter() - bm25f_start) * 1000.0
+
+            fuzzy_start = perf_counter()
+            fuzzy_scores = np.zeros(len(candidates), dtype=np.float64)
+            if plan.fuzzy:
+                fuzzy_scores = self._fuzzy_batch(ctx.query_norm, [self._store.nombre(doc.hash or doc.ruta) for doc in candidates])
+                etapas["fuzzy"] = (perf_counter() - fuzzy_start) * 1000.0
+            if ctx.profiling:
+                perf_components["fuzzy_ms"] += (perf_counter() - fuzzy_start) * 1000.0
+
+            ranked = []
+            if top_k and top_k > 0:
+                ranked, podados = self._rank_top_k(candidates, ctx, semantic_scores, fuzzy_scores, perf_components, top_k, bm25f_scores)
+                candidates = []
+            for orden, doc in enumerate(candidates):
+                resultado = self._rank_document(
+                    doc,
+                    ctx,
+                    float(semantic_scores[orden]),
+                    fuzzy_score=float(fuzzy_scores[orden]),
+                    bm25f_score=0.0 if bm25f_scores is None else float(bm25f_scores[orden]),
+                )
+                if resultado is None:
+                    continue
+                score_raw, components, comp_ms = resultado
+                if ctx.profiling:
+                    for key in ("fuzzy_ms", "semantic_ms", "tokens_ms", "temporal_ms", "structural_ms", "boosting_ms"):
+                        perf_components[key] += float(comp_ms.get(key, 0.0))
+                if score_raw > 0:
+                    ranked.append((doc, min(1.0, score_raw), components))
+
+        rank_start = perf_counter()
+        # En la ruta vectorizada "ranking" incluye semántica, fuzzy y BM25F (se calculan en el mismo bloque).
+        etapas["ranking"] = (
+            (rank_start - ranking_start) * 1000.0 - etapas.get("semantico", 0.0) - etapas.get("fuzzy", 0.0) - etapas.get("bm25f", 0.0)
+        )
+        ranked.sort(key=lambda x: x[1], reverse=True)
+        if top_k and top_k > 0:
+            ranked = ranked[:top_k]
+        etapas["orden"] = (perf_counter() - rank_start) * 1000.0
         if ctx.profiling:
-            perf_components["audit_ms"] += (perf_counter() - audit_start) * 1000.0
+            perf_components["ranking_ms"] += etapas["orden"]
+        return ranked, len(positions), podados
+
+    def buscar_lote(
+        self,
+        queries: list[str],
+        filtros: dict[str, object],
+        usar_nombre: bool = True,
+        usar_contenido: bool = True,
+        usar_semantico: bool = False,
+        modo: str | None = None,
+        motor: str | None = None,
+        top_k: int | None = None,
+        weights: dict[str, object] | None = None,
+        auditoria: bool = False,
+        profiling: bool = False,
+        vectorizado: bool = False,
+        usar_cache: bool = True,
+        campos: list[str] | None = None,
+        snippet: int = 0,
+    ) -> list[dict[str, object]]:
+        """Ejecuta varias consultas con los mismos filtros compartiendo el preprocesamiento.
+
+        Los filtros se evalúan una sola vez y todas las consultas semánticas se transforman en una
+        matriz dispersa cuyo producto con las filas candidatas (unión de los postings de cada consulta)
+        da la matriz candidatos × consultas en una pasada. Cada consulta se rankea igual que en
+        ``buscar_avanzado``. Retorna, en orden, ``{"query", "resultados", "metricas"}`` por consulta;
+        ``metricas`` es el payload de profiling o, sin profiling, duración y número de resultados;
+        ``contexto`` permite fijar la consulta como última búsqueda con ``fijar_resultado_lote``.
+        """
+        self._asegurar_indice()
+        filtros = filtros or {}
+        lote_start = perf_counter()
+        ctxs = [
+            self._build_query_context(
+                query=query,
+                filtros=filtros,
+                usar_nombre=usar_nombre,
+                usar_contenido=usar_contenido,
+                usar_semantico=usar_semantico,
+                modo=modo,
+                weights=weights,
+                auditoria=auditoria,
+                profiling=profiling,
+                motor=motor,
+            )
+            for query in queries
+        ]
+        filtradas = self._filter_positions(filtros)
+        candidatas: list[list[int] | None] = [
+            self._postings_candidates(ctx, filtradas) if (ctx.query_norm and filtradas) else None for ctx in ctxs
+        ]
+
+        # Sólo las consultas cuyo plan usa la semántica (flexible, peso > 0, motor híbrido) ajustan TF-IDF.
+        semanticas = [i for i, ctx in enumerate(ctxs) if candidatas[i] and self._plan_scoring(ctx).semantico]
+        if semanticas:
+            filas = np.unique(np.concatenate([np.asarray(candidatas[i], dtype=np.int64) for i in semanticas]))
+            matriz = self._semantic_lote([ctxs[i].query_raw for i in semanticas], filas)
+            for columna, i in enumerate(semanticas):
+                ctxs[i].semantica_lote = (filas, matriz[:, columna])
+        preparacion_ms = round((perf_counter() - lote_start) * 1000, 2)
+
+        salida: list[dict[str, object]] = []
+        for ctx, cands in zip(ctxs, candidatas):
+            ctx.started_at = perf_counter()
+            self._last_query_context = {}
+            resultados = self._buscar_contexto(
+                ctx, top_k, auditoria, vectorizado, usar_cache, campos, snippet, filtradas=filtradas, candidatas=cands
+            )
+            metricas = self.get_last_performance_metrics() if ctx.profiling else {}
+            if not metricas:
+                metricas = {"total_time_ms": round((perf_counter() - ctx.started_at) * 1000, 4), "resultados": len(resultados)}
+            ctx.semantica_lote = None
+            salida.append(
+                {"query": ctx.query_raw, "resultados": resultados, "metricas": metricas, "contexto": dict(self._last_query_context)}
+            )
+
+        self._log_audit(
+            {
+                "evento": "busqueda_lote",
+                "consultas": len(ctxs),
+                "candidatos": len(filtradas),
+                "semanticas": len(semanticas),
+                "preparacion_ms": preparacion_ms,
+                "duracion_ms": round((perf_counter() - lote_start) * 1000, 2),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            }
+        )
+        return salida
+
+    def fijar_resultado_lote(self, item: dict[str, object]) -> None:
+        """Deja una consulta de ``buscar_lote`` como última búsqueda para las exportaciones de auditoría."""
+        contexto = dict(item.get("contexto", {}))
+        self._last_audited_results = list(item.get("resultados", []))
+        self._last_query_context = contexto
+        self._last_performance_metrics = dict(contexto.get("performance_metrics", {}))
+
+    def _cache_key(
+        self,
+        ctx: QueryContext,
+        top_k: int | None,
+        vectorizado: bool,
+        auditoria: bool,
+        proyeccion: tuple[tuple[str, ...], int],
+    ) -> tuple[object, ...]:
+        """Llave del cache de resultados; incluye la generación del índice para invalidar tras cambios."""
+        return (
+            self._generation,
+            ctx.query_norm,
+            canonicalizar(ctx.filtros),
+            ctx.modo,
+            ctx.motor,
+            canonicalizar(asdict(ctx.weights)),
+            canonicalizar(ctx.boost_weights),
+            ctx.usar_nombre,
+            ctx.usar_contenido,
+            ctx.usar_semantico,
+            int(top_k or 0),
+            bool(vectorizado),
+            bool(auditoria),
+            proyeccion,
+        )
 
+    def _registrar_metricas(self, ctx: QueryContext, perf_components: dict[str, float], elapsed_ms: float, cache_hit: bool) -> None:
         if ctx.profiling:
             perf_payload: dict[str, object] = {
                 "timestamp": datetime.now(timezone.utc).isoformat(),
                 "version_motor": SEARCH_ENGINE_VERSION,
                 "total_time_ms": round(float(elapsed_ms), 4),
                 "components": {k: round(float(v), 4) for k, v in perf_components.items()},
+                "cache": {"hit": cache_hit, **self._result_cache.stats()},
             }
             self._last_performance_metrics = perf_payload
             self._log_audit(
@@ -1144,19 +2777,118 @@ class SearchEngine:
         self._last_query_context = self._ctx_to_dict(ctx)
         if ctx.profiling:
             self._last_query_context["performance_metrics"] = dict(self._last_performance_metrics)
-        self._last_audited_results = list(salida_final)
 
-        return salida_final
+    @staticmethod
+    def clase_consulta(ctx: QueryContext) -> str:
+        """Clase de consulta para agregar latencias: modo, motor o uso de semántica y número de tokens."""
+        tokens = len(ctx.query_tokens)
+        longitud = "1" if tokens <= 1 else "2-3" if tokens <= 3 else "4+"
+        semantica = "semantica" if ctx.usar_semantico and ctx.modo != STRICT_MODE else "lexica"
+        if ctx.motor == MOTOR_BM25F and ctx.modo != STRICT_MODE:
+            semantica = MOTOR_BM25F
+        return f"{ctx.modo}:{semantica}:{longitud}"
+
+    def _registrar_latencias(self, ctx: QueryContext, etapas: dict[str, float]) -> None:
+        if self._metricas is not None:
+            self._metricas.registrar(self.clase_consulta(ctx), etapas)
+
+    def get_memory_footprint(self) -> dict[str, object]:
+        """Bytes aproximados retenidos por el índice, desglosados por estructura."""
+        documentos = 0
+        for doc in self.index:
+            documentos += sys.getsizeof(doc) + sys.getsizeof(doc.etiquetas)
+            # El contenido vive sólo en el store: ``store_contenido_buffer`` y ``store_contenido_original``.
+            documentos += sum(sys.getsizeof(getattr(doc, campo)) for campo in ("nombre", "ruta", "fecha_modificacion", "hash"))
+        postings = 0
+        for campo, tokens in self._inverted.postings.items():
+            postings += sys.getsizeof(tokens) + sys.getsizeof(self._inverted.doc_len[campo])
+            postings += sum(sys.getsizeof(docs) for docs in tokens.values())
+        postings += self._inverted.subcadenas.memoria()
+        tfidf = 0
+        if self._matriz_tfidf is not None:
+            tfidf = int(self._matriz_tfidf.data.nbytes + self._matriz_tfidf.indices.nbytes + self._matriz_tfidf.indptr.nbytes)
+        if self._ann is not None:
+            tfidf += int(self._ann.centroides.nbytes + self._ann.asignacion.nbytes)
+        columnar = 0
+        if self._columnar is not None:
+            columnar += self._columnar.fecha_ts.nbytes + self._columnar.estructura_len.nbytes
+            columnar += sum(arr.nbytes for arr in self._columnar.codigos.values())
+            for matriz in (self._columnar.tokens, self._columnar.estructura):
+                columnar += int(matriz.data.nbytes + matriz.indices.nbytes + matriz.indptr.nbytes)
+        if self._facets is not None:
+            columnar += sum(arr.nbytes for arr in self._facets.codigos.values())
+            columnar += int(self._facets.etiquetas.data.nbytes + self._facets.etiquetas.indices.nbytes + self._facets.etiquetas.indptr.nbytes)
+        componentes: dict[str, int] = {
+            "documentos": documentos,
+            **{f"store_{k}": v for k, v in self._store.memoria().items()},
+            "postings": postings,
+            "nombres_indice": sys.getsizeof(self._names._blob) + sys.getsizeof(self._names.nombres),
+            "tfidf": tfidf,
+            "columnar": columnar,
+            "autocompletado": self._autocompletado.memoria() if self._autocompletado is not None else 0,
+        }
+        return {
+            "documentos_indexados": len(self.index),
+            "total_bytes": sum(componentes.values()),
+            "componentes": componentes,
+        }
+
+    def get_cache_stats(self) -> dict[str, object]:
+        """Contadores del cache de resultados (hits, misses, evictions) y generación actual del índice."""
+        return {"generacion": self._generation, **self._result_cache.stats()}
+
+    def contar_facetas(self, filtros: dict[str, object] | None = None, campos: list[str] | None = None) -> dict[str, dict[str, int]]:
+        """Conteo de documentos por valor normalizado de cada faceta (tipo, extensión, carpeta, virtuales y etiquetas).
+
+        Con ``filtros`` los conteos se restringen a los documentos que los cumplen.
+        """
+        self._asegurar_indice()
+        facetas = self._ensure_facets()
+        mascara = None
+        if filtros:
+            mascara = np.zeros(len(self.index), dtype=bool)
+            mascara[self._filter_positions(filtros)] = True
+        return facetas.conteos(mascara, campos)
+
+    def sugerir(self, prefijo: str, limit: int = SUGERENCIAS_LIMITE) -> list[dict[str, object]]:
+        """Completa ``prefijo`` con nombres, proveedores, hospitales y etiquetas sin pasar por el ranking.
+
+        Cada sugerencia trae ``texto``, ``campo`` y ``frecuencia`` (documentos con ese valor); los
+        proveedores, hospitales y etiquetas también se completan desde cualquiera de sus palabras.
+        """
+        self._asegurar_indice()
+        autocompletado = self._autocompletado
+        if autocompletado is None:
+            autocompletado = self._ensure_autocompletado()
+        return autocompletado.sugerir(self._normalizar_texto(prefijo), limit)
 
     def get_last_performance_metrics(self) -> dict[str, object]:
         """Retorna métricas de performance de la última búsqueda perfilada."""
         return dict(self._last_performance_metrics)
 
-    def get_audit_log(self, limit: int = 200) -> list[dict[str, object]]:
-        """Devuelve eventos de auditoría recientes de indexación y búsquedas."""
+    def get_audit_log(self, limit: int = 200, sesion: bool = False) -> list[dict[str, object]]:
+        """Devuelve eventos de auditoría recientes de indexación y búsquedas.
+
+        Con ``sesion=True`` sólo retorna los eventos generados desde el hilo actual.
+        """
         if limit <= 0:
             return []
-        return self.audit_log[-limit:]
+        if sesion:
+            eventos = self._audit_sesion
+        else:
+            with self._audit_lock:
+                eventos = self.audit_log.copy()
+        return list(islice(reversed(eventos), limit))[::-1]
+
+    def historial_auditoria(self) -> Iterator[dict[str, object]]:
+        """Historial completo de eventos: el JSONL en disco si está configurado, si no los retenidos en memoria."""
+        if self._auditoria_jsonl is not None:
+            return self._auditoria_jsonl.leer()
+        return iter(self.get_audit_log(limit=AUDIT_LOG_MAX))
+
+    def estadisticas_busqueda(self) -> dict[str, dict[str, int]]:
+        """``construir_estadisticas_busqueda`` sobre todas las búsquedas del historial de auditoría."""
+        return construir_estadisticas_busqueda(historial_busquedas(self.historial_auditoria()))
 
 
 def benchmark_busquedas(
@@ -1165,32 +2897,40 @@ def benchmark_busquedas(
     filtros: dict[str, object] | None = None,
     repeticiones: int = 3,
     modo: str = FLEX_MODE,
+    usar_cache: bool = False,
 ) -> dict[str, object]:
-    """Ejecuta benchmark simple para auditoría de rendimiento de búsquedas."""
+    """Ejecuta benchmark simple para auditoría de rendimiento de búsquedas.
+
+    Por defecto omite el cache de resultados para medir el ranking; con ``usar_cache=True``
+    las repeticiones reflejan el efecto del cache y se reportan sus contadores.
+    """
     if repeticiones < 1:
         repeticiones = 1
     filtros_eval = filtros or {"tipo": "TODOS", "extension": "TODOS", "carpeta": "TODOS", "etiquetas": [], "fuzzy": True}
     tiempos_ms: list[float] = []
     total_resultados = 0
     for _ in range(repeticiones):
-        for q in consultas:
-            start = perf_counter()
-            out = engine.buscar_avanzado(
-                q,
-                filtros=filtros_eval,
-                usar_nombre=True,
-                usar_contenido=True,
-                usar_semantico=True,
-                modo=modo,
-            )
-            tiempos_ms.append((perf_counter() - start) * 1000.0)
-            total_resultados += len(out)
+        start = perf_counter()
+        lote = engine.buscar_lote(
+            consultas,
+            filtros=filtros_eval,
+            usar_nombre=True,
+            usar_contenido=True,
+            usar_semantico=True,
+            modo=modo,
+            usar_cache=usar_cache,
+        )
+        # El preprocesamiento compartido del lote se reparte entre sus consultas.
+        compartido_ms = (perf_counter() - start) * 1000.0 - sum(float(item["metricas"]["total_time_ms"]) for item in lote)
+        for item in lote:
+            tiempos_ms.append(float(item["metricas"]["total_time_ms"]) + compartido_ms / len(lote))
+            total_resultados += len(item["resultados"])
     if not tiempos_ms:
         return {"consultas": 0, "media_ms": 0.0, "p95_ms": 0.0, "resultados": 0}
 
     media = float(np.mean(tiempos_ms))
     p95 = float(np.percentile(tiempos_ms, 95))
-    return {
+    salida: dict[str, object] = {
         "consultas": len(consultas) * repeticiones,
         "media_ms": round(media, 4),
         "p95_ms": round(p95, 4),
@@ -1198,13 +2938,198 @@ def benchmark_busquedas(
         "min_ms": round(float(np.min(tiempos_ms)), 4),
         "resultados": total_resultados,
     }
+    if usar_cache:
+        salida["cache"] = engine.get_cache_stats()
+    return salida
+
+
+def benchmark_ann(
+    engine: SearchEngine,
+    consultas: list[str],
+    top_k: int = 10,
+    nprobes: tuple[int, ...] = (1, 2, 4, 8, 16, 32),
+) -> dict[str, object]:
+    """Recall@k y latencia de ``buscar_semantico`` con índice ANN frente al escaneo exacto.
+
+    El recall de cada consulta es la fracción de su top-k exacto (scores > 0) que recupera el ANN.
+    Si el motor no tiene índice ANN se entrena uno temporal sólo para la medición.
+    """
+    consultas = [q for q in consultas if q.strip()]
+    engine._asegurar_indice()
+    if engine._modelo_semantico()[0] is None or not consultas:
+        return {"consultas": 0, "top_k": top_k, "exacto": {}, "ann": []}
+    ann = engine._ann if engine._ann is not None else IndiceIVF.construir(engine._modelo_semantico()[1])
+
+    exactos: list[set[int]] = []
+    tiempos: list[float] = []
+    for query in consultas:
+        start = perf_counter()
+        sims = engine._semantic_scores(query)
+        exactos.append({i for i in engine._top_k_indices(sims, max(1, top_k)).tolist() if sims[i] > 0})
+        tiempos.append((perf_counter() - start) * 1000.0)
+
+    filas: list[dict[str, object]] = []
+    for nprobe in nprobes:
+        recalls: list[float] = []
+        tiempos_ann: list[float] = []
+        for query, exacto in zip(consultas, exactos):
+            start = perf_counter()
+            encontrados = {pos for pos, _ in engine._top_k_ann(ann, query, top_k, nprobe)}
+            tiempos_ann.append((perf_counter() - start) * 1000.0)
+            if exacto:
+                recalls.append(len(exacto & encontrados) / len(exacto))
+        filas.append(
+            {
+                "nprobe": int(nprobe),
+                "recall_at_k": round(float(np.mean(recalls)) if recalls else 1.0, 4),
+                "media_ms": round(float(np.mean(tiempos_ann)), 4),
+                "p95_ms": round(float(np.percentile(tiempos_ann, 95)), 4),
+            }
+        )
+    return {
+        "consultas": len(consultas),
+        "top_k": top_k,
+        "indice": ann.estadisticas(),
+        "exacto": {"media_ms": round(float(np.mean(tiempos)), 4), "p95_ms": round(float(np.percentile(tiempos, 95)), 4)},
+        "ann": filas,
+    }
 
 
-def construir_estadisticas_busqueda(search_logs: list[dict[str, object]]) -> dict[str, dict[str, int]]:
-    """Construye estadísticas agregadas para dashboard y auditoría."""
-    terminos = Counter(str(x.get("query", "")).strip().lower() for x in search_logs if str(x.get("query", "")).strip())
-    tipos = Counter(str(x.get("tipo_top", "")) for x in search_logs if str(x.get("tipo_top", "")))
-    carpetas = Counter(str(x.get("carpeta_top", "")) for x in search_logs if str(x.get("carpeta_top", "")))
+def _preparar_documento(raw: dict[str, object]) -> tuple[str, list[str]]:
+    """Trabajo pesado por documento (texto extraído y etiquetas); se ejecuta en procesos del pool."""
+    return SearchEngine._extraer_contenido(raw), SearchEngine._extraer_etiquetas(raw)
+
+
+def escribir_auditoria_json(path: str | Path, payload: dict[str, object]) -> Path:
+    """Escribe un payload de auditoría en JSON (motor local o respuesta del servidor de búsqueda)."""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        target.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    except Exception as error:
+        logger.error("Error exportando auditoría JSON a %s", target, exc_info=True)
+        raise RuntimeError(f"No se pudo exportar auditoría JSON: {error}") from error
+    return target
+
+
+def escribir_auditoria_csv(path: str | Path, resultados: list[dict[str, object]]) -> Path:
+    """Escribe el desglose ``score_*`` de resultados auditados en CSV."""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    columnas = [
+        "ruta",
+        "score_exacto",
+        "score_fuzzy",
+        "score_semantico",
+        "score_tokens",
+        "score_temporal",
+        "score_estructural",
+        "score_bm25f",
+        "score_boosting",
+        "score_final",
+    ]
+    to_float = SearchEngine._to_float
+    try:
+        with target.open("w", newline="", encoding="utf-8") as handler:
+            writer = csv.DictWriter(handler, fieldnames=columnas)
+            writer.writeheader()
+            for row in resultados:
+                writer.writerow(
+                    {
+                        "ruta": str(row.get("ruta", "")),
+                        "score_exacto": to_float(row.get("score_exacto", 0.0)),
+                        "score_fuzzy": to_float(row.get("score_fuzzy", 0.0)),
+                        "score_semantico": to_float(row.get("score_semantico", 0.0)),
+                        "score_tokens": to_float(row.get("score_tokens", 0.0)),
+                        "score_temporal": to_float(row.get("score_temporal", 0.0)),
+                        "score_estructural": to_float(row.get("score_estructural", 0.0)),
+                        "score_bm25f": to_float(row.get("score_bm25f", 0.0)),
+                        "score_boosting": to_float(row.get("score_boosting", 0.0)),
+                        "score_final": to_float(row.get("score_final", row.get("relevancia", 0.0))),
+                    }
+                )
+    except Exception as error:
+        logger.error("Error exportando auditoría CSV a %s", target, exc_info=True)
+        raise RuntimeError(f"No se pudo exportar auditoría CSV: {error}") from error
+    return target
+
+
+def escribir_performance_json(path: str | Path, metricas: dict[str, object]) -> Path:
+    """Escribe métricas de performance de una búsqueda perfilada en JSON."""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    payload = dict(metricas)
+    try:
+        target.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    except Exception as error:
+        logger.error("Error exportando performance JSON a %s", target, exc_info=True)
+        raise RuntimeError(f"No se pudo exportar performance JSON: {error}") from error
+    return target
+
+
+def escribir_performance_csv(path: str | Path, metricas: dict[str, object]) -> Path:
+    """Escribe los tiempos por componente de una búsqueda perfilada en formato tabular."""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    perf = dict(metricas)
+    components = perf.get("components", {}) if isinstance(perf.get("components", {}), dict) else {}
+    try:
+        with target.open("w", newline="", encoding="utf-8") as handler:
+            writer = csv.DictWriter(handler, fieldnames=["component", "time_ms"])
+            writer.writeheader()
+            for key, value in components.items():
+                writer.writerow({"component": key, "time_ms": SearchEngine._to_float(value)})
+    except Exception as error:
+        logger.error("Error exportando performance CSV a %s", target, exc_info=True)
+        raise RuntimeError(f"No se pudo exportar performance CSV: {error}") from error
+    return target
+
+
+def fingerprint_corpus(documentos: list[dict[str, object]]) -> str:
+    """Huella del corpus (independiente del orden) sobre todo lo que ``_build_document`` lee de cada registro.
+
+    Además del sha256, la ruta y las etiquetas incluye los metadatos reasignables sin tocar el
+    archivo (``*_virtual``, carpeta, categoría...) y un digest de ``contenido_extraido``.
+    """
+    entradas = []
+    for raw in documentos:
+        etiquetas = raw.get("etiquetas", [])
+        etiquetas_txt = ",".join(sorted(str(x) for x in etiquetas)) if isinstance(etiquetas, list) else ""
+        contenido = str(raw.get("contenido_extraido", "") or "")
+        campos = [
+            str(raw.get("sha256") or raw.get("hash") or ""),
+            str(raw.get("ruta_completa", "")),
+            etiquetas_txt,
+            *(str(raw.get(campo, "") or "") for campo in CAMPOS_HUELLA),
+            hashlib.sha256(contenido.encode("utf-8")).hexdigest(),
+        ]
+        entradas.append("|".join(campos))
+    entradas.sort()
+    digest = hashlib.sha256()
+    digest.update(SEARCH_ENGINE_VERSION.encode("utf-8"))
+    for entrada in entradas:
+        digest.update(entrada.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def construir_estadisticas_busqueda(search_logs: Iterable[dict[str, object]]) -> dict[str, dict[str, int]]:
+    """Construye estadísticas agregadas para dashboard y auditoría.
+
+    Acepta cualquier iterable (p. ej. ``historial_busquedas(leer_eventos_auditoria(ruta))``) y lo
+    recorre una sola vez.
+    """
+    terminos: Counter[str] = Counter()
+    tipos: Counter[str] = Counter()
+    carpetas: Counter[str] = Counter()
+    for x in search_logs:
+        query = str(x.get("query", "")).strip()
+        if query:
+            terminos[query.lower()] += 1
+        if str(x.get("tipo_top", "")):
+            tipos[str(x.get("tipo_top", ""))] += 1
+        if str(x.get("carpeta_top", "")):
+            carpetas[str(x.get("carpeta_top", ""))] += 1
     return {
         "terminos_mas_buscados": dict(terminos.most_common(10)),
         "tipos_mas_encontrados": dict(tipos.most_common(10)),
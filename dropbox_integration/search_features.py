@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+from collections import Counter
+from typing import Callable, Iterable
+
+import numpy as np
+from scipy import sparse
+
+CAMPOS_BOOST = ("proveedor", "hospital", "mes", "anio", "tipo")
+
+
+def _matriz_binaria(filas: list[Iterable[str]], vocab: dict[str, int]) -> sparse.csr_matrix:
+    indptr = [0]
+    indices: list[int] = []
+    for tokens in filas:
+        indices.extend(vocab[token] for token in tokens)
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.float32)
+    return sparse.csr_matrix((data, np.asarray(indices, dtype=np.int64), np.asarray(indptr, dtype=np.int64)), shape=(len(filas), max(1, len(vocab))))
+
+
+def _apilar(actual: sparse.csc_matrix, nuevas: sparse.csr_matrix) -> sparse.csc_matrix:
+    base = actual.tocsr()
+    base.resize((base.shape[0], nuevas.shape[1]))
+    return sparse.vstack([base, nuevas], format="csc")
+
+
+class ColumnarFeatures:
+    """Features por documento en arreglos NumPy alineados con la posición en el índice."""
+
+    def __init__(self) -> None:
+        self.fecha_ts = np.zeros(0, dtype=np.float64)
+        self.codigos: dict[str, np.ndarray] = {}
+        self.valores: dict[str, list[str]] = {}
+        self.indices: dict[str, dict[str, int]] = {}
+        self.valor_tokens: dict[str, list[set[str]]] = {}
+        self.frecuencias: dict[str, np.ndarray] = {}
+        self.vocab: dict[str, int] = {}
+        self.tokens: sparse.csc_matrix = sparse.csc_matrix((0, 1), dtype=np.float32)
+        self.estructura: sparse.csc_matrix = sparse.csc_matrix((0, 1), dtype=np.float32)
+        self.estructura_len = np.zeros(0, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return int(self.fecha_ts.size)
+
+    @classmethod
+    def construir(
+        cls,
+        valores_campos: list[dict[str, str]],
+        tokens: list[set[str]],
+        estructura: list[set[str]],
+        fechas: list[float | None],
+        frecuencias: dict[str, Counter[str]],
+        tokenizar: Callable[[str], list[str]],
+    ) -> "ColumnarFeatures":
+        """Construye las columnas a partir de los caches por documento del motor."""
+        features = cls()
+        for campo in CAMPOS_BOOST:
+            features.codigos[campo] = np.zeros(0, dtype=np.int32)
+            features.valores[campo] = []
+            features.indices[campo] = {}
+            features.valor_tokens[campo] = []
+        features.agregar(valores_campos, tokens, estructura, fechas, frecuencias, tokenizar)
+        return features
+
+    def agregar(
+        self,
+        valores_campos: list[dict[str, str]],
+        tokens: list[set[str]],
+        estructura: list[set[str]],
+        fechas: list[float | None],
+        frecuencias: dict[str, Counter[str]],
+        tokenizar: Callable[[str], list[str]],
+    ) -> None:
+        """Agrega filas al final, ampliando códigos categóricos y vocabulario compartido."""
+        nuevas_fechas = np.array([f if f is not None else np.nan for f in fechas], dtype=np.float64)
+        self.fecha_ts = np.concatenate([self.fecha_ts, nuevas_fechas])
+        for campo in CAMPOS_BOOST:
+            mapa = self.indices[campo]
+            codigos = np.full(len(valores_campos), -1, dtype=np.int32)
+            for pos, valores in enumerate(valores_campos):
+                valor = valores.get(campo, "")
+                if not valor:
+                    continue
+                if valor not in mapa:
+                    mapa[valor] = len(mapa)
+                    self.valores[campo].append(valor)
+                    self.valor_tokens[campo].append(set(tokenizar(valor)))
+                codigos[pos] = mapa[valor]
+            self.codigos[campo] = np.concatenate([self.codigos[campo], codigos])
+        for filas in (tokens, estructura):
+            for fila in filas:
+                for token in fila:
+                    self.vocab.setdefault(token, len(self.vocab))
+        self.tokens = _apilar(self.tokens, _matriz_binaria(tokens, self.vocab))
+        self.estructura = _apilar(self.estructura, _matriz_binaria(estructura, self.vocab))
+        self.estructura_len = np.concatenate([self.estructura_len, np.array([float(len(s)) for s in estructura], dtype=np.float64)])
+        self.actualizar_frecuencias(frecuencias)
+
+    def eliminar(self, posiciones: Iterable[int]) -> None:
+        """Elimina filas por posición; los códigos y el vocabulario se conservan."""
+        keep = np.ones(len(self), dtype=bool)
+        keep[list(posiciones)] = False
+        self.fecha_ts = self.fecha_ts[keep]
+        for campo in CAMPOS_BOOST:
+            self.codigos[campo] = self.codigos[campo][keep]
+        self.tokens = self.tokens.tocsr()[keep].tocsc()
+        self.estructura = self.estructura.tocsr()[keep].tocsc()
+        self.estructura_len = self.estructura_len[keep]
+
+    def actualizar_frecuencias(self, frecuencias: dict[str, Counter[str]]) -> None:
+        for campo in CAMPOS_BOOST:
+            self.frecuencias[campo] = np.array([float(frecuencias[campo].get(valor, 0)) for valor in self.valores[campo]], dtype=np.float64)
+
+    def codigo(self, campo: str, valor: str) -> int:
+        return self.indices.get(campo, {}).get(valor, -1)
+
+    def recencia(self, posiciones: np.ndarray, now_ts: float) -> np.ndarray:
+        """Recencia exp(-días/180) con 0 para documentos sin fecha."""
+        ts = self.fecha_ts[posiciones]
+        dias = np.maximum(0.0, (now_ts - ts) / 86400.0)
+        salida = np.exp(-dias / 180.0)
+        return np.where(np.isnan(ts), 0.0, salida)
+
+    def _pesos_consulta(self, tokens: Iterable[str]) -> tuple[np.ndarray, np.ndarray]:
+        conteo = Counter(tok for tok in tokens if tok in self.vocab)
+        ids = np.array([self.vocab[tok] for tok in conteo], dtype=np.int64)
+        pesos = np.array([float(v) for v in conteo.values()], dtype=np.float32)
+        return ids, pesos
+
+    def coincidencias_tokens(self, posiciones: np.ndarray, query_tokens: list[str]) -> np.ndarray:
+        """Cuenta tokens de la consulta (con repeticiones) presentes en cada documento."""
+        ids, pesos = self._pesos_consulta(query_tokens)
+        if ids.size == 0:
+            return np.zeros(posiciones.size, dtype=np.float64)
+        conteo = np.asarray(self.tokens[:, ids] @ pesos, dtype=np.float64).ravel()
+        return conteo[posiciones]
+
+    def jaccard_estructural(self, posiciones: np.ndarray, query_struct: set[str]) -> np.ndarray:
+        """Jaccard entre tokens estructurales del documento y de la consulta."""
+        if not query_struct:
+            return np.zeros(posiciones.size, dtype=np.float64)
+        ids, pesos = self._pesos_consulta(query_struct)
+        if ids.size:
+            inter = np.asarray(self.estructura[:, ids] @ pesos, dtype=np.float64).ravel()[posiciones]
+        else:
+            inter = np.zeros(posiciones.size, dtype=np.float64)
+        doc_len = self.estructura_len[posiciones]
+        union = doc_len + float(len(query_struct)) - inter
+        with np.errstate(divide="ignore", invalid="ignore"):
+            salida = np.where((doc_len > 0) & (union > 0), inter / union, 0.0)
+        return salida
+
+    def coincide_valor_tokens(self, campo: str, query_tokens: list[str]) -> np.ndarray:
+        """Por código de campo: True si los tokens del valor intersectan la consulta.
+
+        Incluye una posición final en False para que el código -1 (sin valor) indexe sin máscara.
+        """
+        query = set(query_tokens)
+        return np.array([bool(tokens & query) for tokens in self.valor_tokens[campo]] + [False], dtype=bool)
+
+    def valores_en(self, campo: str, candidatos: Iterable[str]) -> np.ndarray:
+        """Por código de campo: True si el valor normalizado está en ``candidatos`` (código -1 → False)."""
+        buscados = set(candidatos)
+        return np.array([valor in buscados for valor in self.valores[campo]] + [False], dtype=bool)
+
+
+CAMPOS_FACETA = ("tipo", "extension", "carpeta", "proveedor", "hospital", "mes", "anio", "carpeta_virtual")
+FACETA_ETIQUETAS = "etiquetas"
+
+
+class FacetIndex:
+    """Índices de facetas: un código categórico por documento y campo, más una matriz documento × etiqueta.
+
+    Cada valor distinto funciona como bitmap (``codigos == codigo``) y los filtros se combinan con AND.
+    """
+
+    def __init__(self) -> None:
+        self.codigos: dict[str, np.ndarray] = {campo: np.zeros(0, dtype=np.int32) for campo in CAMPOS_FACETA}
+        self.indices: dict[str, dict[str, int]] = {campo: {} for campo in CAMPOS_FACETA}
+        self.valores: dict[str, list[str]] = {campo: [] for campo in CAMPOS_FACETA}
+        self.etiquetas_vocab: dict[str, int] = {}
+        self.etiquetas: sparse.csc_matrix = sparse.csc_matrix((0, 1), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return int(self.codigos[CAMPOS_FACETA[0]].size)
+
+    @classmethod
+    def construir(cls, valores_campos: list[dict[str, str]], etiquetas: list[set[str]]) -> "FacetIndex":
+        facetas = cls()
+        facetas.agregar(valores_campos, etiquetas)
+        return facetas
+
+    def agregar(self, valores_campos: list[dict[str, str]], etiquetas: list[set[str]]) -> None:
+        """Agrega filas al final con valores ya normalizados."""
+        for campo in CAMPOS_FACETA:
+            mapa = self.indices[campo]
+            codigos = np.empty(len(valores_campos), dtype=np.int32)
+            for pos, valores in enumerate(valores_campos):
+                valor = valores.get(campo, "")
+                if valor not in mapa:
+                    mapa[valor] = len(mapa)
+                    self.valores[campo].append(valor)
+                codigos[pos] = mapa[valor]
+            self.codigos[campo] = np.concatenate([self.codigos[campo], codigos])
+        for fila in etiquetas:
+            for tag in fila:
+                self.etiquetas_vocab.setdefault(tag, len(self.etiquetas_vocab))
+        self.etiquetas = _apilar(self.etiquetas, _matriz_binaria(etiquetas, self.etiquetas_vocab))
+
+    def eliminar(self, posiciones: Iterable[int]) -> None:
+        keep = np.ones(len(self), dtype=bool)
+        keep[list(posiciones)] = False
+        for campo in CAMPOS_FACETA:
+            self.codigos[campo] = self.codigos[campo][keep]
+        self.etiquetas = self.etiquetas.tocsr()[keep].tocsc()
+
+    def mascara(self, campo: str, valor: str) -> np.ndarray:
+        """Bitmap de documentos cuyo valor normalizado en ``campo`` es ``valor``."""
+        codigo = self.indices[campo].get(valor, -1)
+        if codigo < 0:
+            return np.zeros(len(self), dtype=bool)
+        return self.codigos[campo] == codigo
+
+    def mascara_etiqueta(self, tag: str) -> np.ndarray:
+        salida = np.zeros(len(self), dtype=bool)
+        columna = self.etiquetas_vocab.get(tag)
+        if columna is not None:
+            salida[self.etiquetas.indices[self.etiquetas.indptr[columna] : self.etiquetas.indptr[columna + 1]]] = True
+        return salida
+
+    def filtrar(self, condiciones: dict[str, str], etiquetas: Iterable[str] = ()) -> np.ndarray:
+        """AND de los bitmaps de cada condición campo → valor y de cada etiqueta requerida."""
+        salida = np.ones(len(self), dtype=bool)
+        for campo, valor in condiciones.items():
+            salida &= self.mascara(campo, valor)
+        for tag in etiquetas:
+            salida &= self.mascara_etiqueta(tag)
+        return salida
+
+    def conteos(self, mascara: np.ndarray | None = None, campos: Iterable[str] | None = None) -> dict[str, dict[str, int]]:
+        """Conteo de documentos por valor de cada faceta, restringido opcionalmente a ``mascara``."""
+        salida: dict[str, dict[str, int]] = {}
+        for campo in campos or (*CAMPOS_FACETA, FACETA_ETIQUETAS):
+            if campo == FACETA_ETIQUETAS:
+                matriz = self.etiquetas if mascara is None else self.etiquetas.tocsr()[mascara]
+                totales = np.asarray(matriz.sum(axis=0)).ravel()
+                nombres = list(self.etiquetas_vocab)
+            else:
+                codigos = self.codigos[campo] if mascara is None else self.codigos[campo][mascara]
+                totales = np.bincount(codigos, minlength=len(self.valores[campo]))
+                nombres = self.valores[campo]
+            salida[campo] = {nombre: int(totales[i]) for i, nombre in enumerate(nombres) if nombre and totales[i] > 0}
+        return salida
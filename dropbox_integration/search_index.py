@@ -0,0 +1,372 @@
+from __future__ import annotations
+
+import heapq
+import re
+import sys
+import threading
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict, defaultdict
+from typing import Iterable
+
+import numpy as np
+
+TOKEN_REGEX = re.compile(r"\w+", re.UNICODE)
+CAMPOS_INDICE = ("nombre", "etiquetas", "contenido", "estructura")
+NAME_SEPARATOR = "\n"
+TRIGRAM_SIZE = 3
+SUGERENCIAS_LIMITE = 10
+SEPARADOR_PALABRAS = re.compile(r"[\s_\-./]+")
+EXPANSIONES_MAX = 4096
+
+
+def trigramas(texto: str) -> set[str]:
+    return {texto[i : i + TRIGRAM_SIZE] for i in range(len(texto) - TRIGRAM_SIZE + 1)}
+
+
+def tokenizar_terminos(texto: str) -> list[str]:
+    """Tokeniza texto para postings, agregando las partes de tokens unidos por guion bajo."""
+    tokens: list[str] = []
+    for match in TOKEN_REGEX.finditer(texto or ""):
+        token = match.group(0).lower()
+        tokens.append(token)
+        if "_" in token:
+            tokens.extend(part for part in token.split("_") if part)
+    return tokens
+
+
+class IndiceSubcadenas:
+    """Vocabulario de términos con índice de trigramas para hallar los términos que contienen un token.
+
+    ``expandir`` retorna ``(termino, termino.count(token))`` de los términos candidatos: con tokens de
+    tres o más caracteres se intersectan los trigramas (como ``NameIndex``); los más cortos recorren
+    el vocabulario. Las expansiones se memorizan en un LRU que se invalida cuando cambia el vocabulario.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.clear()
+
+    def __getstate__(self) -> dict[str, object]:
+        estado = dict(self.__dict__)
+        estado.pop("_lock", None)
+        # Los lectores escriben el memo mientras se copia el índice: la copia arranca sin él.
+        estado["_memo"] = OrderedDict()
+        return estado
+
+    def __setstate__(self, estado: dict[str, object]) -> None:
+        self.__dict__.update(estado)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.terminos)
+
+    def clear(self) -> None:
+        self.terminos: set[str] = set()
+        self._trigramas: dict[str, set[str]] = {}
+        self._memo: OrderedDict[str, tuple[int, list[tuple[str, int]]]] = OrderedDict()
+        self.version = getattr(self, "version", 0) + 1
+
+    def agregar(self, termino: str) -> None:
+        if termino in self.terminos:
+            return
+        self.terminos.add(termino)
+        for trigrama in trigramas(termino):
+            self._trigramas.setdefault(trigrama, set()).add(termino)
+        self.version += 1
+
+    def eliminar(self, termino: str) -> None:
+        if termino not in self.terminos:
+            return
+        self.terminos.discard(termino)
+        for trigrama in trigramas(termino):
+            terminos = self._trigramas.get(trigrama)
+            if terminos is not None:
+                terminos.discard(termino)
+                if not terminos:
+                    del self._trigramas[trigrama]
+        self.version += 1
+
+    def _candidatos(self, token: str) -> Iterable[str]:
+        grupos = [self._trigramas.get(trigrama) for trigrama in trigramas(token)]
+        if not grupos:
+            return self.terminos
+        if any(grupo is None for grupo in grupos):
+            return ()
+        grupos.sort(key=len)
+        return set(grupos[0]).intersection(*grupos[1:]) if len(grupos) > 1 else grupos[0]
+
+    def expandir(self, token: str) -> list[tuple[str, int]]:
+        """Términos que contienen ``token`` con su ``termino.count(token)``."""
+        with self._lock:
+            memo = self._memo.get(token)
+            if memo is not None and memo[0] == self.version:
+                self._memo.move_to_end(token)
+                return memo[1]
+            version = self.version
+        expansion = [(termino, termino.count(token)) for termino in self._candidatos(token) if token in termino]
+        with self._lock:
+            self._memo[token] = (version, expansion)
+            self._memo.move_to_end(token)
+            while len(self._memo) > EXPANSIONES_MAX:
+                self._memo.popitem(last=False)
+        return expansion
+
+    def memoria(self) -> int:
+        return (
+            sys.getsizeof(self.terminos)
+            + sys.getsizeof(self._trigramas)
+            + sum(sys.getsizeof(terminos) for terminos in self._trigramas.values())
+        )
+
+
+class InvertedIndex:
+    """Índice invertido token → postings con frecuencia por campo y longitud de documento."""
+
+    def __init__(self) -> None:
+        self.postings: dict[str, dict[str, dict[int, int]]] = {campo: {} for campo in CAMPOS_INDICE}
+        self.doc_len: dict[str, dict[int, int]] = {campo: {} for campo in CAMPOS_INDICE}
+        self.total_len: dict[str, int] = {campo: 0 for campo in CAMPOS_INDICE}
+        # Términos de contenido buscables por subcadena (conteos de contenido sin recorrer el texto).
+        self.subcadenas = IndiceSubcadenas()
+        # Cambia con cada mutación: invalida vistas derivadas (p. ej. arreglos de BM25F).
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_len["nombre"])
+
+    def clear(self) -> None:
+        for campo in CAMPOS_INDICE:
+            self.postings[campo].clear()
+            self.doc_len[campo].clear()
+            self.total_len[campo] = 0
+        self.subcadenas.clear()
+        self.version += 1
+
+    def agregar(self, doc_key: int, campos: dict[str, list[str]]) -> None:
+        """Registra los términos de un documento en los postings de cada campo."""
+        for campo in CAMPOS_INDICE:
+            tokens = campos.get(campo, [])
+            postings = self.postings[campo]
+            for token, tf in Counter(tokens).items():
+                docs = postings.get(token)
+                if docs is None:
+                    docs = postings[token] = {}
+                    if campo == "contenido":
+                        self.subcadenas.agregar(token)
+                docs[doc_key] = tf
+            self.doc_len[campo][doc_key] = len(tokens)
+            self.total_len[campo] += len(tokens)
+        self.version += 1
+
+    def eliminar(self, doc_key: int, campos: dict[str, list[str]]) -> None:
+        """Retira un documento de los postings usando los mismos términos con que fue agregado."""
+        for campo in CAMPOS_INDICE:
+            postings = self.postings[campo]
+            for token in set(campos.get(campo, [])):
+                docs = postings.get(token)
+                if docs is None:
+                    continue
+                docs.pop(doc_key, None)
+                if not docs:
+                    del postings[token]
+                    if campo == "contenido":
+                        self.subcadenas.eliminar(token)
+            self.total_len[campo] -= self.doc_len[campo].pop(doc_key, 0)
+        self.version += 1
+
+    def frecuencias(self, token: str, campo: str) -> dict[int, int]:
+        return self.postings.get(campo, {}).get(token, {})
+
+    def documentos_con(self, tokens: Iterable[str], campos: Iterable[str] = CAMPOS_INDICE) -> set[int]:
+        """Une los postings de los tokens indicados en los campos solicitados."""
+        salida: set[int] = set()
+        campos = tuple(campos)
+        for token in set(tokens):
+            for campo in campos:
+                docs = self.postings[campo].get(token)
+                if docs:
+                    salida.update(docs.keys())
+        return salida
+
+    def document_frequency(self, token: str, campos: Iterable[str] = CAMPOS_INDICE) -> int:
+        return len(self.documentos_con([token], campos))
+
+    def longitud_media(self, campo: str) -> float:
+        total_docs = len(self.doc_len[campo])
+        if total_docs == 0:
+            return 0.0
+        return self.total_len[campo] / total_docs
+
+
+class NameIndex:
+    """Nombres normalizados concatenados para búsqueda de subcadenas sin recorrer documento por documento.
+
+    Mantiene además un índice de trigramas de caracteres → posiciones para prefiltrar el matching difuso.
+    """
+
+    def __init__(self) -> None:
+        self.keys: list[int] = []
+        self.nombres: list[str] = []
+        self._blob = ""
+        self._offsets: list[int] = []
+        self._trigramas: dict[str, list[int]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def reconstruir(self, keys: list[int], nombres: list[str]) -> None:
+        self.keys = list(keys)
+        self.nombres = [nombre.replace(NAME_SEPARATOR, " ") for nombre in nombres]
+        self._offsets = []
+        pos = 0
+        for nombre in self.nombres:
+            self._offsets.append(pos)
+            pos += len(nombre) + len(NAME_SEPARATOR)
+        self._blob = NAME_SEPARATOR.join(self.nombres)
+        self._trigramas = defaultdict(list)
+        self._indexar_trigramas(0)
+
+    def _indexar_trigramas(self, desde: int) -> None:
+        for pos in range(desde, len(self.nombres)):
+            for trigrama in trigramas(self.nombres[pos]):
+                self._trigramas[trigrama].append(pos)
+
+    def agregar(self, keys: list[int], nombres: list[str]) -> None:
+        """Anexa nombres al final sin reconstruir el bloque completo de offsets."""
+        if not keys:
+            return
+        nuevos = [nombre.replace(NAME_SEPARATOR, " ") for nombre in nombres]
+        pos = len(self._blob) + len(NAME_SEPARATOR) if self.nombres else 0
+        for nombre in nuevos:
+            self._offsets.append(pos)
+            pos += len(nombre) + len(NAME_SEPARATOR)
+        bloque = NAME_SEPARATOR.join(nuevos)
+        self._blob = f"{self._blob}{NAME_SEPARATOR}{bloque}" if self.nombres else bloque
+        desde = len(self.nombres)
+        self.keys.extend(keys)
+        self.nombres.extend(nuevos)
+        self._indexar_trigramas(desde)
+
+    def prefiltrar(self, query: str, minimo: int = 1) -> list[int]:
+        """Posiciones de nombres que comparten al menos ``minimo`` trigramas con la consulta.
+
+        Consultas más cortas que un trigrama no permiten prefiltrar y retornan todas las posiciones.
+        """
+        consulta = trigramas(query)
+        if not consulta:
+            return list(range(len(self.nombres)))
+        conteo: Counter[int] = Counter()
+        for trigrama in consulta:
+            conteo.update(self._trigramas.get(trigrama, ()))
+        return sorted(pos for pos, comunes in conteo.items() if comunes >= minimo)
+
+    def buscar_subcadena(self, query: str) -> set[int]:
+        """Retorna las llaves de documentos cuyo nombre contiene la subcadena completa."""
+        if not query or NAME_SEPARATOR in query or not self._blob:
+            return set()
+        salida: set[int] = set()
+        start = self._blob.find(query)
+        while start != -1:
+            pos = bisect_right(self._offsets, start) - 1
+            salida.add(self.keys[pos])
+            # Saltar al siguiente nombre: una coincidencia por documento basta.
+            next_start = self._offsets[pos + 1] if pos + 1 < len(self._offsets) else len(self._blob)
+            start = self._blob.find(query, next_start)
+        return salida
+
+
+class IndiceAutocompletado:
+    """Completado por prefijo sobre un arreglo ordenado de claves normalizadas.
+
+    Las claves que empiezan con un prefijo forman un rango contiguo que se ubica con ``bisect``; una
+    sparse table de máximos por frecuencia entrega las ``limit`` sugerencias más frecuentes del rango
+    sin recorrerlo, así el costo no depende de cuántas claves comparten el prefijo.
+    """
+
+    def __init__(self) -> None:
+        self.claves: list[str] = []
+        self.sugerencias: list[tuple[str, str, int]] = []
+        self._destino = np.zeros(0, dtype=np.int32)
+        self._pesos = np.zeros(0, dtype=np.int64)
+        self._tabla: list[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return len(self.sugerencias)
+
+    @classmethod
+    def construir(cls, valores: Iterable[tuple[str, str, str, int]], palabras: Iterable[str] = ()) -> "IndiceAutocompletado":
+        """Indexa tuplas ``(clave normalizada, texto, campo, frecuencia)``.
+
+        Los valores de los campos en ``palabras`` se indexan además desde el inicio de cada palabra
+        ("gamma" completa "distribuidora gamma"); los nombres de archivo sólo por su inicio para no
+        multiplicar las entradas por documento.
+        """
+        palabras = set(palabras)
+        indice = cls()
+        entradas: list[tuple[str, int]] = []
+        for clave, texto, campo, frecuencia in valores:
+            if not clave or frecuencia <= 0:
+                continue
+            destino = len(indice.sugerencias)
+            indice.sugerencias.append((texto, campo, int(frecuencia)))
+            entradas.append((clave, destino))
+            if campo in palabras:
+                entradas.extend((clave[m.end() :], destino) for m in SEPARADOR_PALABRAS.finditer(clave) if m.end() < len(clave))
+        entradas.sort()
+        indice.claves = [clave for clave, _ in entradas]
+        indice._destino = np.fromiter((destino for _, destino in entradas), dtype=np.int32, count=len(entradas))
+        frecuencias = np.fromiter((s[2] for s in indice.sugerencias), dtype=np.int64, count=len(indice.sugerencias))
+        indice._pesos = frecuencias[indice._destino]
+        indice._construir_tabla()
+        return indice
+
+    def _construir_tabla(self) -> None:
+        # Nivel j: posición del máximo en [i, i + 2**j); ante empate gana la clave menor (orden alfabético).
+        n = len(self.claves)
+        if n == 0:
+            self._tabla = []
+            return
+        self._tabla = [np.arange(n, dtype=np.int32)]
+        ancho = 1
+        while 2 * ancho <= n:
+            previo = self._tabla[-1]
+            izquierda = previo[: n - 2 * ancho + 1]
+            derecha = previo[ancho : n - ancho + 1]
+            self._tabla.append(np.where(self._pesos[derecha] > self._pesos[izquierda], derecha, izquierda))
+            ancho *= 2
+
+    def _maximo(self, inicio: int, fin: int) -> int:
+        """Posición de mayor frecuencia en ``[inicio, fin]`` en O(1)."""
+        nivel = (fin - inicio + 1).bit_length() - 1
+        tabla = self._tabla[nivel]
+        a = int(tabla[inicio])
+        b = int(tabla[fin - (1 << nivel) + 1])
+        return b if self._pesos[b] > self._pesos[a] else a
+
+    def sugerir(self, prefijo: str, limit: int = SUGERENCIAS_LIMITE) -> list[dict[str, object]]:
+        """Sugerencias cuyo valor (o una de sus palabras) empieza con ``prefijo``, de mayor a menor frecuencia."""
+        if not prefijo or limit <= 0 or not self.claves:
+            return []
+        inicio = bisect_left(self.claves, prefijo)
+        fin = bisect_left(self.claves, prefijo + "\U0010ffff") - 1
+        if inicio > fin:
+            return []
+        pos = self._maximo(inicio, fin)
+        pendientes = [(-int(self._pesos[pos]), pos, inicio, fin)]
+        vistos: set[int] = set()
+        salida: list[dict[str, object]] = []
+        while pendientes and len(salida) < limit:
+            _, pos, inicio, fin = heapq.heappop(pendientes)
+            destino = int(self._destino[pos])
+            if destino not in vistos:
+                vistos.add(destino)
+                texto, campo, frecuencia = self.sugerencias[destino]
+                salida.append({"texto": texto, "campo": campo, "frecuencia": frecuencia})
+            for a, b in ((inicio, pos - 1), (pos + 1, fin)):
+                if a <= b:
+                    hijo = self._maximo(a, b)
+                    heapq.heappush(pendientes, (-int(self._pesos[hijo]), hijo, a, b))
+        return salida
+
+    def memoria(self) -> int:
+        return int(sum(t.nbytes for t in self._tabla) + self._destino.nbytes + self._pesos.nbytes + sum(len(c) for c in self.claves))
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from time import monotonic
+from typing import Callable
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Buckets log-lineales estilo HDR sobre microsegundos: 2**SUB_BITS sub-buckets por octava (error relativo < 1/32).
+HISTOGRAMA_SUB_BITS = 5
+HISTOGRAMA_MAX_US = 1 << 27
+HISTOGRAMA_VENTANA_SEGUNDOS = 60.0
+HISTOGRAMA_VENTANAS = 10
+PERCENTILES = (0.50, 0.95, 0.99)
+CLASE_TODAS = "todas"
+PROMETHEUS_METRICA = "dropbox_search_stage_latency_ms"
+
+_SUB = 1 << HISTOGRAMA_SUB_BITS
+_BUCKETS = (HISTOGRAMA_MAX_US.bit_length() - HISTOGRAMA_SUB_BITS) * _SUB
+
+
+def _bucket(valor_us: int) -> int:
+    if valor_us < _SUB:
+        return max(0, valor_us)
+    valor_us = min(valor_us, HISTOGRAMA_MAX_US - 1)
+    exponente = valor_us.bit_length() - HISTOGRAMA_SUB_BITS - 1
+    return (exponente + 1) * _SUB + (valor_us >> exponente) - _SUB
+
+
+def _limites_bucket(indice: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Límite inferior y ancho (µs) de cada bucket."""
+    exponente = np.maximum(indice // _SUB - 1, 0)
+    lineal = indice < _SUB
+    inferior = np.where(lineal, indice, (_SUB + indice % _SUB) << exponente)
+    return inferior.astype(np.float64), np.where(lineal, 1, 1 << exponente).astype(np.float64)
+
+
+class HistogramaRodante:
+    """Histograma de latencias con buckets fijos en ``HISTOGRAMA_VENTANAS`` ventanas de tiempo rotativas.
+
+    Registrar es O(1) (un índice de bucket y un incremento); los percentiles se calculan sólo al
+    consultar, sumando las ventanas vigentes. Los conteos de ventanas expiradas se descartan al rotar;
+    ``total`` y ``suma_total_ms`` son acumulados desde la creación (contadores monótonos).
+    """
+
+    def __init__(
+        self,
+        ventana_segundos: float = HISTOGRAMA_VENTANA_SEGUNDOS,
+        ventanas: int = HISTOGRAMA_VENTANAS,
+        reloj: Callable[[], float] = monotonic,
+    ) -> None:
+        self.ventana_segundos = float(ventana_segundos)
+        self._reloj = reloj
+        self._conteos = np.zeros((max(1, int(ventanas)), _BUCKETS), dtype=np.int64)
+        self._sumas = np.zeros(max(1, int(ventanas)), dtype=np.float64)
+        self._ids = np.full(max(1, int(ventanas)), -1, dtype=np.int64)
+        self.total = 0
+        self.suma_total_ms = 0.0
+
+    def _ventana_actual(self) -> int:
+        return int(self._reloj() // self.ventana_segundos) if self.ventana_segundos > 0 else 0
+
+    def registrar(self, valor_ms: float) -> None:
+        ventana = self._ventana_actual()
+        slot = ventana % self._ids.size
+        if self._ids[slot] != ventana:
+            self._conteos[slot] = 0
+            self._sumas[slot] = 0.0
+            self._ids[slot] = ventana
+        self._conteos[slot, _bucket(int(valor_ms * 1000.0))] += 1
+        self._sumas[slot] += valor_ms
+        self.total += 1
+        self.suma_total_ms += valor_ms
+
+    def _vigentes(self) -> np.ndarray:
+        return self._ids > self._ventana_actual() - self._ids.size
+
+    def resumen(self) -> dict[str, float]:
+        """Conteo, media, p50/p95/p99 y máximo (ms) de las ventanas vigentes, más los acumulados."""
+        conteos, suma = self.conteos()
+        return {**resumir_conteos(conteos, suma), **self.acumulados()}
+
+    def acumulados(self) -> dict[str, float]:
+        return {"count_total": self.total, "suma_total_ms": round(self.suma_total_ms, 4)}
+
+    def conteos(self) -> tuple[np.ndarray, float]:
+        vigentes = self._vigentes()
+        return self._conteos[vigentes].sum(axis=0), float(self._sumas[vigentes].sum())
+
+
+def resumir_conteos(conteos: np.ndarray, suma_ms: float) -> dict[str, float]:
+    total = int(conteos.sum())
+    if total == 0:
+        return {"count": 0, "media_ms": 0.0, **{f"p{int(q * 100)}_ms": 0.0 for q in PERCENTILES}, "max_ms": 0.0}
+    acumulado = np.cumsum(conteos)
+    inferior, ancho = _limites_bucket(np.arange(conteos.size))
+    # Valor representativo del bucket: punto medio (error acotado por la resolución del histograma).
+    medio_ms = (inferior + ancho / 2.0) / 1000.0
+    salida: dict[str, float] = {"count": total, "media_ms": round(suma_ms / total, 4)}
+    for q in PERCENTILES:
+        rango = max(1, int(np.ceil(q * total)))
+        salida[f"p{int(q * 100)}_ms"] = round(float(medio_ms[int(np.searchsorted(acumulado, rango))]), 4)
+    salida["max_ms"] = round(float(medio_ms[int(np.flatnonzero(conteos)[-1])]), 4)
+    return salida
+
+
+class MetricasBusqueda:
+    """Latencias agregadas por etapa y clase de consulta, siempre activas y seguras entre hilos.
+
+    A diferencia de ``profiling=True`` (tiempos por documento de la última búsqueda), aquí cada
+    consulta registra sólo un valor por etapa, y los percentiles cubren todas las consultas de las
+    ventanas vigentes.
+    """
+
+    def __init__(self, ventana_segundos: float = HISTOGRAMA_VENTANA_SEGUNDOS, ventanas: int = HISTOGRAMA_VENTANAS) -> None:
+        self.ventana_segundos = float(ventana_segundos)
+        self.ventanas = int(ventanas)
+        self._lock = threading.Lock()
+        self._histogramas: dict[tuple[str, str], HistogramaRodante] = {}
+
+    def __getstate__(self) -> dict[str, object]:
+        estado = dict(self.__dict__)
+        estado.pop("_lock", None)
+        return estado
+
+    def __setstate__(self, estado: dict[str, object]) -> None:
+        self.__dict__.update(estado)
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo: dict[int, object]) -> "MetricasBusqueda":
+        # El agregado es del proceso: las copias RCU del motor siguen registrando en el mismo.
+        return self
+
+    def registrar(self, clase: str, etapas: dict[str, float]) -> None:
+        with self._lock:
+            for etapa, valor_ms in etapas.items():
+                histograma = self._histogramas.get((clase, etapa))
+                if histograma is None:
+                    histograma = HistogramaRodante(self.ventana_segundos, self.ventanas)
+                    self._histogramas[(clase, etapa)] = histograma
+                histograma.registrar(valor_ms)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._histogramas.clear()
+
+    def resumen(self) -> dict[str, dict[str, dict[str, float]]]:
+        """``{clase: {etapa: resumen}}`` más la clase agregada ``todas`` (los conteos HDR se suman)."""
+        salida: dict[str, dict[str, dict[str, float]]] = {}
+        todas: dict[str, tuple[np.ndarray, float, int, float]] = {}
+        with self._lock:
+            for (clase, etapa), histograma in sorted(self._histogramas.items()):
+                conteos, suma = histograma.conteos()
+                salida.setdefault(clase, {})[etapa] = {**resumir_conteos(conteos, suma), **histograma.acumulados()}
+                previo = todas.get(etapa)
+                acumulado = (conteos, suma, histograma.total, histograma.suma_total_ms)
+                todas[etapa] = acumulado if previo is None else tuple(a + b for a, b in zip(previo, acumulado))
+        if todas:
+            salida[CLASE_TODAS] = {
+                etapa: {**resumir_conteos(conteos, suma), "count_total": total, "suma_total_ms": round(suma_total, 4)}
+                for etapa, (conteos, suma, total, suma_total) in sorted(todas.items())
+            }
+        return salida
+
+    def payload(self, version_motor: str = "") -> dict[str, object]:
+        return {
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "version_motor": version_motor,
+            "ventana_segundos": self.ventana_segundos * self.ventanas,
+            "clases": self.resumen(),
+        }
+
+
+def formato_prometheus(payload: dict[str, object]) -> str:
+    """Texto de exposición Prometheus (tipo ``summary``) con cuantiles por etapa y clase.
+
+    Los cuantiles cubren las ventanas vigentes; ``_sum``/``_count`` son los acumulados del proceso,
+    como exige el tipo. La clase sintética ``todas`` no se exporta: se obtiene con ``sum by (etapa)``.
+    """
+    lineas = [
+        f"# HELP {PROMETHEUS_METRICA} Latencia por etapa de SearchEngine en milisegundos.",
+        f"# TYPE {PROMETHEUS_METRICA} summary",
+    ]
+    clases = payload.get("clases", {})
+    for clase, etapas in dict(clases).items():
+        if clase == CLASE_TODAS:
+            continue
+        for etapa, resumen in dict(etapas).items():
+            etiquetas = f'clase="{clase}",etapa="{etapa}"'
+            for q in PERCENTILES:
+                lineas.append(f'{PROMETHEUS_METRICA}{{{etiquetas},quantile="{q}"}} {resumen[f"p{int(q * 100)}_ms"]}')
+            lineas.append(f"{PROMETHEUS_METRICA}_sum{{{etiquetas}}} {resumen['suma_total_ms']}")
+            lineas.append(f"{PROMETHEUS_METRICA}_count{{{etiquetas}}} {int(resumen['count_total'])}")
+    return "\n".join(lineas) + "\n"
+
+
+def escribir_latencias_json(path: str | Path, payload: dict[str, object]) -> Path:
+    """Escribe el resumen de histogramas de latencia en JSON."""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        target.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    except Exception as error:
+        logger.error("Error exportando latencias JSON a %s", target, exc_info=True)
+        raise RuntimeError(f"No se pudo exportar latencias JSON: {error}") from error
+    return target
+
+
+def escribir_latencias_prometheus(path: str | Path, payload: dict[str, object]) -> Path:
+    """Escribe el resumen de histogramas en formato de texto Prometheus (p. ej. para node_exporter textfile)."""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        target.write_text(formato_prometheus(payload), encoding="utf-8")
+    except Exception as error:
+        logger.error("Error exportando latencias Prometheus a %s", target, exc_info=True)
+        raise RuntimeError(f"No se pudo exportar latencias Prometheus: {error}") from error
+    return target
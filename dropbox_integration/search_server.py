@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import parse_qs, urlparse
+
+from .search_engine import PAGE_SIZE, SearchEngine
+from .search_index import SUGERENCIAS_LIMITE
+from .search_metrics import formato_prometheus
+from .search_snapshot import IndiceCompartido
+
+logger = logging.getLogger(__name__)
+
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+MAX_BODY_BYTES = 8 * 1024 * 1024
+PARAMETROS_BUSQUEDA = (
+    "usar_nombre",
+    "usar_contenido",
+    "usar_semantico",
+    "modo",
+    "motor",
+    "top_k",
+    "weights",
+    "auditoria",
+    "profiling",
+    "vectorizado",
+    "usar_cache",
+    "campos",
+    "snippet",
+)
+# ``buscar_pagina`` no acepta top_k ni profiling: la página y el cursor acotan la respuesta.
+PARAMETROS_PAGINA = tuple(clave for clave in PARAMETROS_BUSQUEDA if clave not in ("top_k", "profiling"))
+
+
+def cargar_registros(asignacion: str | Path) -> list[dict[str, object]]:
+    """Lee ``dropbox_asignacion_app.json`` (lista de registros enriquecidos)."""
+    path = Path(asignacion)
+    try:
+        registros = json.loads(path.read_text(encoding="utf-8"))
+    except Exception as error:
+        raise RuntimeError(f"No se pudo leer {path.name}: {error}") from error
+    if not isinstance(registros, list):
+        raise RuntimeError(f"No se pudo leer {path.name}: se esperaba una lista de registros")
+    return registros
+
+
+class SearchServer(ThreadingHTTPServer):
+    """Servidor HTTP local que mantiene un índice caliente compartido por todos los clientes.
+
+    Cada petición corre en su propio hilo sobre el snapshot publicado en ``IndiceCompartido``; el
+    contexto de auditoría/performance de la búsqueda viaja en la misma respuesta.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        asignacion: str | Path,
+        index_dir: str | Path | None = None,
+        host: str = SERVER_HOST,
+        port: int = SERVER_PORT,
+        workers: int | None = None,
+        usar_ann: bool = False,
+        auditoria_jsonl: str | Path | None = None,
+    ) -> None:
+        self.asignacion = Path(asignacion)
+        self.index_dir = Path(index_dir) if index_dir is not None else None
+        self.workers = workers
+        self.indice = IndiceCompartido(usar_ann=usar_ann, auditoria_jsonl=auditoria_jsonl)
+        self.recargar()
+        super().__init__((host, port), _SearchHandler)
+
+    def recargar(self) -> SearchEngine:
+        """Relee la asignación y publica un snapshot nuevo si el corpus cambió (las consultas en curso siguen)."""
+        return self.indice.obtener(cargar_registros(self.asignacion), index_dir=self.index_dir, workers=self.workers)
+
+    @property
+    def engine(self) -> SearchEngine:
+        engine = self.indice.actual()
+        if engine is None:
+            raise RuntimeError("No se pudo atender la búsqueda: índice no publicado")
+        return engine
+
+
+class _SearchHandler(BaseHTTPRequestHandler):
+    server: SearchServer
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("search_server %s - %s", self.address_string(), format % args)
+
+    def _responder(self, status: HTTPStatus, payload: object) -> None:
+        cuerpo = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _responder_texto(self, texto: str) -> None:
+        cuerpo = texto.encode("utf-8")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _leer_json(self) -> dict[str, Any]:
+        largo = int(self.headers.get("Content-Length", "0") or 0)
+        if largo > MAX_BODY_BYTES:
+            raise ValueError("cuerpo de la petición demasiado grande")
+        datos = json.loads(self.rfile.read(largo) or b"{}") if largo else {}
+        if not isinstance(datos, dict):
+            raise ValueError("se esperaba un objeto JSON")
+        return datos
+
+    def _despachar(self, rutas: dict[str, Callable[[dict[str, Any]], object]], datos: dict[str, Any]) -> None:
+        ruta = urlparse(self.path).path.rstrip("/") or "/"
+        accion = rutas.get(ruta)
+        if accion is None:
+            self._responder(HTTPStatus.NOT_FOUND, {"error": f"ruta desconocida: {ruta}"})
+            return
+        try:
+            self._responder(HTTPStatus.OK, accion(datos))
+        except (ValueError, TypeError, KeyError) as error:
+            self._responder(HTTPStatus.BAD_REQUEST, {"error": str(error)})
+        except Exception as error:
+            logger.error("Error atendiendo %s", ruta, exc_info=True)
+            self._responder(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(error)})
+
+    def do_GET(self) -> None:
+        if urlparse(self.path).path.rstrip("/") == "/metrics":
+            self._responder_texto(formato_prometheus(self.server.engine.get_latency_histograms()))
+            return
+        consulta = {clave: valores[-1] for clave, valores in parse_qs(urlparse(self.path).query).items()}
+        self._despachar({"/salud": self._salud, "/auditoria": self._auditoria, "/estadisticas": self._estadisticas, "/metricas": self._metricas}, consulta)
+
+    def do_POST(self) -> None:
+        try:
+            datos = self._leer_json()
+        except (ValueError, json.JSONDecodeError) as error:
+            self._responder(HTTPStatus.BAD_REQUEST, {"error": str(error)})
+            return
+        self._despachar(
+            {
+                "/buscar_avanzado": self._buscar_avanzado,
+                "/buscar_lote": self._buscar_lote,
+                "/buscar_pagina": self._buscar_pagina,
+                "/buscar_semantico": self._buscar_semantico,
+                "/contar_facetas": self._contar_facetas,
+                "/sugerir": self._sugerir,
+                "/recargar": self._recargar,
+            },
+            datos,
+        )
+
+    def _salud(self, _: dict[str, Any]) -> dict[str, object]:
+        engine = self.server.engine
+        return {"ok": True, "version_indice": self.server.indice.version, "documentos": len(engine.index)}
+
+    def _auditoria(self, consulta: dict[str, Any]) -> dict[str, object]:
+        return {"audit_log": self.server.engine.get_audit_log(limit=int(consulta.get("limit", 200)))}
+
+    def _estadisticas(self, _: dict[str, Any]) -> dict[str, object]:
+        return self.server.engine.estadisticas_busqueda()
+
+    def _metricas(self, _: dict[str, Any]) -> dict[str, object]:
+        return self.server.engine.get_latency_histograms()
+
+    @staticmethod
+    def _parametros(datos: dict[str, Any]) -> dict[str, Any]:
+        return {clave: datos[clave] for clave in PARAMETROS_BUSQUEDA if clave in datos}
+
+    def _buscar_avanzado(self, datos: dict[str, Any]) -> dict[str, object]:
+        engine = self.server.engine
+        parametros = self._parametros(datos)
+        resultados = engine.buscar_avanzado(str(datos["query"]), filtros=dict(datos.get("filtros") or {}), **parametros)
+        sesion = engine.contexto_sesion()
+        respuesta: dict[str, object] = {
+            "resultados": resultados,
+            "performance_metrics": sesion["performance_metrics"],
+            "audit_log": sesion["audit_log"],
+        }
+        if parametros.get("auditoria"):
+            respuesta["auditoria"] = engine.auditoria_sesion()
+        return respuesta
+
+    def _buscar_pagina(self, datos: dict[str, Any]) -> dict[str, object]:
+        parametros = {clave: datos[clave] for clave in PARAMETROS_PAGINA if clave in datos}
+        cursor = datos.get("cursor")
+        return self.server.engine.buscar_pagina(
+            str(datos["query"]),
+            filtros=dict(datos.get("filtros") or {}),
+            page_size=int(datos.get("page_size", PAGE_SIZE)),
+            cursor=None if cursor is None else str(cursor),
+            **parametros,
+        )
+
+    def _buscar_lote(self, datos: dict[str, Any]) -> dict[str, object]:
+        queries = [str(q) for q in datos["queries"]]
+        lote = self.server.engine.buscar_lote(queries, filtros=dict(datos.get("filtros") or {}), **self._parametros(datos))
+        return {"lote": [{clave: item[clave] for clave in ("query", "resultados", "metricas")} for item in lote]}
+
+    def _buscar_semantico(self, datos: dict[str, Any]) -> dict[str, object]:
+        nprobe = datos.get("nprobe")
+        resultados = self.server.engine.buscar_semantico(str(datos["query"]), top_k=int(datos.get("top_k", 20)), nprobe=None if nprobe is None else int(nprobe))
+        return {"resultados": resultados}
+
+    def _contar_facetas(self, datos: dict[str, Any]) -> dict[str, object]:
+        return {"facetas": self.server.engine.contar_facetas(filtros=datos.get("filtros") or None, campos=datos.get("campos"))}
+
+    def _sugerir(self, datos: dict[str, Any]) -> dict[str, object]:
+        return {"sugerencias": self.server.engine.sugerir(str(datos.get("prefijo", "")), limit=int(datos.get("limit", SUGERENCIAS_LIMITE)))}
+
+    def _recargar(self, _: dict[str, Any]) -> dict[str, object]:
+        engine = self.server.recargar()
+        return {"ok": True, "version_indice": self.server.indice.version, "documentos": len(engine.index)}
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    root = Path(__file__).resolve().parents[1]
+    parser = argparse.ArgumentParser(description="Servidor local de búsqueda con índice compartido.")
+    parser.add_argument("--asignacion", type=str, default=str(root / "docs" / "dropbox_asignacion_app.json"), help="JSON de registros a indexar.")
+    parser.add_argument("--index-dir", type=str, default=str(root / "docs" / "search_index"), help="Directorio del índice persistido.")
+    parser.add_argument("--host", type=str, default=SERVER_HOST, help="Interfaz de escucha (por defecto sólo localhost).")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help="Puerto HTTP.")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos para preparar documentos al indexar.")
+    parser.add_argument("--ann", action="store_true", help="Búsqueda semántica aproximada con índice IVF (corpus de 100k+ documentos).")
+    parser.add_argument("--auditoria-jsonl", type=str, default=None, help="JSONL rotado donde se anexa el historial completo de auditoría.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    servidor = SearchServer(args.asignacion, index_dir=args.index_dir, host=args.host, port=args.port, workers=args.workers, usar_ann=args.ann, auditoria_jsonl=args.auditoria_jsonl)
+    logger.info("Servidor de búsqueda escuchando en http://%s:%s", *servidor.server_address[:2])
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
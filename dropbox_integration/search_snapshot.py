@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import copy
+import logging
+import threading
+from pathlib import Path
+from typing import Callable
+
+from .search_audit import SumideroAuditoriaJSONL
+from .search_engine import SearchEngine, fingerprint_corpus
+
+logger = logging.getLogger(__name__)
+
+_REGISTRO: dict[str, "IndiceCompartido"] = {}
+_REGISTRO_LOCK = threading.Lock()
+
+
+class IndiceCompartido:
+    """Índice de búsqueda compartido entre hilos con publicación read-copy-update.
+
+    Los lectores toman el snapshot vigente con ``actual()``/``obtener()`` (una sola lectura de
+    referencia) y consultan sin bloquearse entre sí. Los escritores construyen o copian un
+    ``SearchEngine`` aparte, lo preparan para lectura y lo publican reemplazando la referencia: las
+    consultas en curso terminan sobre el snapshot anterior, que nunca se muta.
+    """
+
+    def __init__(self, semantico: bool = True, usar_ann: bool = False, auditoria_jsonl: str | Path | None = None) -> None:
+        self.semantico = semantico
+        self.usar_ann = usar_ann
+        # Un solo sumidero para todos los snapshots: el historial sobrevive a las republicaciones.
+        self.auditoria_jsonl = SumideroAuditoriaJSONL(auditoria_jsonl) if auditoria_jsonl is not None else None
+        self._escritura = threading.RLock()
+        self._snapshot: tuple[SearchEngine, str, int] | None = None
+
+    @property
+    def version(self) -> int:
+        snapshot = self._snapshot
+        return 0 if snapshot is None else snapshot[2]
+
+    def actual(self) -> SearchEngine | None:
+        """Snapshot publicado más reciente (``None`` si aún no hay índice)."""
+        snapshot = self._snapshot
+        return None if snapshot is None else snapshot[0]
+
+    def publicar(self, engine: SearchEngine, huella: str = "") -> SearchEngine:
+        """Materializa las estructuras perezosas de ``engine`` y lo publica como snapshot vigente."""
+        engine.preparar_lectura(semantico=self.semantico)
+        with self._escritura:
+            version = self.version + 1
+            self._snapshot = (engine, huella, version)
+        logger.info("Índice de búsqueda publicado: versión %s, %s documentos", version, len(engine.index))
+        return engine
+
+    def obtener(self, documentos: list[dict[str, object]], index_dir: str | Path | None = None, workers: int | None = None) -> SearchEngine:
+        """Snapshot vigente si corresponde al mismo corpus; si no, reindexa y publica uno nuevo."""
+        huella = fingerprint_corpus(documentos)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot[1] == huella:
+            return snapshot[0]
+        with self._escritura:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot[1] == huella:
+                return snapshot[0]
+            return self.reindexar(documentos, index_dir=index_dir, workers=workers)
+
+    def reindexar(self, documentos: list[dict[str, object]], index_dir: str | Path | None = None, workers: int | None = None) -> SearchEngine:
+        """Construye un motor nuevo (cargando ``index_dir`` si está vigente) y lo publica."""
+        with self._escritura:
+            engine = SearchEngine(documentos, usar_ann=self.usar_ann, auditoria_jsonl=self.auditoria_jsonl)
+            if index_dir is not None:
+                engine.cargar_o_indexar(index_dir, semantico=self.semantico, workers=workers)
+            else:
+                engine.indexar_documentos(workers=workers)
+            return self.publicar(engine, fingerprint_corpus(documentos))
+
+    def actualizar(self, cambio: Callable[[SearchEngine], object]) -> SearchEngine:
+        """Copia el snapshot vigente, aplica ``cambio`` (p. ej. ``agregar_documentos``) a la copia y la publica."""
+        with self._escritura:
+            vigente = self.actual()
+            if vigente is None:
+                raise RuntimeError("No se pudo actualizar el índice compartido: no hay un snapshot publicado")
+            copia = copy.deepcopy(vigente)
+            cambio(copia)
+            return self.publicar(copia, fingerprint_corpus(copia.documentos))
+
+
+def indice_compartido(nombre: str = "default") -> IndiceCompartido:
+    """Índice compartido a nivel de proceso (uno por nombre), p. ej. para todas las sesiones de Streamlit."""
+    with _REGISTRO_LOCK:
+        indice = _REGISTRO.get(nombre)
+        if indice is None:
+            indice = IndiceCompartido()
+            _REGISTRO[nombre] = indice
+        return indice
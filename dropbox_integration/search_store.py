@@ -0,0 +1,423 @@
+from __future__ import annotations
+
+import math
+import sys
+import threading
+from array import array
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+
+from .search_index import TOKEN_REGEX, InvertedIndex
+
+_VACIO = np.zeros(0, dtype=np.int32)
+_SIN_TRAMOS = np.zeros((0, 2), dtype=np.int32)
+COMPACTAR_DESPERDICIO_MIN = 1 << 20
+
+
+def _tramos_mayusculas(contenido: str, minusculas: str) -> tuple[np.ndarray, str]:
+    """Tramos donde ``contenido`` difiere de ``minusculas`` y sus caracteres originales concatenados.
+
+    Cada fila es ``(inicio en el documento, offset en los caracteres)``; el largo de un tramo es la
+    diferencia con el offset del siguiente (o con el largo de los caracteres, para el último).
+    """
+    if contenido == minusculas:
+        return _SIN_TRAMOS, ""
+    original = np.frombuffer(contenido.encode("utf-32-le"), dtype=np.uint32)
+    plegado = np.frombuffer(minusculas.encode("utf-32-le"), dtype=np.uint32)
+    distinto = np.concatenate(([False], original != plegado, [False]))
+    bordes = np.flatnonzero(distinto[1:] != distinto[:-1])
+    inicios, fines = bordes[0::2], bordes[1::2]
+    caracteres = "".join(contenido[i:j] for i, j in zip(inicios.tolist(), fines.tolist()))
+    largos = fines - inicios
+    return np.stack([inicios, np.cumsum(largos) - largos], axis=1).astype(np.int32), caracteres
+
+
+@dataclass(slots=True)
+class ConsultaContenido:
+    """Consulta de contenido compilada contra los postings de contenido del ``InvertedIndex``.
+
+    ``ocurrencias`` y ``presentes`` se indexan por llave de documento del índice invertido: el total
+    de ``str.count`` de los tokens de la consulta y un bitmask de cuáles tokens de la frase aparecen.
+    """
+
+    frase: str
+    ocurrencias: dict[int, int]
+    presentes: dict[int, int]
+    requeridos: int
+    frase_bit: int
+    sin_indice: tuple[str, ...]
+
+
+class DocumentStore:
+    """Caches por documento en layout compacto (struct-of-arrays).
+
+    Cada documento recibe un id entero (slot). Los tokens se guardan como arreglos ordenados de
+    ids de un vocabulario compartido, las fechas como timestamps en un ``array('d')`` y el contenido
+    normalizado de todo el corpus vive en un único buffer de texto con offsets por slot. Las
+    mayúsculas originales se guardan aparte como tramos ``(inicio, offset)`` con sus caracteres, así
+    ``original`` reconstruye el texto extraído sin una segunda copia del contenido. Se guarda el
+    original completo sólo si ya lo retiene el llamador (``compartido``) o si su ``lower()`` cambia
+    de largo (p. ej. con "İ").
+    """
+
+    def __init__(self) -> None:
+        self.version = 0
+        self._lock = threading.Lock()
+        self.clear()
+
+    def __getstate__(self) -> dict[str, object]:
+        estado = dict(self.__dict__)
+        estado.pop("_lock", None)
+        return estado
+
+    def __setstate__(self, estado: dict[str, object]) -> None:
+        self.__dict__.update(estado)
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        self.vocab: dict[str, int] = {}
+        self.terminos: list[str] = []
+        self._slots: dict[str, int] = {}
+        self._ids: list[str | None] = []
+        self._tokens: list[np.ndarray] = []
+        self._estructura: list[np.ndarray] = []
+        self._nombres: list[str] = []
+        self._fechas = array("d")
+        self._claves = array("q")
+        self._inicio = array("q")
+        self._fin = array("q")
+        self._tramos: list[np.ndarray] = []
+        self._originales: list[str] = []
+        self._buffer = ""
+        self._pendiente: list[str] = []
+        self._largo = 0
+        self._desperdicio = 0
+        # Monótona también entre ``clear()``: invalida consultas compiladas contra un estado anterior.
+        self.version += 1
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, doc_id: object) -> bool:
+        return doc_id in self._slots
+
+    def _ids_terminos(self, tokens: Iterable[str]) -> np.ndarray:
+        ids: set[int] = set()
+        for tok in tokens:
+            idx = self.vocab.get(tok)
+            if idx is None:
+                idx = len(self.terminos)
+                tok = sys.intern(tok)
+                self.vocab[tok] = idx
+                self.terminos.append(tok)
+            ids.add(idx)
+        if not ids:
+            return _VACIO
+        return np.fromiter(sorted(ids), dtype=np.int32, count=len(ids))
+
+    def asignar(
+        self,
+        doc_id: str,
+        nombre: str,
+        contenido: str,
+        tokens: Iterable[str],
+        estructura: Iterable[str],
+        fecha_ts: float | None,
+        clave: int = -1,
+        compartido: bool = False,
+    ) -> int:
+        """Registra (o reemplaza) los caches de ``doc_id`` y retorna su slot.
+
+        ``contenido`` es el texto extraído tal cual; el buffer guarda su ``lower()``. Con
+        ``compartido=True`` el llamador ya retiene ese mismo objeto (p. ej. el dict crudo del corpus)
+        y se guarda la referencia en vez de los tramos de mayúsculas. ``clave`` es la llave del
+        documento en el ``InvertedIndex`` cuyos postings de contenido usa ``compilar_contenido``.
+        """
+        tokens_ids = self._ids_terminos(tokens)
+        estructura_ids = self._ids_terminos(estructura)
+        self.version += 1
+        inicio = self._largo
+        minusculas = contenido.lower()
+        if not compartido and len(minusculas) == len(contenido):
+            tramos, originales = _tramos_mayusculas(contenido, minusculas)
+        else:
+            tramos, originales = _SIN_TRAMOS, contenido
+        if minusculas:
+            self._pendiente.append(minusculas)
+            self._largo += len(minusculas)
+        fecha = math.nan if fecha_ts is None else float(fecha_ts)
+
+        slot = self._slots.get(doc_id)
+        if slot is None:
+            slot = len(self._ids)
+            self._slots[doc_id] = slot
+            self._ids.append(doc_id)
+            self._tokens.append(tokens_ids)
+            self._estructura.append(estructura_ids)
+            self._nombres.append(nombre)
+            self._fechas.append(fecha)
+            self._claves.append(clave)
+            self._inicio.append(inicio)
+            self._fin.append(self._largo)
+            self._tramos.append(tramos)
+            self._originales.append(originales)
+            return slot
+        self._desperdicio += self._fin[slot] - self._inicio[slot]
+        self._tokens[slot] = tokens_ids
+        self._estructura[slot] = estructura_ids
+        self._nombres[slot] = nombre
+        self._fechas[slot] = fecha
+        self._claves[slot] = clave
+        self._inicio[slot] = inicio
+        self._fin[slot] = self._largo
+        self._tramos[slot] = tramos
+        self._originales[slot] = originales
+        return slot
+
+    def eliminar(self, doc_id: str) -> None:
+        slot = self._slots.pop(doc_id, None)
+        if slot is None:
+            return
+        self.version += 1
+        self._desperdicio += self._fin[slot] - self._inicio[slot]
+        self._ids[slot] = None
+        self._tokens[slot] = _VACIO
+        self._estructura[slot] = _VACIO
+        self._nombres[slot] = ""
+        self._fechas[slot] = math.nan
+        self._claves[slot] = -1
+        self._inicio[slot] = self._fin[slot] = 0
+        self._tramos[slot] = _SIN_TRAMOS
+        self._originales[slot] = ""
+        if self._desperdicio > max(COMPACTAR_DESPERDICIO_MIN, self._largo // 2):
+            self.compactar()
+
+    def compactar(self) -> None:
+        """Reconstruye slots y buffer sin los documentos eliminados o reemplazados."""
+        buffer = self._texto()
+        vivos = [(doc_id, slot) for slot, doc_id in enumerate(self._ids) if doc_id is not None]
+        tokens, estructura, nombres, fechas, claves, inicio, fin, tramos, originales = (
+            self._tokens,
+            self._estructura,
+            self._nombres,
+            self._fechas,
+            self._claves,
+            self._inicio,
+            self._fin,
+            self._tramos,
+            self._originales,
+        )
+        self._slots = {}
+        self._ids, self._tokens, self._estructura, self._nombres = [], [], [], []
+        self._fechas, self._claves, self._inicio, self._fin = array("d"), array("q"), array("q"), array("q")
+        self._tramos, self._originales = [], []
+        partes: list[str] = []
+        largo = 0
+        for nuevo, (doc_id, slot) in enumerate(vivos):
+            segmento = buffer[inicio[slot] : fin[slot]]
+            partes.append(segmento)
+            self._slots[doc_id] = nuevo
+            self._ids.append(doc_id)
+            self._tokens.append(tokens[slot])
+            self._estructura.append(estructura[slot])
+            self._nombres.append(nombres[slot])
+            self._fechas.append(fechas[slot])
+            self._claves.append(claves[slot])
+            self._inicio.append(largo)
+            largo += len(segmento)
+            self._fin.append(largo)
+            self._tramos.append(tramos[slot])
+            self._originales.append(originales[slot])
+        self._buffer = "".join(partes)
+        self._pendiente = []
+        self._largo = largo
+        self._desperdicio = 0
+        self.version += 1
+
+    def _texto(self) -> str:
+        if self._pendiente:
+            # Unión perezosa de los segmentos nuevos; el lock evita que dos lectores la dupliquen.
+            with self._lock:
+                if self._pendiente:
+                    self._buffer = self._buffer + "".join(self._pendiente)
+                    self._pendiente = []
+        return self._buffer
+
+    def materializar(self) -> None:
+        """Une los segmentos pendientes del buffer (deja el store listo para lecturas concurrentes)."""
+        self._texto()
+
+    def ids_consulta(self, tokens: Iterable[str]) -> np.ndarray:
+        """Ids del vocabulario para tokens de consulta (los desconocidos se omiten)."""
+        ids = {self.vocab[tok] for tok in tokens if tok in self.vocab}
+        return np.fromiter(sorted(ids), dtype=np.int32, count=len(ids)) if ids else _VACIO
+
+    def nombre(self, doc_id: str, default: str = "") -> str:
+        slot = self._slots.get(doc_id)
+        return default if slot is None else self._nombres[slot]
+
+    def fecha_ts(self, doc_id: str) -> float | None:
+        slot = self._slots.get(doc_id)
+        if slot is None or math.isnan(self._fechas[slot]):
+            return None
+        return self._fechas[slot]
+
+    def token_ids(self, doc_id: str) -> np.ndarray:
+        slot = self._slots.get(doc_id)
+        return _VACIO if slot is None else self._tokens[slot]
+
+    def estructura_ids(self, doc_id: str) -> np.ndarray:
+        slot = self._slots.get(doc_id)
+        return _VACIO if slot is None else self._estructura[slot]
+
+    def tokens(self, doc_id: str) -> set[str]:
+        return {self.terminos[i] for i in self.token_ids(doc_id).tolist()}
+
+    def estructura(self, doc_id: str) -> set[str]:
+        return {self.terminos[i] for i in self.estructura_ids(doc_id).tolist()}
+
+    def largo_contenido(self, doc_id: str) -> int:
+        slot = self._slots.get(doc_id)
+        return 0 if slot is None else self._fin[slot] - self._inicio[slot]
+
+    def coincidencias(self, ids_doc: np.ndarray, ids_consulta: list[int]) -> int:
+        """Cuántos ids de la consulta (con repeticiones) están en el arreglo ordenado del documento."""
+        if not ids_doc.size or not ids_consulta:
+            return 0
+        buscados = np.asarray(ids_consulta, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(ids_doc, buscados), ids_doc.size - 1)
+        return int(np.count_nonzero(ids_doc[pos] == buscados))
+
+    def contenido(self, doc_id: str) -> str:
+        slot = self._slots.get(doc_id)
+        if slot is None:
+            return ""
+        return self._texto()[self._inicio[slot] : self._fin[slot]]
+
+    def original(self, doc_id: str, desde: int = 0, hasta: int | None = None) -> str:
+        """Contenido ``[desde:hasta]`` con sus mayúsculas originales, reconstruido desde el buffer y los tramos."""
+        slot = self._slots.get(doc_id)
+        if slot is None:
+            return ""
+        tramos = self._tramos[slot]
+        if not tramos.size and self._originales[slot]:
+            # Original compartido o ``lower()`` que cambia el largo: se guardó el texto completo.
+            return self._originales[slot][desde:hasta]
+        largo = self._fin[slot] - self._inicio[slot]
+        desde = max(0, min(desde, largo))
+        hasta = largo if hasta is None else max(desde, min(hasta, largo))
+        texto = self._texto()[self._inicio[slot] + desde : self._inicio[slot] + hasta]
+        if not tramos.size:
+            return texto
+        inicios = tramos[:, 0]
+        # Tramos que tocan la ventana: desde el último que empieza antes de ``desde``.
+        primero = max(0, int(np.searchsorted(inicios, desde, side="right")) - 1)
+        ultimo = int(np.searchsorted(inicios, hasta, side="left"))
+        caracteres = self._originales[slot]
+        offsets = tramos[primero : ultimo + 1, 1].tolist()
+        if len(offsets) == ultimo - primero:
+            offsets.append(len(caracteres))
+        partes: list[str] = []
+        cursor = desde
+        for k, inicio in enumerate(inicios[primero:ultimo].tolist()):
+            offset = offsets[k]
+            ini, fin = max(inicio, desde), min(inicio + offsets[k + 1] - offset, hasta)
+            if fin <= ini:
+                continue
+            partes.append(texto[cursor - desde : ini - desde])
+            partes.append(caracteres[offset + ini - inicio : offset + fin - inicio])
+            cursor = fin
+        partes.append(texto[cursor - desde :])
+        return "".join(partes)
+
+    def contar(self, doc_id: str, termino: str) -> int:
+        """``contenido.count(termino)`` sobre el buffer compartido, sin copiar el contenido del documento."""
+        slot = self._slots.get(doc_id)
+        if slot is None:
+            return 0
+        return self._texto().count(termino, self._inicio[slot], self._fin[slot])
+
+    def encontrar(self, doc_id: str, termino: str) -> int:
+        """Posición de ``termino`` relativa al contenido del documento, o -1."""
+        slot = self._slots.get(doc_id)
+        if slot is None:
+            return -1
+        pos = self._texto().find(termino, self._inicio[slot], self._fin[slot])
+        return pos - self._inicio[slot] if pos >= 0 else -1
+
+    def compilar_contenido(self, frase: str, tokens: list[str], indice: InvertedIndex) -> ConsultaContenido:
+        """Compila la consulta en conteos por documento leyendo sólo los postings de contenido de ``indice``.
+
+        Un token ``\\w+`` nunca cruza un separador, así que ``contenido.count(token)`` es la suma de
+        ``tf(termino) * termino.count(token)`` sobre los términos que lo contienen. Los postings también
+        guardan las partes de términos con guion bajo (``factura_acme`` → ``factura``, ``acme``): un token
+        sin guion bajo se cuenta sólo en términos sin él (las partes ya suman sus ocurrencias) y uno con
+        guion bajo sólo en términos completos. Los tokens que no son ``\\w+`` (raro, p. ej. por
+        ``lower()`` Unicode) se cuentan sobre el buffer.
+        """
+        repeticiones = Counter(tokens)
+        indexables = [tok for tok in repeticiones if TOKEN_REGEX.fullmatch(tok)]
+        sin_indice = tuple(tok for tok in tokens if not TOKEN_REGEX.fullmatch(tok))
+        postings = indice.postings["contenido"]
+        pesos: dict[str, int] = defaultdict(int)
+        bits_termino: dict[str, int] = defaultdict(int)
+        requeridos = 0
+        frase_bit = 0
+        for i, token in enumerate(indexables):
+            bit = 1 << i if token in frase else 0
+            requeridos |= bit
+            if token == frase:
+                frase_bit = bit
+            compuesto = "_" in token
+            for termino, veces in indice.subcadenas.expandir(token):
+                if ("_" in termino) == compuesto and termino in postings:
+                    pesos[termino] += veces * repeticiones[token]
+                    bits_termino[termino] |= bit
+
+        ocurrencias: dict[int, int] = defaultdict(int)
+        presentes: dict[int, int] = defaultdict(int)
+        for termino, peso in pesos.items():
+            bit = bits_termino[termino]
+            for clave, tf in postings.get(termino, {}).items():
+                ocurrencias[clave] += tf * peso
+                presentes[clave] |= bit
+        return ConsultaContenido(frase, dict(ocurrencias), dict(presentes), requeridos, frase_bit, sin_indice)
+
+    def coincidencias_contenido(self, doc_id: str, consulta: ConsultaContenido) -> tuple[int, bool]:
+        """Retorna ``(ocurrencias de tokens, frase presente)`` como lo harían ``count``/``in`` sobre el contenido."""
+        slot = self._slots.get(doc_id)
+        if slot is None:
+            return 0, False
+        clave = self._claves[slot]
+        ocurrencias = consulta.ocurrencias.get(clave, 0)
+        if consulta.sin_indice:
+            ocurrencias += sum(self.contar(doc_id, tok) for tok in consulta.sin_indice)
+        presentes = consulta.presentes.get(clave, 0)
+        if consulta.frase_bit:
+            return ocurrencias, bool(presentes & consulta.frase_bit)
+        # Prefiltro: la frase sólo puede aparecer si cada token contenido en ella aparece.
+        if (presentes & consulta.requeridos) != consulta.requeridos:
+            return ocurrencias, False
+        return ocurrencias, self.encontrar(doc_id, consulta.frase) >= 0
+
+    def memoria(self) -> dict[str, int]:
+        """Bytes aproximados por estructura del layout compacto."""
+        arreglos = sum(arr.nbytes + sys.getsizeof(arr) for arr in (*self._tokens, *self._estructura))
+        vocab = sys.getsizeof(self.vocab) + sys.getsizeof(self.terminos) + sum(sys.getsizeof(t) for t in self.terminos)
+        nombres = sys.getsizeof(self._nombres) + sum(sys.getsizeof(n) for n in self._nombres)
+        offsets = sum(sys.getsizeof(a) for a in (self._fechas, self._claves, self._inicio, self._fin))
+        # Tramos de mayúsculas y originales completos (incluye los que comparte el corpus crudo).
+        original = sum(sys.getsizeof(t) for t in self._tramos if t.size) + sum(sys.getsizeof(c) for c in self._originales if c)
+        buffer = sys.getsizeof(self._texto())
+        return {
+            "token_ids": arreglos,
+            "vocabulario": vocab,
+            "nombres": nombres,
+            "fechas_offsets": offsets,
+            "contenido_buffer": buffer,
+            "contenido_original": original,
+            "slots": sys.getsizeof(self._slots) + sys.getsizeof(self._ids),
+        }
@@ -8,7 +8,7 @@ import time
 from pathlib import Path
 import shutil
 
-from dropbox_integration.ai_classifier import enriquecer_con_ia
+from dropbox_integration.ai_classifier import enriquecer_con_ia, generar_matriz_embeddings, guardar_embeddings, texto_embedding
 from dropbox_integration.analytics_engine import analizar_documentos, construir_resumen_analitico
 from dropbox_integration.asignador_modulos import asignar_modulos_app, exportar_asignacion
 from dropbox_integration.clasificador_documentos import clasificar_documentos, exportar_mapeo
@@ -284,6 +284,7 @@ def _ejecutar_auditoria_busqueda(
     reportes_dir: Path,
     verbose: bool,
     profiling: bool = False,
+    index_dir: Path | None = None,
 ) -> dict[str, object]:
     """Ejecuta auditoría de búsqueda, exporta JSON/CSV y retorna metadata útil para reportes/changelog."""
     audit_info: dict[str, object] = {
@@ -307,7 +308,11 @@ def _ejecutar_auditoria_busqueda(
     try:
         log("Inicio auditoría de búsqueda en pipeline", verbose=verbose)
         engine = SearchEngine(registros)
-        engine.indexar_documentos()
+        if index_dir is not None:
+            reutilizado = engine.cargar_o_indexar(index_dir)
+            log(f"Índice de búsqueda {'cargado desde' if reutilizado else 'reconstruido en'} {index_dir}", verbose=verbose)
+        else:
+            engine.indexar_documentos()
 
         filtros = {
             "tipo": "TODOS",
@@ -317,25 +322,9 @@ def _ejecutar_auditoria_busqueda(
             "fuzzy": True,
         }
 
-        mejor_query = ""
-        mejor_count = -1
-        for query in _queries_auditoria_canonicas():
-            resultados = engine.buscar_avanzado(
-                query,
-                filtros=filtros,
-                usar_nombre=True,
-                usar_contenido=True,
-                usar_semantico=True,
-                modo="flexible",
-                auditoria=True,
-                profiling=profiling,
-            )
-            if len(resultados) > mejor_count:
-                mejor_count = len(resultados)
-                mejor_query = query
-
-        _ = engine.buscar_avanzado(
-            mejor_query,
+        consultas = _queries_auditoria_canonicas()
+        lote = engine.buscar_lote(
+            consultas,
             filtros=filtros,
             usar_nombre=True,
             usar_contenido=True,
@@ -344,6 +333,17 @@ def _ejecutar_auditoria_busqueda(
             auditoria=True,
             profiling=profiling,
         )
+        mejor_query = ""
+        mejor_count = -1
+        mejor_item: dict[str, object] = {}
+        for item in lote:
+            if len(item["resultados"]) > mejor_count:
+                mejor_count = len(item["resultados"])
+                mejor_query = str(item["query"])
+                mejor_item = item
+        # Las exportaciones reflejan la mejor consulta sin volver a ejecutarla.
+        if mejor_item:
+            engine.fijar_resultado_lote(mejor_item)
 
         snapshot_dir.mkdir(parents=True, exist_ok=True)
         reportes_dir.mkdir(parents=True, exist_ok=True)
@@ -362,6 +362,8 @@ def _ejecutar_auditoria_busqueda(
             snapshot_perf_csv = engine.export_performance_csv(str(snapshot_dir / "dropbox_search_performance_snapshot.csv"))
             report_perf_json = engine.export_performance_json(str(reportes_dir / "dropbox_search_performance.json"))
             report_perf_csv = engine.export_performance_csv(str(reportes_dir / "dropbox_search_performance.csv"))
+        report_latencias_json = engine.export_latencias_json(str(reportes_dir / "dropbox_search_latencias.json"))
+        report_latencias_prom = engine.export_latencias_prometheus(str(reportes_dir / "dropbox_search_latencias.prom"))
 
         auditoria_data = json.loads(snapshot_json.read_text(encoding="utf-8"))
         result_rows = int(auditoria_data.get("metadata", {}).get("result_rows", 0))
@@ -389,6 +391,8 @@ def _ejecutar_auditoria_busqueda(
                 "report_csv": str(report_csv),
                 "report_performance_json": str(report_perf_json) if profiling else "",
                 "report_performance_csv": str(report_perf_csv) if profiling else "",
+                "report_latencias_json": str(report_latencias_json),
+                "report_latencias_prometheus": str(report_latencias_prom),
                 "result_rows": result_rows,
                 "resultados_mejor_query": int(mejor_count),
                 "mejor_query": mejor_query,
@@ -634,10 +638,12 @@ def main() -> int:
                 reportes_dir=reportes_dir,
                 verbose=True,
                 profiling=profiling_enabled,
+                index_dir=docs_dir / "search_index",
             )
         else:
             log("Auditoría de búsqueda desactivada para esta corrida", verbose=True)
         exportar_mapeo(enriquecidos, mapeo_json, mapeo_md)
+        guardar_embeddings(generar_matriz_embeddings([texto_embedding(r) for r in enriquecidos]), mapeo_json)
         exportar_asignacion(enriquecidos, asignacion_json)
         _actualizar_markdown_dropbox(enriquecidos, import_md)
         _actualizar_markdown_busqueda(search_md)
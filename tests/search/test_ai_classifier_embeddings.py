@@ -0,0 +1,53 @@
+import hashlib
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from dropbox_integration.ai_classifier import (
+    EMBEDDING_DIM,
+    buscar_similares,
+    cargar_embeddings,
+    cargar_o_generar_embeddings,
+    generar_embeddings,
+    ruta_embeddings,
+)
+
+
+def test_embeddings_deterministas_entre_procesos() -> None:
+    vec = generar_embeddings("Factura ACME enero")
+    assert vec.dtype == np.float32 and vec.size == EMBEDDING_DIM
+    slot = int.from_bytes(hashlib.blake2b(b"acme", digest_size=8).digest(), "little") % EMBEDDING_DIM
+    assert vec[slot] > 0
+
+    codigo = "from dropbox_integration.ai_classifier import generar_embeddings; print(generar_embeddings('Factura ACME enero').tobytes().hex())"
+    salidas = {
+        subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True, env={"PYTHONHASHSEED": seed, "PYTHONPATH": "."}).stdout.split()[-1]
+        for seed in ("1", "2")
+    }
+    assert salidas == {vec.tobytes().hex()}
+
+
+def test_embeddings_persistidos_en_memmap_y_busqueda_top_k(tmp_path: Path) -> None:
+    registros = [
+        {"nombre_archivo": "factura_acme.pdf", "etiquetas": ["factura"], "contenido_extraido": "factura proveedor acme"},
+        {"nombre_archivo": "nota_credito.pdf", "etiquetas": ["nota"], "contenido_extraido": "nota de credito betha"},
+        {"nombre_archivo": "factura_betha.pdf", "etiquetas": ["factura"], "contenido_extraido": "factura betha"},
+    ]
+    mapeo = tmp_path / "dropbox_mapeo_documentos.json"
+    matriz = cargar_o_generar_embeddings(registros, mapeo)
+    assert ruta_embeddings(mapeo).exists()
+    assert matriz.dtype == np.float32 and matriz.shape == (3, EMBEDDING_DIM)
+
+    cargada = cargar_embeddings(mapeo, filas=3)
+    assert isinstance(cargada, np.memmap)
+    assert np.array_equal(cargada, matriz)
+    assert cargar_embeddings(mapeo, filas=4) is None
+
+    documentos = [{"id": str(i), "doc": r["nombre_archivo"], "embedding": matriz[i]} for i, r in enumerate(registros)]
+    por_matriz = buscar_similares("factura betha", documentos, top_k=2, matriz=cargada)
+    por_vectores = buscar_similares("factura betha", documentos, top_k=2)
+    assert [x["id"] for x in por_matriz] == [x["id"] for x in por_vectores] == ["2", "0"]
+    scores = [float(np.dot(generar_embeddings("factura betha"), matriz[i])) for i in (2, 0)]
+    assert np.allclose([x["score"] for x in por_matriz], scores, atol=1e-6)
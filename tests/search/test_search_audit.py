@@ -0,0 +1,71 @@
+import copy
+from pathlib import Path
+
+from dropbox_integration.search_audit import AUDIT_LOG_MAX, SumideroAuditoriaJSONL, historial_busquedas, leer_eventos_auditoria
+from dropbox_integration.search_engine import SearchEngine, construir_estadisticas_busqueda
+
+
+def _docs() -> list[dict[str, object]]:
+    return [
+        {
+            "nombre_archivo": f"factura_{proveedor}_{i}.pdf",
+            "ruta_completa": f"C:/tmp/{carpeta}/factura_{proveedor}_{i}.pdf",
+            "extension": ".pdf",
+            "carpeta": carpeta,
+            "categoria": "PDF",
+            "etiquetas": ["factura"],
+            "fecha_modificacion": "2026-01-10T10:00:00",
+            "hash": f"aud-{i}",
+            "contenido_extraido": f"factura proveedor {proveedor}",
+            "proveedor_virtual": proveedor.upper(),
+        }
+        for i, (proveedor, carpeta) in enumerate([("acme", "PDF"), ("betha", "XML"), ("acme", "PDF")])
+    ]
+
+
+def test_audit_log_acotado_en_memoria() -> None:
+    engine = SearchEngine(_docs())
+    for i in range(AUDIT_LOG_MAX + 25):
+        engine._log_audit({"evento": "prueba", "i": i})
+    assert len(engine.audit_log) == AUDIT_LOG_MAX
+    assert [e["i"] for e in engine.get_audit_log(limit=3)] == [AUDIT_LOG_MAX + 22, AUDIT_LOG_MAX + 23, AUDIT_LOG_MAX + 24]
+    assert engine.get_audit_log(limit=5, sesion=True)[-1]["i"] == AUDIT_LOG_MAX + 24
+    assert len(engine.get_audit_log(limit=10_000)) == AUDIT_LOG_MAX
+
+
+def test_copia_del_motor_conserva_audit_log_acotado() -> None:
+    engine = SearchEngine(_docs())
+    for i in range(AUDIT_LOG_MAX + 5):
+        engine._log_audit({"evento": "prueba", "i": i})
+    copia = copy.deepcopy(engine)
+    assert copia.audit_log.maxlen == AUDIT_LOG_MAX
+    assert list(copia.audit_log) == list(engine.audit_log)
+    copia._log_audit({"evento": "prueba", "i": -1})
+    assert len(copia.audit_log) == AUDIT_LOG_MAX
+    assert engine.audit_log[-1]["i"] == AUDIT_LOG_MAX + 4
+
+
+def test_sumidero_jsonl_rota_y_alimenta_estadisticas(tmp_path: Path) -> None:
+    ruta = tmp_path / "audit" / "search_audit.jsonl"
+    sumidero = SumideroAuditoriaJSONL(ruta, max_bytes=600, respaldos=50)
+    engine = SearchEngine(_docs(), auditoria_jsonl=sumidero)
+    engine.indexar_documentos()
+    for query in ("acme", "betha", "acme", "ACME", "betha"):
+        engine.buscar_avanzado(query, filtros={}, auditoria=True, usar_cache=False)
+
+    assert ruta.with_name("search_audit.jsonl.1").exists()
+    eventos = list(leer_eventos_auditoria(ruta, respaldos=50))
+    assert [e["evento"] for e in eventos][0] == "indexacion"
+    assert len(eventos) == 1 + 5 * 2
+    stats = engine.estadisticas_busqueda()
+    assert stats["terminos_mas_buscados"] == {"acme": 3, "betha": 2}
+    assert stats["carpetas_mas_relevantes"] == {"PDF": 3, "XML": 2}
+    assert stats == construir_estadisticas_busqueda(list(historial_busquedas(eventos)))
+
+    # El sumidero conserva a lo sumo ``respaldos`` archivos rotados.
+    acotado = SumideroAuditoriaJSONL(tmp_path / "corto.jsonl", max_bytes=100, respaldos=2)
+    for i in range(20):
+        acotado.escribir({"evento": "prueba", "i": i})
+    acotado.cerrar()
+    assert len(acotado.archivos()) == 3
+    assert [e["i"] for e in acotado.leer()][-1] == 19
@@ -0,0 +1,25 @@
+from benchmarks.corpus_sintetico import consultas_sinteticas, generar_corpus
+from benchmarks.search_benchmark import BENCHMARK_FORMAT_VERSION, comparar_benchmarks, ejecutar_benchmark
+
+
+def test_corpus_sintetico_es_determinista() -> None:
+    corpus = generar_corpus(200, semilla=3)
+    assert corpus == generar_corpus(200, semilla=3)
+    assert corpus != generar_corpus(200, semilla=4)
+    assert len({doc["hash"] for doc in corpus}) == 200
+    assert {"proveedor_virtual", "hospital_virtual", "mes_virtual", "anio_virtual", "contenido_extraido"} <= set(corpus[0])
+    assert consultas_sinteticas(corpus, 6, semilla=3) == consultas_sinteticas(generar_corpus(200, semilla=3), 6, semilla=3)
+
+
+def test_benchmark_produce_json_versionado_comparable() -> None:
+    payload = ejecutar_benchmark((120,), repeticiones=1, consultas=6)
+    assert payload["benchmark_version"] == BENCHMARK_FORMAT_VERSION
+    corrida = payload["corpus"]["120"]
+    assert corrida["indexacion"]["documentos_por_segundo"] > 0
+    assert set(corrida["modos"]) == {"estricta", "flexible", "semantica"}
+    assert corrida["modos"]["semantica"]["frio"]["n"] == 6
+    assert corrida["cache"]["hits"] == 6 and corrida["cache"]["misses"] == 6
+
+    lento = {**payload, "corpus": {"120": {**corrida, "tfidf": {**corrida["tfidf"], "segundos": corrida["tfidf"]["segundos"] * 2 + 1}}}}
+    comparacion = comparar_benchmarks(payload, lento)
+    assert comparacion["regresiones"] == ["120.tfidf.segundos"]
@@ -0,0 +1,79 @@
+from pathlib import Path
+
+import numpy as np
+
+from dropbox_integration.search_ann import IndiceIVF
+from dropbox_integration.search_engine import INDEX_ANN_FILE, SearchEngine, benchmark_ann
+
+PROVEEDORES = ["acme", "betha", "gamma", "delta", "omega", "sigma", "kappa", "lambda"]
+CONCEPTOS = ["medicamentos", "material curacion", "renta equipo", "servicio limpieza", "honorarios medicos"]
+
+
+def _docs(n: int = 400) -> list[dict[str, object]]:
+    docs: list[dict[str, object]] = []
+    for i in range(n):
+        proveedor = PROVEEDORES[i % len(PROVEEDORES)]
+        concepto = CONCEPTOS[(i // len(PROVEEDORES)) % len(CONCEPTOS)]
+        docs.append(
+            {
+                "nombre_archivo": f"factura_{proveedor}_{i}.pdf",
+                "ruta_completa": f"C:/tmp/factura_{proveedor}_{i}.pdf",
+                "extension": ".pdf",
+                "carpeta": "PDF",
+                "etiquetas": ["factura"],
+                "fecha_modificacion": "2026-01-10T10:00:00",
+                "hash": f"sha-{i}",
+                "contenido_extraido": f"factura {proveedor} {concepto} folio {i}",
+                "proveedor_virtual": proveedor.upper(),
+            }
+        )
+    return docs
+
+
+def test_ann_con_todas_las_listas_equivale_al_exacto_y_se_persiste(tmp_path: Path) -> None:
+    exacto = SearchEngine(_docs())
+    exacto.indexar_documentos()
+    exacto.construir_modelo_semantico()
+    ann = SearchEngine(_docs(), usar_ann=True)
+    ann.indexar_documentos()
+    ann.construir_modelo_semantico()
+    assert ann._ann is not None and len(ann._ann) == len(ann.index)
+
+    consulta = "factura gamma renta equipo"
+    esperado = exacto.buscar_semantico(consulta, top_k=10)
+    assert ann.buscar_semantico(consulta, top_k=10, nprobe=ann._ann.nlist) == esperado
+
+    ann.save_index(tmp_path / "indice")
+    assert (tmp_path / "indice" / INDEX_ANN_FILE).exists()
+    cargado = SearchEngine(_docs(), usar_ann=True)
+    assert cargado.load_index(tmp_path / "indice") is True
+    assert cargado._ann is not None
+    np.testing.assert_array_equal(cargado._ann.asignacion, ann._ann.asignacion)
+    assert cargado.buscar_semantico(consulta, top_k=10, nprobe=3) == ann.buscar_semantico(consulta, top_k=10, nprobe=3)
+
+
+def test_ann_sigue_altas_y_bajas_y_benchmark_reporta_recall() -> None:
+    engine = SearchEngine(_docs(), usar_ann=True)
+    engine.indexar_documentos()
+    engine.construir_modelo_semantico()
+    engine.agregar_documentos(_docs(410)[400:])
+    assert len(engine._ann) == len(engine.index) == 410
+    engine.eliminar_documento("sha-0")
+    assert len(engine._ann) == len(engine.index) == 409
+
+    reporte = benchmark_ann(engine, ["acme medicamentos", "servicio limpieza omega"], top_k=5, nprobes=(1, engine._ann.nlist))
+    assert reporte["consultas"] == 2
+    assert [fila["nprobe"] for fila in reporte["ann"]] == [1, engine._ann.nlist]
+    assert reporte["ann"][-1]["recall_at_k"] == 1.0
+
+
+def test_indice_ivf_sobre_embeddings_densos() -> None:
+    rng = np.random.default_rng(7)
+    vectores = rng.normal(size=(300, 16)).astype(np.float32)
+    vectores /= np.linalg.norm(vectores, axis=1, keepdims=True)
+    indice = IndiceIVF.construir(vectores, nlist=12)
+    assert indice.nlist == 12
+    candidatos = indice.candidatos(vectores[5], nprobe=2)
+    assert 5 in candidatos.tolist()
+    assert np.all(np.diff(candidatos) > 0)
+    assert indice.candidatos(vectores[5], nprobe=12).tolist() == list(range(300))
@@ -241,6 +241,22 @@ def test_busqueda_avanzada_admite_weights_y_auditoria() -> None:
     assert any(str(x.get("evento")) == "busqueda_auditoria" for x in engine.get_audit_log(limit=20))
 
 
+def test_acierto_de_cache_con_auditoria_registra_pesos_y_copia_resultados() -> None:
+    engine = SearchEngine(_docs_avanzados())
+    engine.indexar_documentos()
+    weights = {"boost_proveedor": 1.5, "score_exacto": 1.3}
+    primera = engine.buscar_avanzado("factura acme", filtros=_filtros_base(), weights=weights, auditoria=True)
+    primera[0]["etiquetas"].append("mutada")
+
+    segunda = engine.buscar_avanzado("factura acme", filtros=_filtros_base(), weights=weights, auditoria=True)
+    eventos = [e for e in engine.get_audit_log(limit=20, sesion=True) if e["evento"] == "busqueda_auditoria"]
+    assert [e["cache_hit"] for e in eventos] == [False, True]
+    assert eventos[1]["weights"] == eventos[0]["weights"] and eventos[1]["boost_weights"]
+    assert "mutada" not in segunda[0]["etiquetas"]
+    segunda[0]["etiquetas"].append("mutada")
+    assert "mutada" not in engine.buscar_avanzado("factura acme", filtros=_filtros_base(), weights=weights, auditoria=True)[0]["etiquetas"]
+
+
 def test_export_auditoria_json(tmp_path: Path) -> None:
     engine = SearchEngine(_docs_avanzados())
     engine.indexar_documentos()
@@ -315,3 +331,25 @@ def test_export_auditoria_full(tmp_path: Path) -> None:
         rows = list(csv.DictReader(handler))
     assert rows
     assert all("ruta" in row for row in rows)
+
+
+def test_ranking_vectorizado_equivale_a_ranking_por_documento() -> None:
+    engine = SearchEngine(_docs_avanzados())
+    engine.indexar_documentos()
+    engine.construir_modelo_semantico()
+
+    filtros = {**_filtros_base(), "proveedor": "ACME"}
+    kwargs = {
+        "filtros": filtros,
+        "usar_semantico": True,
+        "modo": "flexible",
+        "auditoria": True,
+        "weights": {"boost_hospital": 1.6, "score_fuzzy": 0.0},
+    }
+    por_documento = engine.buscar_avanzado("factura hospital central enero 2026", **kwargs)
+    vectorizado = engine.buscar_avanzado("factura hospital central enero 2026", vectorizado=True, **kwargs)
+
+    assert [x["hash"] for x in vectorizado] == [x["hash"] for x in por_documento]
+    for a, b in zip(por_documento, vectorizado):
+        for key in ("score_exacto", "score_fuzzy", "score_semantico", "score_tokens", "score_temporal", "score_estructural", "score_boosting", "score_final"):
+            assert abs(float(a[key]) - float(b[key])) < 1e-3
@@ -0,0 +1,88 @@
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from dropbox_integration.audit_diff import compare_auditoria_snapshots
+from dropbox_integration.search_engine import SearchEngine
+
+
+def _doc(hash_: str, nombre: str, contenido: str, etiquetas: list[str]) -> dict[str, object]:
+    return {
+        "nombre_archivo": nombre,
+        "ruta_completa": f"C:/tmp/{nombre}",
+        "extension": nombre[nombre.rfind(".") :],
+        "carpeta": "PDF",
+        "etiquetas": etiquetas,
+        "fecha_modificacion": "2026-01-10T10:00:00",
+        "hash": hash_,
+        "contenido_extraido": contenido,
+        "proveedor_virtual": "ACME",
+    }
+
+
+def _docs() -> list[dict[str, object]]:
+    return [
+        _doc("b1", "oxigeno_medicinal.pdf", "factura de oxigeno medicinal", ["oxigeno"]),
+        _doc("b2", "nota_general.pdf", "nota con oxigeno citado una vez entre mucho texto de relleno sin relacion", ["nota"]),
+        _doc("b3", "orden_compra.pdf", "orden de compra de guantes", ["orden_compra"]),
+    ]
+
+
+def test_motor_bm25f_puntua_por_campo_sin_ajustar_tfidf() -> None:
+    engine = SearchEngine(_docs())
+    engine.indexar_documentos()
+
+    resultados = engine.buscar_avanzado("oxigeno", filtros={}, motor="bm25f", auditoria=True, usar_cache=False)
+    assert [r["hash"] for r in resultados] == ["b1", "b2"]
+    assert resultados[0]["score_bm25f"] > resultados[1]["score_bm25f"] > 0
+    assert all(r["score_semantico"] == 0 and r["score_tokens"] == 0 for r in resultados)
+    vectorizados = engine.buscar_avanzado("oxigeno", filtros={}, motor="bm25f", auditoria=True, vectorizado=True, usar_cache=False)
+    assert [(r["hash"], r["score_bm25f"]) for r in vectorizados] == [(r["hash"], r["score_bm25f"]) for r in resultados]
+    # El motor también se elige desde los filtros; el híbrido no calcula BM25F.
+    assert engine.buscar_avanzado("oxigeno", filtros={"motor": "bm25f"}, auditoria=True)[0]["score_bm25f"] > 0
+    assert all(r["score_bm25f"] == 0 for r in engine.buscar_avanzado("oxigeno", filtros={}, auditoria=True))
+    lote = engine.buscar_lote(["oxigeno"], filtros={}, motor="bm25f", auditoria=True, usar_cache=False)[0]
+    assert lote["contexto"]["motor"] == "bm25f"
+    assert [(r["hash"], r["score_bm25f"]) for r in lote["resultados"]] == [(r["hash"], r["score_bm25f"]) for r in resultados]
+    assert engine._tfidf is None
+
+    # Agregar y eliminar documentos actualiza las estadísticas de los postings sin reajustar nada.
+    antes = resultados[0]["score_bm25f"]
+    engine.agregar_documentos([_doc(f"x{i}", f"oxigeno_{i}.pdf", "oxigeno oxigeno", ["oxigeno"]) for i in range(5)])
+    despues = engine.buscar_avanzado("oxigeno", filtros={}, motor="bm25f", auditoria=True)
+    assert len(despues) == 7
+    assert next(r for r in despues if r["hash"] == "b1")["score_bm25f"] != antes
+    for i in range(5):
+        engine.eliminar_documento(f"x{i}")
+    assert engine.buscar_avanzado("oxigeno", filtros={}, motor="bm25f", auditoria=True)[0]["score_bm25f"] == antes
+    assert engine._tfidf is None
+
+
+def test_audit_diff_compara_motores(tmp_path: Path) -> None:
+    engine = SearchEngine(_docs())
+    engine.indexar_documentos()
+    engine.buscar_avanzado("oxigeno", filtros={}, auditoria=True)
+    hibrido = engine.export_auditoria_json(str(tmp_path / "hibrido.json"))
+    engine.buscar_avanzado("oxigeno", filtros={}, motor="bm25f", auditoria=True)
+    bm25f = engine.export_auditoria_json(str(tmp_path / "bm25f.json"))
+
+    diff = compare_auditoria_snapshots(hibrido, bm25f)
+    fila = next(d for d in diff["documents"] if d["ruta"].endswith("oxigeno_medicinal.pdf"))
+    assert fila["score_bm25f_a"] == 0 and fila["delta_score_bm25f"] > 0
+
+
+def test_bm25f_puntua_sin_el_lock_del_motor() -> None:
+    engine = SearchEngine(_docs())
+    engine.indexar_documentos()
+    ctx = engine._build_query_context("oxigeno", {}, True, True, False, None, motor="bm25f")
+    posiciones = np.arange(len(engine.index), dtype=np.int64)
+    esperado = engine._bm25f_scores(ctx, posiciones)
+    obtenido: list[np.ndarray] = []
+    with engine._lock:
+        # Otro hilo tiene el lock de escritura: con la vista vigente el scoring no lo espera.
+        hilo = threading.Thread(target=lambda: obtenido.append(engine._bm25f_scores(ctx, posiciones)))
+        hilo.start()
+        hilo.join(timeout=5)
+        assert not hilo.is_alive()
+    assert np.array_equal(obtenido[0], esperado)
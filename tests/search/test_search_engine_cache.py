@@ -0,0 +1,74 @@
+from dropbox_integration.search_cache import ResultCache
+from dropbox_integration.search_engine import SearchEngine
+
+
+def _docs() -> list[dict[str, object]]:
+    return [
+        {
+            "nombre_archivo": "factura_acme_enero.pdf",
+            "ruta_completa": "C:/tmp/factura_acme_enero.pdf",
+            "extension": ".pdf",
+            "carpeta": "PDF",
+            "categoria": "PDF",
+            "etiquetas": ["factura"],
+            "tamaño": 10,
+            "fecha_modificacion": "2026-01-10T10:00:00",
+            "hash": "c1",
+            "contenido_extraido": "factura proveedor acme enero",
+        },
+        {
+            "nombre_archivo": "nota_credito_betha.txt",
+            "ruta_completa": "C:/tmp/nota_credito_betha.txt",
+            "extension": ".txt",
+            "carpeta": "TEXTO",
+            "categoria": "Texto",
+            "etiquetas": ["nota"],
+            "tamaño": 10,
+            "fecha_modificacion": "2026-01-12T10:00:00",
+            "hash": "c2",
+            "contenido_extraido": "nota de credito betha",
+        },
+    ]
+
+
+def test_cache_reutiliza_resultados_y_reporta_hits() -> None:
+    engine = SearchEngine(_docs())
+    engine.indexar_documentos()
+
+    primero = engine.buscar_avanzado("Factura ", filtros={"tipo": "TODOS"}, profiling=True)
+    assert engine.get_last_performance_metrics()["cache"]["hit"] is False
+
+    segundo = engine.buscar_avanzado("factura", filtros={"tipo": "TODOS"}, profiling=True)
+    metricas = engine.get_last_performance_metrics()
+    assert segundo == primero
+    assert metricas["cache"]["hit"] is True
+    assert metricas["cache"]["hits"] == 1
+
+    engine.buscar_avanzado("factura", filtros={"tipo": "TODOS"}, top_k=1)
+    assert engine.get_cache_stats()["misses"] == 2
+
+
+def test_mutacion_del_indice_invalida_cache() -> None:
+    engine = SearchEngine(_docs()[:1])
+    engine.indexar_documentos()
+    assert [x["hash"] for x in engine.buscar_avanzado("credito", filtros={}, modo="estricta")] == []
+
+    generacion = engine.get_cache_stats()["generacion"]
+    engine.agregar_documentos(_docs()[1:])
+    assert engine.get_cache_stats()["generacion"] > generacion
+    assert [x["hash"] for x in engine.buscar_avanzado("credito", filtros={}, modo="estricta")] == ["c2"]
+
+
+def test_result_cache_lru_y_ttl() -> None:
+    ahora = [0.0]
+    cache = ResultCache(max_entries=2, ttl_seconds=10.0, reloj=lambda: ahora[0])
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.evictions == 1
+
+    ahora[0] = 11.0
+    assert cache.get("a") is None
+    assert cache.expirations == 1
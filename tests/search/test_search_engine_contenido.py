@@ -1,4 +1,8 @@
-from dropbox_integration.search_engine import SearchEngine
+from dataclasses import fields
+from pathlib import Path
+
+from dropbox_integration.content_extractor import extraer_texto_archivo
+from dropbox_integration.search_engine import DocumentoIndexado, SearchEngine
 
 
 def test_busqueda_contenido_relevancia_por_ocurrencias() -> None:
@@ -34,3 +38,96 @@ def test_busqueda_contenido_relevancia_por_ocurrencias() -> None:
     assert len(resultados) == 2
     assert resultados[0]["nombre"] == "a.txt"
     assert resultados[0]["relevancia"] >= resultados[1]["relevancia"]
+
+
+def test_resultados_proyectados_sin_contenido_y_con_snippet() -> None:
+    largo = "relleno " * 200
+    docs = [
+        {
+            "nombre_archivo": "c.txt",
+            "ruta_completa": "c.txt",
+            "extension": ".txt",
+            "carpeta": "TEXTO",
+            "categoria": "Texto",
+            "etiquetas": ["nota"],
+            "tamaño": 1,
+            "fecha_modificacion": "2026-01-01",
+            "hash": "3",
+            "contenido_extraido": f"{largo} Factura del proveedor ACME {largo}",
+        }
+    ]
+    engine = SearchEngine(docs)
+    engine.indexar_documentos()
+
+    completo = engine.buscar_avanzado("factura", filtros={})[0]
+    assert "contenido" not in completo
+    assert completo["etiquetas"] == ["nota"]
+
+    proyectado = engine.buscar_avanzado("factura", filtros={}, campos=["nombre", "ruta"], snippet=60)[0]
+    assert set(proyectado) == {"nombre", "ruta", "fecha", "relevancia", "id", "snippet"}
+    assert "Factura del proveedor" in str(proyectado["snippet"])
+    assert len(str(proyectado["snippet"])) <= 62
+
+    con_contenido = engine.buscar_avanzado("factura", filtros={}, campos=["contenido"])[0]
+    assert str(con_contenido["contenido"]).startswith("relleno")
+
+
+def test_score_contenido_desde_postings_equivale_a_str_count() -> None:
+    contenidos = [
+        "factura factura acme-factura proveedor",
+        "Fact_ura del año 2026, iva incluido",
+        "nota de credito İstanbul",
+        "",
+        "proveedor acme acme acme factura",
+        "factura_acme factura__acme_2026 acme",
+    ]
+    docs = [
+        {"nombre_archivo": f"c{i}.txt", "ruta_completa": f"c{i}.txt", "extension": ".txt", "hash": f"c{i}", "contenido_extraido": texto}
+        for i, texto in enumerate(contenidos)
+    ]
+    engine = SearchEngine(docs)
+    engine.indexar_documentos()
+
+    def referencia(texto: str, query_norm: str, tokens: list[str]) -> float:
+        contenido = texto.strip().lower()
+        if not contenido:
+            return 0.0
+        ocurrencias = sum(contenido.count(token) for token in tokens)
+        return min(1.0, (0.35 if query_norm in contenido else 0.0) + min(0.65, ocurrencias * 0.06))
+
+    for query in ["factura", "acme factura", "fact", "a", "acme-factura", "İstanbul", "2026 iva", "nota nota", "xyz", "factura_acme", "_acme", "_", "ac", "2026"]:
+        query_norm = engine._normalizar_texto(query)
+        tokens = engine._tokenizar(query_norm)
+        for doc, texto in zip(engine.index, contenidos):
+            assert engine._score_content(doc, query_norm, tokens) == referencia(texto, query_norm, tokens), query
+
+    engine.eliminar_documento("c0")
+    doc = next(d for d in engine.index if d.hash == "c4")
+    assert engine._score_content(doc, "acme", ["acme"]) == referencia(contenidos[4], "acme", ["acme"])
+    # Términos nuevos del vocabulario invalidan las expansiones memorizadas.
+    engine.agregar_documentos([{"nombre_archivo": "n.txt", "ruta_completa": "n.txt", "hash": "n", "contenido_extraido": "acmex acme"}])
+    doc = next(d for d in engine.index if d.hash == "n")
+    assert engine._score_content(doc, "acme", ["acme"]) == referencia("acmex acme", "acme", ["acme"])
+
+
+def test_contenido_extraido_sin_copia_en_documento_indexado(tmp_path: Path) -> None:
+    (tmp_path / "f.txt").write_text("Archivo de Proveedor Gamma", encoding="utf-8")
+    texto = "Factura ACME del Proveedor Gamma: pago a 30 días"
+    docs = [
+        {"nombre_archivo": "f.txt", "ruta_completa": str(tmp_path / "f.txt"), "extension": ".txt", "etiquetas": ["archivo"], "hash": "f"},
+        # Con espacios alrededor el texto recortado ya no es el objeto del dict: el store guarda sólo tramos.
+        {"nombre_archivo": "i.txt", "ruta_completa": "i.txt", "extension": ".txt", "etiquetas": ["factura"], "hash": "i", "contenido_extraido": f"  {texto}  "},
+    ]
+    engine = SearchEngine(docs)
+    engine.indexar_documentos()
+
+    assert "contenido" not in {campo.name for campo in fields(DocumentoIndexado)}
+    assert engine.buscar_avanzado("archivo", filtros={}, campos=["contenido"])[0]["contenido"] == extraer_texto_archivo(tmp_path / "f.txt")
+    proyectado = engine.buscar_avanzado("acme", filtros={}, campos=["contenido"], snippet=20)[0]
+    assert proyectado["contenido"] == texto
+    assert "ACME del" in str(proyectado["snippet"])
+
+    engine.save_index(tmp_path / "indice")
+    cargado = SearchEngine(docs)
+    assert cargado.load_index(tmp_path / "indice")
+    assert cargado.buscar_avanzado("acme", filtros={}, campos=["contenido"])[0]["contenido"] == texto
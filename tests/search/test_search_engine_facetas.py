@@ -0,0 +1,61 @@
+from dropbox_integration.search_engine import SearchEngine
+
+
+def _docs() -> list[dict[str, object]]:
+    proveedores = ["ACME", "BETHA", "GAMMA"]
+    docs: list[dict[str, object]] = []
+    for i in range(12):
+        docs.append(
+            {
+                "nombre_archivo": f"doc_{i}.{'pdf' if i % 2 else 'xml'}",
+                "ruta_completa": f"C:/tmp/doc_{i}",
+                "extension": ".pdf" if i % 2 else ".xml",
+                "carpeta": "PDF" if i % 2 else "XML",
+                "categoria": "PDF" if i % 2 else "XML",
+                "etiquetas": ["factura", "Pagada"] if i % 3 == 0 else ["factura"],
+                "tamaño": 10,
+                "fecha_modificacion": "2026-01-10T10:00:00",
+                "hash": f"f{i}",
+                "contenido_extraido": "factura",
+                "proveedor_virtual": proveedores[i % 3],
+                "hospital_virtual": "Hospital Central" if i < 6 else "Hospital Norte",
+                "anio_virtual": "2026",
+            }
+        )
+    return docs
+
+
+def test_bitmaps_de_facetas_equivalen_a_filtro_por_documento() -> None:
+    engine = SearchEngine(_docs())
+    engine.indexar_documentos()
+
+    casos = [
+        {"tipo": "pdf", "extension": "TODOS"},
+        {"proveedor": "acme", "hospital_virtual": "HOSPITAL CENTRAL"},
+        {"etiquetas": ["pagada"], "anio": "2026"},
+        {"proveedor": "ACME", "proveedor_virtual": "BETHA"},
+        {"carpeta": "inexistente"},
+        {"etiquetas": [], "fuzzy": True},
+    ]
+    for filtros in casos:
+        esperado = [pos for pos, doc in enumerate(engine.index) if engine._matches_filters(doc, filtros)]
+        assert engine._filter_positions(filtros) == esperado
+
+    engine.eliminar_documento("f0")
+    engine.agregar_documentos([dict(_docs()[0], hash="f12", ruta_completa="C:/tmp/doc_12")])
+    filtros = {"etiquetas": ["pagada"], "proveedor": "acme"}
+    esperado = [pos for pos, doc in enumerate(engine.index) if engine._matches_filters(doc, filtros)]
+    assert engine._filter_positions(filtros) == esperado
+
+
+def test_contar_facetas_con_y_sin_filtros() -> None:
+    engine = SearchEngine(_docs())
+    engine.indexar_documentos()
+
+    conteos = engine.contar_facetas()
+    assert conteos["extension"] == {".xml": 6, ".pdf": 6}
+    assert conteos["etiquetas"] == {"factura": 12, "pagada": 4}
+
+    filtrados = engine.contar_facetas(filtros={"hospital": "Hospital Norte"}, campos=["proveedor", "etiquetas"])
+    assert set(filtrados) == {"proveedor", "etiquetas"}
+    assert sum(filtrados["proveedor"].values()) == 6
@@ -0,0 +1,117 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from dropbox_integration import search_engine
+from dropbox_integration.search_engine import SearchEngine
+
+
+def _doc(i: int, proveedor: str, contenido: str) -> dict[str, object]:
+    return {
+        "nombre_archivo": f"factura_{proveedor.lower()}_{i}.pdf",
+        "ruta_completa": f"C:/tmp/factura_{proveedor.lower()}_{i}.pdf",
+        "extension": ".pdf",
+        "carpeta": "PDF",
+        "categoria": "PDF",
+        "etiquetas": ["factura"],
+        "tamaño": 10,
+        "fecha_modificacion": f"2026-01-{10 + i:02d}T10:00:00",
+        "hash": f"h{i}",
+        "contenido_extraido": contenido,
+        "proveedor_virtual": proveedor,
+        "hospital_virtual": "Hospital Central",
+        "mes_virtual": "01-Enero",
+        "anio_virtual": "2026",
+    }
+
+
+def _base() -> list[dict[str, object]]:
+    return [
+        _doc(1, "ACME", "factura proveedor acme enero"),
+        _doc(2, "ACME", "factura acme servicio medico"),
+        _doc(3, "BETHA", "nota de credito betha"),
+    ]
+
+
+def _nuevos() -> list[dict[str, object]]:
+    return [
+        _doc(4, "GAMMA", "factura gamma material quirurgico"),
+        _doc(5, "BETHA", "factura betha hospital central"),
+    ]
+
+
+def _ranking(engine: SearchEngine, query: str, **kwargs: object) -> list[tuple[object, object]]:
+    resultados = engine.buscar_avanzado(query, filtros={}, modo="flexible", auditoria=True, **kwargs)
+    return [(x["hash"], x["score_boosting"]) for x in resultados]
+
+
+def test_agregar_documentos_equivale_a_reindexar() -> None:
+    incremental = SearchEngine(_base())
+    incremental.indexar_documentos()
+    incremental.buscar_avanzado("factura", filtros={}, vectorizado=True)
+    assert incremental.agregar_documentos(_nuevos()) == 2
+
+    completo = SearchEngine(_base() + _nuevos())
+    completo.indexar_documentos()
+
+    assert len(incremental.index) == 5
+    assert incremental._field_freq == completo._field_freq
+    assert _ranking(incremental, "factura gamma") == _ranking(completo, "factura gamma")
+    assert _ranking(incremental, "factura betha", vectorizado=True) == _ranking(completo, "factura betha", vectorizado=True)
+
+
+def test_eliminar_y_actualizar_documento(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(search_engine, "TFIDF_REFIT_RATIO", 5.0)
+    engine = SearchEngine(_base())
+    engine.indexar_documentos()
+    engine.construir_modelo_semantico()
+
+    assert engine.eliminar_documento("h3") == 1
+    assert [doc.hash for doc in engine.index] == ["h1", "h2"]
+    assert "betha" not in engine._field_freq["proveedor"]
+    assert engine.buscar_avanzado("betha", filtros={}, modo="estricta") == []
+    assert engine._matriz_tfidf.shape[0] == 2
+
+    actualizado = _doc(2, "ACME", "factura acme material de curacion")
+    assert engine.actualizar_documento("h2", actualizado) == 1
+    resultados = engine.buscar_avanzado("curacion", filtros={}, modo="estricta")
+    assert [x["hash"] for x in resultados] == ["h2"]
+    assert engine._matriz_tfidf.shape[0] == 2
+    assert any(str(x.get("evento")) == "indexacion_incremental" for x in engine.get_audit_log())
+
+
+def test_actualizar_documento_fallido_conserva_la_version_indexada(monkeypatch: pytest.MonkeyPatch) -> None:
+    engine = SearchEngine(_base())
+    engine.indexar_documentos()
+    antes = [x["hash"] for x in engine.buscar_avanzado("acme", filtros={}, modo="estricta")]
+
+    def falla(*args: object, **kwargs: object) -> None:
+        raise OSError("extracción fallida")
+
+    monkeypatch.setattr(engine, "_build_document", falla)
+    assert engine.actualizar_documento("h1", _doc(1, "GAMMA", "factura gamma")) == 0
+    assert [doc.hash for doc in engine.index] == ["h1", "h2", "h3"]
+    assert [x["hash"] for x in engine.buscar_avanzado("acme", filtros={}, modo="estricta")] == antes
+    assert any(str(raw.get("hash")) == "h1" for raw in engine.documentos)
+
+
+def test_actualizar_y_save_index_esperan_el_lock_del_motor(tmp_path: Path) -> None:
+    engine = SearchEngine(_base())
+    engine.indexar_documentos()
+    terminados: list[str] = []
+    hilos = [
+        threading.Thread(target=lambda: terminados.append(f"actualizar:{engine.actualizar_documento('h1', _doc(1, 'GAMMA', 'factura gamma'))}")),
+        threading.Thread(target=lambda: terminados.append(f"guardar:{engine.save_index(tmp_path / 'indice').name}")),
+    ]
+    with engine._lock:
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join(timeout=0.2)
+        # Mientras otro escritor tiene el lock ninguno de los dos toca el índice.
+        assert terminados == []
+    for hilo in hilos:
+        hilo.join(timeout=10)
+    assert sorted(terminados) == ["actualizar:1", "guardar:indice"]
+    assert len(engine.index) == len(engine._doc_keys) == len(_base())
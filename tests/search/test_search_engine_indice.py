@@ -0,0 +1,91 @@
+from dropbox_integration.search_engine import SearchEngine
+
+
+def _docs() -> list[dict[str, object]]:
+    return [
+        {
+            "nombre_archivo": "factura_acme_enero.pdf",
+            "ruta_completa": "C:/tmp/factura_acme_enero.pdf",
+            "extension": ".pdf",
+            "carpeta": "PDF",
+            "categoria": "PDF",
+            "etiquetas": ["factura"],
+            "tamaño": 10,
+            "fecha_modificacion": "2026-01-10T10:00:00",
+            "hash": "i1",
+            "contenido_extraido": "factura proveedor acme enero",
+        },
+        {
+            "nombre_archivo": "manual_usuario.txt",
+            "ruta_completa": "C:/tmp/manual_usuario.txt",
+            "extension": ".txt",
+            "carpeta": "TEXTO",
+            "categoria": "Texto",
+            "etiquetas": ["manual"],
+            "tamaño": 10,
+            "fecha_modificacion": "2026-01-11T10:00:00",
+            "hash": "i2",
+            "contenido_extraido": "instrucciones de instalacion",
+        },
+        {
+            "nombre_archivo": "nota_credito_betha.txt",
+            "ruta_completa": "C:/tmp/nota_credito_betha.txt",
+            "extension": ".txt",
+            "carpeta": "TEXTO",
+            "categoria": "Texto",
+            "etiquetas": ["nota"],
+            "tamaño": 10,
+            "fecha_modificacion": "2026-01-12T10:00:00",
+            "hash": "i3",
+            "contenido_extraido": "nota de credito betha",
+        },
+    ]
+
+
+def test_postings_por_campo_con_frecuencias() -> None:
+    engine = SearchEngine(_docs())
+    engine.indexar_documentos()
+
+    postings = engine._inverted.frecuencias("factura", "contenido")
+    assert list(postings.values()) == [1]
+    assert engine._inverted.frecuencias("acme", "nombre")
+    assert engine._inverted.longitud_media("contenido") > 0
+
+
+def test_flexible_solo_puntua_documentos_con_terminos_compartidos() -> None:
+    engine = SearchEngine(_docs())
+    engine.indexar_documentos()
+
+    resultados = engine.buscar_avanzado("betha credito", filtros={}, modo="flexible")
+    evento = engine.get_audit_log(limit=1)[0]
+
+    assert resultados[0]["hash"] == "i3"
+    assert int(evento["candidatos"]) == 3
+    assert int(evento["candidatos_postings"]) < 3
+
+
+def test_estricto_coincide_con_recorrido_completo() -> None:
+    con_indice = SearchEngine(_docs())
+    con_indice.indexar_documentos()
+    sin_indice = SearchEngine(_docs(), usar_indice_invertido=False)
+    sin_indice.indexar_documentos()
+
+    for query in ["factura", "acme_enero", "credito"]:
+        a = con_indice.buscar_avanzado(query, filtros={}, modo="estricta")
+        b = sin_indice.buscar_avanzado(query, filtros={}, modo="estricta")
+        assert [(x["hash"], x["relevancia"]) for x in a] == [(x["hash"], x["relevancia"]) for x in b]
+
+
+def test_prefiltro_trigramas_y_fuzzy_en_lote() -> None:
+    engine = SearchEngine(_docs())
+    engine.indexar_documentos()
+
+    posiciones = engine._names.prefiltrar("factura_acme")
+    assert [engine._names.nombres[pos] for pos in posiciones] == ["factura_acme_enero.pdf"]
+    assert len(engine._names.prefiltrar("fa")) == 3
+
+    nombres = list(engine._names.nombres)
+    lote = engine._fuzzy_batch("nota credito", nombres)
+    assert lote.tolist() == [engine._safe_ratio("nota credito", nombre) for nombre in nombres]
+    con_corte = engine._fuzzy_batch("nota credito", nombres, score_cutoff=60.0)
+    assert [score > 0 for score in con_corte.tolist()] == [score >= 0.6 for score in lote.tolist()]
@@ -0,0 +1,65 @@
+from dropbox_integration.search_engine import SearchEngine, benchmark_busquedas
+
+
+def _docs() -> list[dict[str, object]]:
+    nombres = ["factura_acme_enero", "factura_betha_marzo", "nota_credito_acme", "reporte_hospital_central", "xml_timbrado_gamma"]
+    return [
+        {
+            "nombre_archivo": f"{nombre}.pdf",
+            "ruta_completa": f"C:/tmp/{nombre}.pdf",
+            "extension": ".pdf",
+            "carpeta": "PDF",
+            "categoria": "PDF",
+            "etiquetas": [nombre.split("_")[0]],
+            "tamaño": 10,
+            "fecha_modificacion": "2026-01-10T10:00:00",
+            "hash": f"l{i}",
+            "contenido_extraido": nombre.replace("_", " ") + " proveedor pago",
+        }
+        for i, nombre in enumerate(nombres)
+    ]
+
+
+def test_buscar_lote_equivale_a_consultas_individuales() -> None:
+    engine = SearchEngine(_docs())
+    engine.indexar_documentos()
+    engine.construir_modelo_semantico()
+    consultas = ["factura acme", "credito", "hospital central", "", "zzz"]
+    filtros = {"tipo": "TODOS", "fuzzy": True}
+
+    lote = engine.buscar_lote(consultas, filtros=filtros, usar_semantico=True, auditoria=True, usar_cache=False)
+    assert [item["query"] for item in lote] == consultas
+    for item in lote:
+        individual = engine.buscar_avanzado(str(item["query"]), filtros=filtros, usar_semantico=True, auditoria=True, usar_cache=False)
+        assert item["resultados"] == individual
+        assert item["metricas"]["resultados"] == len(individual)
+
+    vectorizado = engine.buscar_lote(consultas[:3], filtros=filtros, usar_semantico=True, vectorizado=True, top_k=2, usar_cache=False)
+    for item in vectorizado:
+        individual = engine.buscar_avanzado(str(item["query"]), filtros=filtros, usar_semantico=True, vectorizado=True, top_k=2, usar_cache=False)
+        assert item["resultados"] == individual
+    assert any(evento["evento"] == "busqueda_lote" for evento in engine.get_audit_log())
+
+
+def test_fijar_resultado_lote_y_benchmark() -> None:
+    engine = SearchEngine(_docs())
+    engine.indexar_documentos()
+    lote = engine.buscar_lote(["factura", "credito"], filtros={}, auditoria=True, profiling=True)
+    assert "components" in lote[0]["metricas"]
+
+    engine.fijar_resultado_lote(lote[0])
+    assert engine.get_last_performance_metrics() == lote[0]["metricas"]
+    assert engine.auditoria_sesion()["metadata"]["result_rows"] == len(lote[0]["resultados"])
+
+    metricas = benchmark_busquedas(engine, ["factura", "credito"], repeticiones=2)
+    assert metricas["consultas"] == 4
+    assert metricas["resultados"] == 2 * sum(len(item["resultados"]) for item in lote)
+
+
+def test_buscar_lote_estricto_no_ajusta_semantica() -> None:
+    engine = SearchEngine(_docs())
+    engine.indexar_documentos()
+    lote = engine.buscar_lote(["factura acme", "credito"], filtros={}, usar_semantico=True, modo="estricta", vectorizado=True, usar_cache=False)
+    assert engine._tfidf is None
+    assert lote[0]["resultados"] == engine.buscar_avanzado("factura acme", filtros={}, usar_semantico=True, modo="estricta", vectorizado=True, usar_cache=False)
+    assert next(e for e in engine.get_audit_log() if e["evento"] == "busqueda_lote")["semanticas"] == 0
@@ -0,0 +1,81 @@
+import pytest
+
+from dropbox_integration.search_engine import SearchEngine
+
+
+def _docs() -> list[dict[str, object]]:
+    proveedores = ["ACME", "BETHA", "GAMMA"]
+    return [
+        {
+            "nombre_archivo": f"factura_{proveedores[i % 3].lower()}_{i % 4}.pdf",
+            "ruta_completa": f"C:/tmp/factura_{i}.pdf",
+            "extension": ".pdf",
+            "carpeta": "PDF",
+            "etiquetas": ["factura"],
+            "fecha_modificacion": "2026-01-10T10:00:00",
+            "hash": f"pag{i:02d}",
+            "contenido_extraido": f"factura proveedor {proveedores[i % 3]}",
+            "proveedor_virtual": proveedores[i % 3],
+        }
+        for i in range(23)
+    ]
+
+
+def _paginas(engine: SearchEngine, query: str, **parametros: object) -> list[dict[str, object]]:
+    salida: list[dict[str, object]] = []
+    cursor = None
+    while True:
+        pagina = engine.buscar_pagina(query, filtros={}, page_size=5, cursor=cursor, **parametros)
+        assert len(pagina["resultados"]) <= 5
+        salida.extend(pagina["resultados"])
+        cursor = pagina["cursor"]
+        if cursor is None:
+            return salida
+
+
+def test_paginas_con_cursor_cubren_el_ranking_sin_re_rankear(monkeypatch: pytest.MonkeyPatch) -> None:
+    engine = SearchEngine(_docs())
+    engine.indexar_documentos()
+    llamadas = {"ranking": 0}
+    original = engine._rankear_candidatos
+
+    def _contar(*args: object, **kwargs: object) -> object:
+        llamadas["ranking"] += 1
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(engine, "_rankear_candidatos", _contar)
+    paginado = _paginas(engine, "factura acme", auditoria=True)
+    assert llamadas["ranking"] == 1
+    assert engine.buscar_pagina("factura acme", filtros={}, page_size=5)["total"] == len(paginado)
+
+    ids = [r["hash"] for r in paginado]
+    assert len(ids) == len(set(ids))
+    relevancias = [float(r["relevancia"]) for r in paginado]
+    assert relevancias == sorted(relevancias, reverse=True)
+    completo = engine.buscar_avanzado("factura acme", filtros={}, auditoria=True, usar_cache=False)
+    assert {(r["hash"], r["score_final"]) for r in completo} == {(r["hash"], r["score_final"]) for r in paginado}
+
+    # Sin cache cada página re-rankea, pero el cursor (score, id) sigue la misma secuencia.
+    assert [r["hash"] for r in _paginas(engine, "factura acme", usar_cache=False)] == ids
+    assert [r["hash"] for r in engine.iter_buscar("factura acme", filtros={}, page_size=4)] == ids
+    assert len(_paginas(engine, "", modo="estricta")) == len(_docs())
+
+    with pytest.raises(ValueError):
+        engine.buscar_pagina("factura", filtros={}, cursor="sin-separador")
+
+
+def test_iter_buscar_materializa_solo_lo_consumido(monkeypatch: pytest.MonkeyPatch) -> None:
+    engine = SearchEngine(_docs())
+    engine.indexar_documentos()
+    materializados = {"n": 0}
+    original = engine._item_resultado
+
+    def _contar(*args: object, **kwargs: object) -> dict[str, object]:
+        materializados["n"] += 1
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(engine, "_item_resultado", _contar)
+    iterador = engine.iter_buscar("factura", filtros={}, page_size=3)
+    primeros = [next(iterador) for _ in range(4)]
+    assert len(primeros) == 4
+    assert materializados["n"] == 6
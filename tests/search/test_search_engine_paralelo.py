@@ -0,0 +1,39 @@
+from dataclasses import asdict
+from pathlib import Path
+
+from dropbox_integration.search_engine import SearchEngine
+
+
+def _docs(base: Path) -> list[dict[str, object]]:
+    docs: list[dict[str, object]] = []
+    for i in range(6):
+        ruta = base / f"nota_{i}.txt"
+        ruta.write_text(f"nota de credito proveedor {i} hospital central", encoding="utf-8")
+        docs.append(
+            {
+                "nombre_archivo": ruta.name,
+                "ruta_completa": str(ruta),
+                "extension": ".txt",
+                "carpeta": "TEXTO",
+                "categoria": "Texto",
+                "etiquetas": ["nota"] if i % 2 else [],
+                "tamaño": ruta.stat().st_size,
+                "fecha_modificacion": "2026-01-10T10:00:00",
+                "hash": f"p{i}",
+            }
+        )
+    return docs
+
+
+def test_indexacion_paralela_equivale_a_serie(tmp_path: Path) -> None:
+    serie = SearchEngine(_docs(tmp_path))
+    serie.indexar_documentos()
+    paralelo = SearchEngine(_docs(tmp_path))
+    paralelo.indexar_documentos(workers=2)
+
+    assert [asdict(doc) for doc in paralelo.index] == [asdict(doc) for doc in serie.index]
+    assert [paralelo._contenido(doc) for doc in paralelo.index] == [serie._contenido(doc) for doc in serie.index]
+    assert "proveedor 3" in paralelo._contenido(paralelo.index[3])
+    evento = paralelo.get_audit_log(limit=1)[0]
+    assert evento["workers"] == 2
+    assert evento["timeouts"] == 0
@@ -0,0 +1,74 @@
+from pathlib import Path
+
+from dropbox_integration.search_engine import SearchEngine, fingerprint_corpus
+
+
+def _docs() -> list[dict[str, object]]:
+    return [
+        {
+            "nombre_archivo": "factura_acme_enero.pdf",
+            "ruta_completa": "C:/tmp/factura_acme_enero.pdf",
+            "extension": ".pdf",
+            "carpeta": "PDF",
+            "categoria": "PDF",
+            "etiquetas": ["factura"],
+            "tamaño": 10,
+            "fecha_modificacion": "2026-01-10T10:00:00",
+            "sha256": "sha-1",
+            "hash": "sha-1",
+            "contenido_extraido": "factura proveedor acme enero",
+            "proveedor_virtual": "ACME",
+        },
+        {
+            "nombre_archivo": "nota_credito_betha.txt",
+            "ruta_completa": "C:/tmp/nota_credito_betha.txt",
+            "extension": ".txt",
+            "carpeta": "TEXTO",
+            "categoria": "Texto",
+            "etiquetas": ["nota"],
+            "tamaño": 10,
+            "fecha_modificacion": "2026-01-12T10:00:00",
+            "sha256": "sha-2",
+            "hash": "sha-2",
+            "contenido_extraido": "nota de credito betha",
+            "proveedor_virtual": "BETHA",
+        },
+    ]
+
+
+def test_save_y_load_index_reproducen_resultados(tmp_path: Path) -> None:
+    original = SearchEngine(_docs())
+    original.indexar_documentos()
+    original.construir_modelo_semantico()
+    original.save_index(tmp_path / "indice")
+
+    cargado = SearchEngine(_docs())
+    assert cargado.load_index(tmp_path / "indice") is True
+    assert len(cargado.index) == 2
+    assert cargado._tfidf is not None
+
+    kwargs = {"filtros": {}, "usar_semantico": True, "modo": "flexible", "auditoria": True}
+    esperado = original.buscar_avanzado("factura acme", **kwargs)
+    obtenido = cargado.buscar_avanzado("factura acme", **kwargs)
+    assert [x["hash"] for x in obtenido] == [x["hash"] for x in esperado]
+    assert obtenido[0]["score_semantico"] == esperado[0]["score_semantico"]
+    assert any(str(x.get("evento")) == "carga_indice" for x in cargado.get_audit_log())
+
+
+def test_fingerprint_distinto_obliga_a_reindexar(tmp_path: Path) -> None:
+    engine = SearchEngine(_docs())
+    assert engine.cargar_o_indexar(tmp_path / "indice") is False
+    assert SearchEngine(_docs()).cargar_o_indexar(tmp_path / "indice") is True
+
+    modificados = _docs()
+    modificados[0]["sha256"] = "sha-1-editado"
+    assert fingerprint_corpus(modificados) != fingerprint_corpus(_docs())
+    assert SearchEngine(modificados).load_index(tmp_path / "indice") is False
+
+    # Metadatos reasignados sin tocar el archivo (p. ej. el árbol de carpetas) también invalidan el índice.
+    for campo, valor in (("proveedor_virtual", "GAMMA"), ("hospital_virtual", "NORTE"), ("carpeta", "OTRA"), ("contenido_extraido", "otro texto")):
+        reasignados = _docs()
+        reasignados[0][campo] = valor
+        assert fingerprint_corpus(reasignados) != fingerprint_corpus(_docs())
+        assert SearchEngine(reasignados).cargar_o_indexar(tmp_path / "indice") is False
+        assert SearchEngine(_docs()).cargar_o_indexar(tmp_path / "indice") is False
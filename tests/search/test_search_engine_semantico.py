@@ -35,3 +35,34 @@ def test_modelo_tfidf_y_ranking_semantico() -> None:
     resultados = engine.buscar_semantico("factura de cliente", top_k=5)
     assert resultados
     assert resultados[0]["nombre"] == "factura_mensual.pdf"
+
+
+def test_semantico_restringido_a_candidatos_coincide_con_coseno() -> None:
+    import numpy as np
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    docs = [
+        {
+            "nombre_archivo": f"doc_{i}.txt",
+            "ruta_completa": f"s{i}",
+            "extension": ".txt",
+            "carpeta": "TEXTO",
+            "categoria": "Texto",
+            "etiquetas": ["nota"],
+            "tamaño": 1,
+            "fecha_modificacion": "2026-01-01",
+            "hash": f"s{i}",
+            "contenido_extraido": texto,
+        }
+        for i, texto in enumerate(["factura cliente", "manual usuario", "factura proveedor enero", "nota credito", "factura"])
+    ]
+    engine = SearchEngine(docs)
+    engine.indexar_documentos()
+    engine.construir_modelo_semantico()
+
+    posiciones = np.array([4, 0, 2], dtype=np.int64)
+    esperado = cosine_similarity(engine._tfidf.transform(["factura cliente"]), engine._matriz_tfidf).ravel()[posiciones]
+    assert np.allclose(engine._semantic_scores("factura cliente", posiciones), esperado)
+
+    scores = np.array([0.2, 0.9, 0.2, 0.5, 0.2])
+    assert SearchEngine._top_k_indices(scores, 3).tolist() == [1, 3, 0]
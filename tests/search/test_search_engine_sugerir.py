@@ -0,0 +1,64 @@
+from time import perf_counter
+
+from benchmarks.corpus_sintetico import generar_corpus
+from dropbox_integration.search_engine import SearchEngine
+
+
+def _docs() -> list[dict[str, object]]:
+    filas = [
+        ("factura_acme_enero.pdf", "ACME Medical", "Hospital Central", ["factura", "pagada"]),
+        ("factura_acme_marzo.pdf", "ACME Medical", "Hospital Norte", ["factura"]),
+        ("nota_credito_acme.pdf", "ACME Medical", "Hospital Central", ["nota_credito"]),
+        ("factura_betha.pdf", "Betha Farma", "Hospital Central", ["factura"]),
+        ("orden_compra_gamma.xlsx", "Distribuidora Gamma", "Clínica San José", ["orden_compra"]),
+    ]
+    return [
+        {
+            "nombre_archivo": nombre,
+            "ruta_completa": f"C:/tmp/{nombre}",
+            "extension": nombre[nombre.rfind(".") :],
+            "carpeta": "PDF",
+            "etiquetas": etiquetas,
+            "fecha_modificacion": "2026-01-10T10:00:00",
+            "hash": f"sug{i}",
+            "proveedor_virtual": proveedor,
+            "hospital_virtual": hospital,
+        }
+        for i, (nombre, proveedor, hospital, etiquetas) in enumerate(filas)
+    ]
+
+
+def test_sugerir_prefijos_ponderados_por_frecuencia() -> None:
+    engine = SearchEngine(_docs())
+    engine.indexar_documentos()
+
+    assert engine.sugerir("hosp") == [
+        {"texto": "Hospital Central", "campo": "hospital", "frecuencia": 3},
+        {"texto": "Hospital Norte", "campo": "hospital", "frecuencia": 1},
+    ]
+    assert [(s["texto"], s["campo"]) for s in engine.sugerir("FACT", limit=2)] == [("factura", "etiqueta"), ("factura_acme_enero.pdf", "nombre")]
+    # Completa desde palabras interiores de proveedores, hospitales y etiquetas, no de nombres.
+    assert [s["texto"] for s in engine.sugerir("gam")] == ["Distribuidora Gamma"]
+    assert [s["texto"] for s in engine.sugerir("credito")] == ["nota_credito"]
+    assert [s["texto"] for s in engine.sugerir("josé")] == ["Clínica San José"]
+    assert engine.sugerir("zzz") == [] and engine.sugerir("") == []
+
+    engine.eliminar_documento("sug0")
+    assert engine.sugerir("hospital central")[0]["frecuencia"] == 2
+    engine.agregar_documentos([dict(_docs()[4], hash="sug9", ruta_completa="C:/tmp/otra", nombre_archivo="otra_gamma.xlsx")])
+    assert engine.sugerir("distribuidora")[0]["frecuencia"] == 2
+
+
+def test_sugerir_no_recorre_todo_el_rango_del_prefijo() -> None:
+    engine = SearchEngine(generar_corpus(5000))
+    engine.indexar_documentos()
+    resultados = engine.sugerir("f", limit=10)
+    assert len(resultados) == 10
+    frecuencias = [int(s["frecuencia"]) for s in resultados]
+    assert frecuencias == sorted(frecuencias, reverse=True)
+    assert resultados[0]["campo"] == "etiqueta" and resultados[0]["texto"] == "factura"
+
+    inicio = perf_counter()
+    for _ in range(200):
+        engine.sugerir("f", limit=10)
+    assert (perf_counter() - inicio) / 200 < 0.005
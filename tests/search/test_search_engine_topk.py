@@ -0,0 +1,77 @@
+from dropbox_integration.search_engine import SearchEngine
+
+
+def _docs() -> list[dict[str, object]]:
+    proveedores = ["ACME", "BETHA", "GAMMA", "DELTA"]
+    conceptos = ["material quirurgico", "servicio medico", "renta de equipo", "consumibles"]
+    docs: list[dict[str, object]] = []
+    for i in range(40):
+        proveedor = proveedores[i % len(proveedores)]
+        concepto = conceptos[(i // 4) % len(conceptos)]
+        docs.append(
+            {
+                "nombre_archivo": f"factura_{proveedor.lower()}_{i}.pdf",
+                "ruta_completa": f"C:/tmp/factura_{proveedor.lower()}_{i}.pdf",
+                "extension": ".pdf",
+                "carpeta": "PDF",
+                "categoria": "PDF",
+                "etiquetas": ["factura"] if i % 3 else ["nota"],
+                "tamaño": 10,
+                "fecha_modificacion": "2026-01-10T10:00:00",
+                "hash": f"t{i}",
+                "contenido_extraido": f"factura {proveedor.lower()} {concepto}",
+                "proveedor_virtual": proveedor,
+                "hospital_virtual": "Hospital Central",
+            }
+        )
+    return docs
+
+
+def test_top_k_con_poda_coincide_con_ranking_completo() -> None:
+    engine = SearchEngine(_docs())
+    engine.indexar_documentos()
+    engine.construir_modelo_semantico()
+
+    for modo in ("flexible", "estricta"):
+        for query in ["factura acme", "betha servicio medico", "nota"]:
+            kwargs = {"filtros": {}, "modo": modo, "usar_semantico": True, "auditoria": True}
+            completo = engine.buscar_avanzado(query, **kwargs)
+            top = engine.buscar_avanzado(query, top_k=5, **kwargs)
+            assert [x["hash"] for x in top] == [x["hash"] for x in completo[:5]]
+            assert [x["score_final"] for x in top] == [x["score_final"] for x in completo[:5]]
+            vectorizado = engine.buscar_avanzado(query, top_k=5, vectorizado=True, **kwargs)
+            assert [x["hash"] for x in vectorizado] == [x["hash"] for x in top]
+
+
+def test_top_k_registra_documentos_podados() -> None:
+    engine = SearchEngine(_docs())
+    engine.indexar_documentos()
+
+    engine.buscar_avanzado("factura_acme_0", filtros={}, modo="flexible", top_k=1)
+    evento = next(x for x in reversed(engine.get_audit_log()) if x.get("evento") == "busqueda_avanzada")
+    assert int(evento["podados"]) > 0
+
+
+def test_plan_scoring_omite_componentes_sin_efecto(monkeypatch) -> None:
+    engine = SearchEngine(_docs())
+    engine.indexar_documentos()
+    engine.construir_modelo_semantico()
+    esperado = {modo: engine.buscar_avanzado("factura acme", filtros={}, modo=modo, auditoria=True) for modo in ("estricta", "flexible")}
+
+    llamadas: list[str] = []
+    for nombre in ("_score_content", "_score_temporal", "_score_structural", "_boost_contextual", "_fuzzy_batch", "_semantic_scores_ctx"):
+        original = getattr(engine, nombre)
+        monkeypatch.setattr(engine, nombre, lambda *a, _n=nombre, _o=original, **k: (llamadas.append(_n), _o(*a, **k))[1])
+
+    estricta = engine.buscar_avanzado("factura acme", filtros={}, modo="estricta", usar_semantico=True, auditoria=True)
+    assert [x["score_final"] for x in estricta] == [x["score_final"] for x in esperado["estricta"]]
+    assert llamadas == []
+
+    pesos = {"score_fuzzy": 0, "score_semantico": 0, "score_contenido": 0, "score_exacto": 0.5, "score_tokens": 0.5}
+    flexible = engine.buscar_avanzado("factura acme", filtros={}, modo="flexible", usar_semantico=True, weights=pesos, auditoria=True)
+    assert flexible and all(x["score_fuzzy"] == 0 and x["score_semantico"] == 0 for x in flexible)
+    assert not {"_score_content", "_semantic_scores_ctx"} & set(llamadas)
+    # El único cdist es el de candidatos por nombre (define qué documentos se rankean); no hay fuzzy por candidato.
+    assert llamadas.count("_fuzzy_batch") == 1
+    # Sólo los documentos con exacto/tokens > 0 llegan al boosting.
+    assert llamadas.count("_boost_contextual") == len(flexible)
@@ -0,0 +1,67 @@
+from pathlib import Path
+
+import numpy as np
+
+from dropbox_integration.search_engine import SearchEngine
+from dropbox_integration.search_metrics import CLASE_TODAS, HistogramaRodante
+
+
+def _docs() -> list[dict[str, object]]:
+    return [
+        {
+            "nombre_archivo": f"factura_{proveedor}_{i}.pdf",
+            "ruta_completa": f"C:/tmp/factura_{proveedor}_{i}.pdf",
+            "extension": ".pdf",
+            "carpeta": "PDF",
+            "etiquetas": ["factura"],
+            "fecha_modificacion": "2026-01-10T10:00:00",
+            "hash": f"sha-{i}",
+            "contenido_extraido": f"factura proveedor {proveedor} hospital central",
+            "proveedor_virtual": proveedor.upper(),
+        }
+        for i, proveedor in enumerate(["acme", "betha", "gamma", "acme", "delta"])
+    ]
+
+
+def test_histograma_rodante_percentiles_y_expiracion() -> None:
+    ahora = [0.0]
+    histograma = HistogramaRodante(ventana_segundos=10.0, ventanas=3, reloj=lambda: ahora[0])
+    valores = np.linspace(1.0, 100.0, 1000)
+    for valor in valores:
+        histograma.registrar(float(valor))
+    resumen = histograma.resumen()
+    assert resumen["count"] == 1000
+    for clave, q in (("p50_ms", 50), ("p95_ms", 95), ("p99_ms", 99)):
+        assert abs(resumen[clave] - np.percentile(valores, q)) / np.percentile(valores, q) < 0.02
+    ahora[0] = 25.0
+    histograma.registrar(5.0)
+    assert histograma.resumen()["count"] == 1001
+    ahora[0] = 35.0
+    resumen = histograma.resumen()
+    assert resumen["count"] == 1
+    # Los acumulados no expiran con las ventanas: _count/_sum de Prometheus nunca decrecen.
+    assert resumen["count_total"] == 1001
+    assert abs(resumen["suma_total_ms"] - (float(valores.sum()) + 5.0)) < 1e-3
+
+
+def test_busquedas_registran_latencias_por_etapa_y_exportan(tmp_path: Path) -> None:
+    engine = SearchEngine(_docs())
+    engine.indexar_documentos()
+    for query in ("acme", "hospital central", "acme"):
+        engine.buscar_avanzado(query, filtros={}, usar_semantico=True, modo="flexible")
+    engine.buscar_avanzado("acme hospital", filtros={}, modo="estricta", usar_cache=True)
+    engine.buscar_avanzado("acme hospital", filtros={}, modo="estricta", usar_cache=True)
+
+    clases = engine.get_latency_histograms()["clases"]
+    assert clases["flexible:semantica:1"]["total"]["count"] == 2
+    assert clases["flexible:semantica:2-3"]["semantico"]["count"] == 1
+    assert clases["estricta:lexica:2-3"]["cache"]["count"] == 1
+    assert clases[CLASE_TODAS]["total"]["count"] == 5
+    assert {"filtrado", "postings", "ranking", "orden", "salida"} <= set(clases[CLASE_TODAS])
+
+    prom = engine.export_latencias_prometheus(str(tmp_path / "latencias.prom")).read_text(encoding="utf-8")
+    assert "# TYPE dropbox_search_stage_latency_ms summary" in prom
+    assert 'dropbox_search_stage_latency_ms_count{clase="flexible:semantica:1",etapa="total"} 2' in prom
+    assert 'clase="todas"' not in prom
+    assert engine.export_latencias_json(str(tmp_path / "latencias.json")).exists()
+    assert SearchEngine(_docs(), metricas=False).get_latency_histograms() == {}
@@ -0,0 +1,74 @@
+import json
+import threading
+from pathlib import Path
+from urllib.request import urlopen
+
+from dropbox_integration.search_client import SearchClient
+from dropbox_integration.search_engine import SearchEngine
+from dropbox_integration.search_server import SearchServer
+
+
+def _docs() -> list[dict[str, object]]:
+    return [
+        {
+            "nombre_archivo": nombre,
+            "ruta_completa": f"C:/tmp/{nombre}",
+            "extension": ".pdf",
+            "carpeta": "PDF",
+            "categoria": "PDF",
+            "etiquetas": ["factura"],
+            "fecha_modificacion": "2026-01-10T10:00:00",
+            "hash": f"srv{i}",
+            "contenido_extraido": nombre.replace("_", " "),
+            "proveedor_virtual": proveedor,
+        }
+        for i, (nombre, proveedor) in enumerate(
+            [("factura_acme_enero.pdf", "ACME"), ("factura_betha_marzo.pdf", "BETHA"), ("nota_credito_acme.pdf", "ACME")]
+        )
+    ]
+
+
+def test_servidor_local_comparte_indice_y_exporta_auditoria(tmp_path: Path) -> None:
+    asignacion = tmp_path / "dropbox_asignacion_app.json"
+    asignacion.write_text(json.dumps(_docs()), encoding="utf-8")
+    servidor = SearchServer(asignacion, index_dir=tmp_path / "search_index", port=0)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    try:
+        cliente = SearchClient(f"http://127.0.0.1:{servidor.server_address[1]}")
+        assert cliente.disponible()
+
+        local = SearchEngine(_docs())
+        local.indexar_documentos()
+        local.construir_modelo_semantico()
+        filtros = {"proveedor": "ACME"}
+        esperado = local.buscar_avanzado("factura", filtros=filtros, auditoria=True)
+        resultados = cliente.buscar_avanzado("factura", filtros=filtros, auditoria=True, profiling=True)
+        assert [r["id"] for r in resultados] == [r["id"] for r in esperado]
+        assert [r["score_final"] for r in resultados] == [r["score_final"] for r in esperado]
+        assert "components" in cliente.get_last_performance_metrics()
+        assert any(e["evento"] == "busqueda_auditoria" for e in cliente.get_audit_log(sesion=True))
+
+        payload = json.loads(cliente.export_auditoria_json(str(tmp_path / "audit.json")).read_text(encoding="utf-8"))
+        assert payload["metadata"]["result_rows"] == len(resultados)
+        assert cliente.auditoria_sesion()["resultados_scores"] == payload["resultados_scores"]
+        assert cliente.export_performance_csv(str(tmp_path / "perf.csv")).exists()
+        assert cliente.contar_facetas(campos=["proveedor"]) == {"proveedor": {"acme": 2, "betha": 1}}
+        assert cliente.buscar_lote(["factura", "credito"], filtros={})[1]["query"] == "credito"
+        assert cliente.get_latency_histograms()["clases"]["todas"]["total"]["count"] == 3
+        prom = cliente.export_latencias_prometheus(str(tmp_path / "latencias.prom")).read_text(encoding="utf-8")
+        with urlopen(f"{cliente.url}/metrics") as respuesta:
+            assert respuesta.read().decode("utf-8") == prom
+        pagina = cliente.buscar_pagina("factura", filtros={}, page_size=2)
+        assert len(pagina["resultados"]) == 2 and pagina["total"] == 3
+        assert [r["id"] for r in cliente.iter_buscar("factura", filtros={}, page_size=2)][:2] == [r["id"] for r in pagina["resultados"]]
+
+        version = servidor.indice.version
+        asignacion.write_text(json.dumps(_docs()[:2]), encoding="utf-8")
+        assert cliente.recargar()["documentos"] == 2
+        assert servidor.indice.version == version + 1
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+    assert not SearchClient("http://127.0.0.1:9").disponible()
@@ -0,0 +1,110 @@
+import sys
+import threading
+
+from dropbox_integration.search_engine import SearchEngine
+from dropbox_integration.search_snapshot import IndiceCompartido
+
+
+def _docs(n: int, prefijo: str = "s") -> list[dict[str, object]]:
+    temas = ["factura acme", "nota credito betha", "reporte hospital central", "xml timbrado gamma"]
+    return [
+        {
+            "nombre_archivo": f"{temas[i % 4].replace(' ', '_')}_{i}.pdf",
+            "ruta_completa": f"C:/tmp/{prefijo}{i}.pdf",
+            "extension": ".pdf",
+            "carpeta": "PDF",
+            "etiquetas": [temas[i % 4].split()[0]],
+            "fecha_modificacion": "2026-01-10T10:00:00",
+            "hash": f"{prefijo}{i}",
+            "contenido_extraido": f"{temas[i % 4]} proveedor pago",
+        }
+        for i in range(n)
+    ]
+
+
+def test_consultas_concurrentes_con_contexto_por_hilo_y_publicacion_rcu() -> None:
+    indice = IndiceCompartido()
+    engine = indice.reindexar(_docs(40))
+    consultas = ["factura", "credito", "hospital", "timbrado"]
+    esperado = {q: engine.buscar_avanzado(q, filtros={}, usar_semantico=True, usar_cache=False) for q in consultas}
+    errores: list[str] = []
+    barrera = threading.Barrier(len(consultas) + 1)
+
+    def lector(query: str) -> None:
+        barrera.wait()
+        for _ in range(15):
+            resultados = engine.buscar_avanzado(query, filtros={}, usar_semantico=True, profiling=True, usar_cache=False)
+            contexto = engine.contexto_sesion()
+            if resultados != esperado[query]:
+                errores.append(f"resultados distintos para {query}")
+            if contexto["query_context"].get("query_raw") != query or contexto["resultados"] != resultados:
+                errores.append(f"contexto mezclado para {query}")
+
+    hilos = [threading.Thread(target=lector, args=(q,)) for q in consultas]
+    for hilo in hilos:
+        hilo.start()
+    barrera.wait()
+    nuevo = indice.actualizar(lambda copia: copia.agregar_documentos(_docs(4, prefijo="n")))
+    for hilo in hilos:
+        hilo.join()
+
+    assert errores == []
+    assert indice.version == 2
+    assert indice.actual() is nuevo and nuevo is not engine
+    assert len(engine.index) == 40 and len(nuevo.index) == 44
+
+
+def test_obtener_reutiliza_snapshot_del_mismo_corpus() -> None:
+    indice = IndiceCompartido(semantico=False)
+    docs = _docs(8)
+    primero = indice.obtener(docs)
+    assert indice.obtener(list(reversed(docs))) is primero
+    assert indice.obtener(_docs(9)) is not primero
+    assert indice.version == 2
+
+    engine = SearchEngine(docs)
+    engine.buscar_avanzado("factura", filtros={})
+    hilo = threading.Thread(target=lambda: engine.buscar_avanzado("credito", filtros={}))
+    hilo.start()
+    hilo.join()
+    assert engine.contexto_sesion()["query_context"]["query_raw"] == "factura"
+    assert all(evento.get("query") != "credito" for evento in engine.get_audit_log(sesion=True))
+
+
+def test_actualizar_mientras_los_lectores_consultan() -> None:
+    indice = IndiceCompartido(semantico=False)
+    indice.reindexar(_docs(600))
+    errores: list[BaseException] = []
+    detener = threading.Event()
+
+    def lector(numero: int) -> None:
+        i = 0
+        while not detener.is_set():
+            engine = indice.actual()
+            # Consultas distintas en cada vuelta para que los memos de expansión y BM25F sigan creciendo.
+            query = f"{['fact', 'cred', 'hosp', 'timb'][i % 4]} {numero * 1000 + i}"
+            try:
+                engine.buscar_avanzado(query, filtros={}, auditoria=True, usar_cache=False)
+                engine.buscar_avanzado(query, filtros={}, motor="bm25f", auditoria=True, usar_cache=False)
+            except BaseException as exc:  # noqa: BLE001 - se reporta al hilo principal
+                errores.append(exc)
+                return
+            i += 1
+
+    hilos = [threading.Thread(target=lector, args=(n,)) for n in range(6)]
+    intervalo = sys.getswitchinterval()
+    # Cambios de hilo frecuentes para que los lectores escriban sus memos en medio de la copia.
+    sys.setswitchinterval(1e-5)
+    for hilo in hilos:
+        hilo.start()
+    try:
+        for _ in range(60):
+            indice.actualizar(lambda copia: None)
+    finally:
+        detener.set()
+        for hilo in hilos:
+            hilo.join()
+        sys.setswitchinterval(intervalo)
+
+    assert errores == []
+    assert indice.version == 61
@@ -0,0 +1,69 @@
+from dropbox_integration.search_engine import SearchEngine
+from dropbox_integration.search_store import DocumentStore
+
+
+def test_document_store_buffer_y_token_ids() -> None:
+    store = DocumentStore()
+    store.asignar("a", nombre="factura_a.pdf", contenido="factura factura acme", tokens={"factura", "acme"}, estructura={"pdf"}, fecha_ts=10.0)
+    store.asignar("b", nombre="nota_b.txt", contenido="nota betha", tokens={"nota", "betha"}, estructura=set(), fecha_ts=None)
+
+    assert store.contar("a", "factura") == 2
+    assert store.contar("b", "factura") == 0
+    assert store.encontrar("b", "betha") == 5
+    assert store.tokens("a") == {"factura", "acme"}
+    assert store.coincidencias(store.token_ids("a"), [store.vocab["acme"], store.vocab["acme"], -1]) == 2
+    assert store.fecha_ts("b") is None
+
+    store.asignar("a", nombre="factura_a.pdf", contenido="acme", tokens={"acme"}, estructura=set(), fecha_ts=None)
+    store.eliminar("b")
+    store.compactar()
+    assert len(store) == 1
+    assert store.contenido("a") == "acme"
+    assert store.contar("a", "factura") == 0
+
+
+def test_document_store_reconstruye_mayusculas_desde_tramos() -> None:
+    store = DocumentStore()
+    texto = "Factura ACME del Proveedor crédito ÁNGEL fin"
+    store.asignar("a", nombre="a.pdf", contenido=texto, tokens=set(), estructura=set(), fecha_ts=None)
+    store.asignar("b", nombre="b.pdf", contenido="nota İstanbul", tokens=set(), estructura=set(), fecha_ts=None)
+    store.asignar("c", nombre="c.pdf", contenido="todo en minusculas", tokens=set(), estructura=set(), fecha_ts=None)
+
+    assert store.contenido("a") == texto.lower()
+    assert store.contar("a", "acme") == 1 and store.encontrar("a", "proveedor") == texto.lower().find("proveedor")
+    assert store.original("a") == texto
+    for desde, hasta in [(0, 5), (3, 11), (9, 10), (12, 30), (30, len(texto)), (40, 100)]:
+        assert store.original("a", desde, hasta) == texto[desde:hasta]
+    assert store.original("b") == "nota İstanbul" and store.contar("b", "i̇stanbul") == 1
+    assert store.original("c") == "todo en minusculas"
+    store.eliminar("b")
+    store.compactar()
+    assert store.original("a") == texto and store.original("c") == "todo en minusculas"
+    assert store.memoria()["contenido_original"] > 0
+
+
+def test_reporte_de_memoria_del_indice() -> None:
+    docs = [
+        {
+            "nombre_archivo": f"factura_{i}.pdf",
+            "ruta_completa": f"C:/tmp/factura_{i}.pdf",
+            "extension": ".pdf",
+            "carpeta": "PDF",
+            "categoria": "PDF",
+            "etiquetas": ["factura"],
+            "tamaño": 10,
+            "fecha_modificacion": "2026-01-10T10:00:00",
+            "hash": f"m{i}",
+            "contenido_extraido": "factura proveedor acme " * 5,
+            "proveedor_virtual": "ACME",
+        }
+        for i in range(5)
+    ]
+    engine = SearchEngine(docs)
+    engine.indexar_documentos()
+
+    reporte = engine.get_memory_footprint()
+    assert reporte["documentos_indexados"] == 5
+    assert reporte["componentes"]["store_contenido_buffer"] > 0
+    assert reporte["total_bytes"] == sum(reporte["componentes"].values())
+    assert engine.index[0].proveedor_virtual is engine.index[4].proveedor_virtual
@@ -15,7 +15,7 @@ import sys
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 import pandas as pd
 import streamlit as st
@@ -52,7 +52,9 @@ from dropbox_integration.image_renamer import _rename_images_by_folder
 from dropbox_integration.invoice_provider_classifier import classify_invoice_provider
 from dropbox_integration.invoice_receptor_analytics import build_invoices_dataset, summarize_by_receptor
 from dropbox_integration.report_generator import generar_paquete_reportes
+from dropbox_integration.search_client import SearchClient
 from dropbox_integration.search_engine import SearchEngine, construir_estadisticas_busqueda
+from dropbox_integration.search_snapshot import indice_compartido
 from downloads.download_filters import aplicar_filtros, indexar_documentos
 from downloads.file_packager import construir_zip_memoria
 from downloads.preview_metadata import resumen_previsualizacion
@@ -103,11 +105,12 @@ def _default_boosting_weights() -> dict[str, float]:
         "score_tokens": 1.0,
         "score_temporal": 1.0,
         "score_estructural": 1.0,
+        "score_bm25f": 1.0,
     }
 
 
 def _render_search_audit_panel(
-    engine: SearchEngine,
+    engine: SearchEngine | SearchClient,
     resultados_df: pd.DataFrame,
     audit_log: list[dict[str, object]],
     weights_aplicados: dict[str, Any],
@@ -124,6 +127,7 @@ def _render_search_audit_panel(
         "score_tokens",
         "score_temporal",
         "score_estructural",
+        "score_bm25f",
         "score_boosting",
         "score_final",
     ]
@@ -146,6 +150,7 @@ def _render_search_audit_panel(
                 "tokens": float(resultados_df.get("score_tokens", pd.Series(dtype=float)).mean() or 0.0),
                 "temporal": float(resultados_df.get("score_temporal", pd.Series(dtype=float)).mean() or 0.0),
                 "estructural": float(resultados_df.get("score_estructural", pd.Series(dtype=float)).mean() or 0.0),
+                "bm25f": float(resultados_df.get("score_bm25f", pd.Series(dtype=float)).mean() or 0.0),
                 "boosting": float(resultados_df.get("score_boosting", pd.Series(dtype=float)).mean() or 0.0),
             }
             st.caption("Top factores promedio")
@@ -211,7 +216,7 @@ def _render_search_audit_panel(
             )
 
 
-def _render_search_performance_panel(engine: SearchEngine, out_dir: Path) -> None:
+def _render_search_performance_panel(engine: SearchEngine | SearchClient, out_dir: Path) -> None:
     """Renderiza panel de perfilado de performance del motor de búsqueda."""
     st.markdown("### Perfil de performance del motor")
 
@@ -1110,15 +1115,47 @@ def render_dropbox_page(state: StateManager, carpeta: Path) -> None:
             st.error(f"No se pudo ejecutar renombrado automático: {error}")
 
     st.markdown("### Búsqueda avanzada")
+    # Un solo índice caliente para todas las sesiones: el servidor local de búsqueda si está corriendo
+    # (python -m dropbox_integration.search_server) o, si no, un snapshot compartido en este proceso.
+    # Se indexa el corpus completo; los filtros virtuales se aplican como filtros de búsqueda.
+    filtros_virtuales = {"proveedor": proveedor_sel, "anio": anio_sel, "hospital": hospital_sel, "mes": mes_sel}
+    cliente_busqueda = SearchClient()
+    engine: SearchEngine | SearchClient
+    if cliente_busqueda.disponible():
+        engine = cliente_busqueda
+    else:
+        engine = indice_compartido(str(docs_dir)).obtener(registros, index_dir=docs_dir / "search_index")
+    facetas = engine.contar_facetas(filtros=filtros_virtuales, campos=["tipo", "extension", "carpeta", "etiquetas"])
+
+    def _con_conteo(campo: str) -> Callable[[object], str]:
+        def _formato(valor: object) -> str:
+            if str(valor) == "TODOS":
+                return "TODOS"
+            return f"{valor} ({facetas.get(campo, {}).get(str(valor).strip().lower(), 0):,})"
+
+        return _formato
+
     b1, b2, b3 = st.columns(3)
     with b1:
         query = st.text_input("Texto de búsqueda", value="", key="dropbox_search_query")
-        tipo_sel = st.selectbox("Tipo", ["TODOS", *tipos], index=0, key="dropbox_tipo")
+        # Type-ahead desde el índice de prefijos: no ejecuta el ranking mientras se escribe.
+        sugerencias = engine.sugerir(query, limit=8) if query.strip() else []
+        if sugerencias:
+            sugerencia_sel = st.selectbox(
+                "Sugerencias",
+                ["", *[str(s["texto"]) for s in sugerencias]],
+                index=0,
+                key="dropbox_search_sugerencia",
+                format_func=lambda valor: valor or "—",
+            )
+            if sugerencia_sel:
+                query = sugerencia_sel
+        tipo_sel = st.selectbox("Tipo", ["TODOS", *tipos], index=0, key="dropbox_tipo", format_func=_con_conteo("tipo"))
     with b2:
-        ext_sel = st.selectbox("Extensión", ["TODOS", *extensiones], index=0, key="dropbox_ext")
-        carpeta_sel = st.selectbox("Carpeta", ["TODOS", *carpetas], index=0, key="dropbox_carpeta")
+        ext_sel = st.selectbox("Extensión", ["TODOS", *extensiones], index=0, key="dropbox_ext", format_func=_con_conteo("extension"))
+        carpeta_sel = st.selectbox("Carpeta", ["TODOS", *carpetas], index=0, key="dropbox_carpeta", format_func=_con_conteo("carpeta"))
     with b3:
-        etiquetas_sel = st.multiselect("Etiquetas", etiquetas_disponibles, default=[])
+        etiquetas_sel = st.multiselect("Etiquetas", etiquetas_disponibles, default=[], format_func=_con_conteo("etiquetas"))
         modo_label = st.radio(
             "Modo de búsqueda",
             ["Modo estricto (exacto + filtros)", "Modo flexible (híbrido avanzado)"],
@@ -1129,6 +1166,7 @@ def render_dropbox_page(state: StateManager, carpeta: Path) -> None:
         fuzzy = st.checkbox("Búsqueda difusa", value=True)
         por_contenido = st.checkbox("Búsqueda por contenido", value=True)
         semantico = st.checkbox("Búsqueda semántica (IA)", value=False)
+        motor_bm25f = st.checkbox("Motor BM25F por campos", value=False, key="dropbox_motor_bm25f")
         mostrar_auditoria = st.checkbox("Mostrar auditoría avanzada", value=False, key="dropbox_show_audit")
         activar_profiling = st.checkbox("Activar modo profiling", value=False, key="dropbox_enable_profiling")
 
@@ -1151,6 +1189,7 @@ def render_dropbox_page(state: StateManager, carpeta: Path) -> None:
             weights_busqueda["score_temporal"] = st.slider("peso_temporal", 0.0, 3.0, 1.0, 0.1, key="score_temporal")
             weights_busqueda["score_estructural"] = st.slider("peso_estructural", 0.0, 3.0, 1.0, 0.1, key="score_estructural")
             weights_busqueda["score_contenido"] = st.slider("peso_contenido", 0.0, 3.0, 1.0, 0.1, key="score_contenido")
+            weights_busqueda["score_bm25f"] = st.slider("peso_bm25f", 0.0, 3.0, 1.0, 0.1, key="score_bm25f")
 
     filtros_activos = {
         "tipo": tipo_sel,
@@ -1160,10 +1199,7 @@ def render_dropbox_page(state: StateManager, carpeta: Path) -> None:
         "fuzzy": fuzzy,
         "contenido": por_contenido,
         "semantico": semantico,
-        "proveedor": proveedor_sel,
-        "anio": anio_sel,
-        "hospital": hospital_sel,
-        "mes": mes_sel,
+        **filtros_virtuales,
     }
 
     criterios = (
@@ -1177,9 +1213,6 @@ def render_dropbox_page(state: StateManager, carpeta: Path) -> None:
         or hospital_sel != "TODOS"
         or mes_sel != "TODOS"
     )
-    engine = SearchEngine(registros_filtrados_virtuales)
-    engine.indexar_documentos()
-
     start = time.perf_counter()
     if criterios:
         resultados_busqueda = engine.buscar_avanzado(
@@ -1189,6 +1222,7 @@ def render_dropbox_page(state: StateManager, carpeta: Path) -> None:
             usar_contenido=por_contenido,
             usar_semantico=semantico,
             modo=modo_busqueda,
+            motor="bm25f" if motor_bm25f else "hibrido",
             weights=weights_busqueda,
             auditoria=mostrar_auditoria,
             profiling=activar_profiling,
@@ -1265,7 +1299,7 @@ def render_dropbox_page(state: StateManager, carpeta: Path) -> None:
         st.bar_chart(resultados_df["extension"].value_counts())
 
     if mostrar_auditoria:
-        audit_log = engine.get_audit_log(limit=80)
+        audit_log = engine.get_audit_log(limit=80, sesion=True)
         ultimo_audit = next((x for x in reversed(audit_log) if str(x.get("evento", "")) == "busqueda_auditoria"), {})
         weights_aplicados = dict(ultimo_audit.get("weights", {})) if isinstance(ultimo_audit, dict) else {}
         boost_aplicado = dict(ultimo_audit.get("boost_weights", {})) if isinstance(ultimo_audit, dict) else {}